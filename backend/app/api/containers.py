@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict, Any
 from ..services.container_service import ContainerService
 
@@ -9,7 +10,7 @@ container_service = ContainerService()
 async def list_containers():
     """获取所有容器列表"""
     try:
-        return container_service.list_containers()
+        return await run_in_threadpool(container_service.list_containers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -17,7 +18,7 @@ async def list_containers():
 async def create_container(image: str, name: str):
     """创建新容器"""
     try:
-        return container_service.create_container(image, name)
+        return await container_service.create_container_async(image, name)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -25,7 +26,7 @@ async def create_container(image: str, name: str):
 async def start_container(container_id: str):
     """启动容器"""
     try:
-        success = container_service.start_container(container_id)
+        success = await container_service.start_container_async(container_id)
         return {"success": success}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -34,7 +35,7 @@ async def start_container(container_id: str):
 async def stop_container(container_id: str):
     """停止容器"""
     try:
-        success = container_service.stop_container(container_id)
+        success = await container_service.stop_container_async(container_id)
         return {"success": success}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -43,7 +44,7 @@ async def stop_container(container_id: str):
 async def remove_container(container_id: str):
     """删除容器"""
     try:
-        success = container_service.remove_container(container_id)
+        success = await container_service.remove_container_async(container_id)
         return {"success": success}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
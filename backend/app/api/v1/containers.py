@@ -1,59 +1,77 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict, Optional
+from enum import Enum
 from sqlalchemy.orm import Session
 from ...core.database import get_db
-from ...services.docker_service import DockerService
-from ...schemas.container import ContainerCreate, ContainerResponse
+from ...services.docker_service import DockerService, DETAIL_FIELDS, parse_fields, project_container
+from ...services.image_cache import image_cache
+from ...services.image_puller import image_puller
+from ...services.async_docker import DockerAPIError
+from ...services.stats_collector import StatsCollector
+from ...services.cgroup_stats import CgroupStatsProvider
+from ...schemas.container import ContainerCreate, ContainerResponse, ContainerBulkRequest, ContainerBatchCreate
+import json
 import logging
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 docker_service = DockerService()
+stats_collector = StatsCollector(docker_service)
+cgroup_stats = CgroupStatsProvider(docker_service)
 
-@router.get("/", response_model=List[ContainerResponse])
-def list_containers(db: Session = Depends(get_db)):
-    """列出所有容器"""
+# 响应头中携带容器清单版本号和分页信息
+INVENTORY_VERSION_HEADER = "X-Inventory-Version"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+@router.get("/")
+def list_containers(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    label: Optional[List[str]] = Query(None),
+    name: Optional[str] = None,
+    image: Optional[str] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """列出容器，支持分页、过滤和字段投影
+
+    下一页的 cursor 放在 X-Next-Cursor 响应头中，过滤后的总数放在 X-Total-Count 中。
+    """
     try:
-        logger.info("开始获取容器列表")
-        containers = docker_service.list_containers()
-        logger.info(f"Docker服务返回的原始数据: {containers}")
-        
-        # 确保返回的数据格式符合前端期望
-        formatted_containers = []
-        for container in containers:
-            try:
-                formatted_container = ContainerResponse(
-                    id=str(container.get("id", "")),
-                    name=str(container.get("name", "")),
-                    image=str(container.get("image", "")),
-                    status=str(container.get("status", "")),
-                    ports=container.get("ports", {}),
-                    createdAt=str(container.get("createdAt", "")),
-                    state={},
-                    config={},
-                    networkSettings={}
-                )
-                logger.info(f"格式化后的容器数据: {formatted_container}")
-                formatted_containers.append(formatted_container)
-            except Exception as e:
-                logger.error(f"格式化单个容器数据时出错: {str(e)}, 容器数据: {container}")
-                continue
-                
-        logger.info(f"最终返回的数据: {formatted_containers}")
-        return formatted_containers
+        result = docker_service.query_containers(
+            filters={"status": status, "label": label, "name": name, "image": image},
+            limit=limit,
+            cursor=cursor,
+            fields=parse_fields(fields),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"获取容器列表时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+    if result["version"] is not None:
+        response.headers[INVENTORY_VERSION_HEADER] = str(result["version"])
+    if result["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = result["next_cursor"]
+    response.headers[TOTAL_COUNT_HEADER] = str(result["total"])
+    logger.debug(f"返回 {len(result['items'])}/{result['total']} 个容器")
+    return result["items"]
+
 @router.post("/", response_model=ContainerResponse)
-def create_container(
+async def create_container(
     container: ContainerCreate,
     db: Session = Depends(get_db)
 ):
     """创建新容器"""
     try:
-        return docker_service.create_container(
+        return await docker_service.create_container_async(
             image=container.image,
             name=container.name,
             ports=container.ports,
@@ -62,55 +80,190 @@ def create_container(
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/bulk")
+async def bulk_container_action(request: ContainerBulkRequest):
+    """批量启动/停止/重启/删除容器，以 NDJSON 流的形式按完成顺序返回结果"""
+    container_ids = list(request.ids or [])
+    if request.label_selector:
+        container_ids += await docker_service.find_container_ids_async(request.label_selector)
+
+    async def results():
+        async for result in docker_service.bulk_action(
+            request.action.value,
+            container_ids,
+            parallelism=request.parallelism,
+            timeout=request.timeout,
+            force=request.force,
+        ):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@router.post("/batch")
+async def batch_create_containers(request: ContainerBatchCreate):
+    """按模板批量创建容器，自动分配端口，失败时回滚整个批次"""
+    try:
+        return await docker_service.batch_create_async(
+            request.image,
+            count=request.count,
+            name_pattern=request.name_pattern,
+            environment=request.environment,
+            ports=request.ports,
+            labels=request.labels,
+            instances=[instance.dict() for instance in request.instances or []],
+            start=request.start,
+            parallelism=request.parallelism,
+            timeout=request.timeout,
+            rollback=request.rollback,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"批量创建容器时出错: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.post("/{container_id}/start")
-def start_container(container_id: str, db: Session = Depends(get_db)):
+async def start_container(container_id: str, db: Session = Depends(get_db)):
     """启动容器"""
-    if docker_service.start_container(container_id):
+    if await docker_service.start_container_async(container_id):
         return {"message": "容器已启动"}
     raise HTTPException(status_code=404, detail="容器未找到")
 
 @router.post("/{container_id}/stop")
-def stop_container(container_id: str, db: Session = Depends(get_db)):
+async def stop_container(container_id: str, db: Session = Depends(get_db)):
     """停止容器"""
-    if docker_service.stop_container(container_id):
+    if await docker_service.stop_container_async(container_id):
         return {"message": "容器已停止"}
     raise HTTPException(status_code=404, detail="容器未找到")
 
 @router.delete("/{container_id}")
-def remove_container(
+async def remove_container(
     container_id: str, force: bool = False, db: Session = Depends(get_db)
 ):
     """删除容器"""
-    if docker_service.remove_container(container_id, force=force):
+    if await docker_service.remove_container_async(container_id, force=force):
         return {"message": "容器已删除"}
     raise HTTPException(status_code=404, detail="容器未找到")
 
 @router.get("/{container_id}/logs")
-def get_container_logs(
+async def get_container_logs(
     container_id: str, tail: int = 100, db: Session = Depends(get_db)
 ):
     """获取容器日志"""
-    logs = docker_service.get_container_logs(container_id, tail=tail)
+    logs = await docker_service.get_container_logs_async(container_id, tail=tail)
     if logs:
         return {"logs": logs}
     raise HTTPException(status_code=404, detail="容器未找到")
 
+class LogStreamFormat(str, Enum):
+    sse = "sse"
+    ndjson = "ndjson"
+
+@router.get("/{container_id}/logs/stream")
+async def stream_container_logs(
+    container_id: str,
+    follow: bool = False,
+    since: Optional[int] = None,
+    until: Optional[int] = None,
+    stdout: bool = True,
+    stderr: bool = True,
+    timestamps: bool = False,
+    tail: str = "all",
+    format: LogStreamFormat = LogStreamFormat.sse,
+):
+    """以 SSE 或 NDJSON 流式返回容器日志，支持 follow 实时跟踪"""
+    try:
+        logs = await docker_service.open_log_stream(
+            container_id,
+            follow=follow,
+            stdout=stdout,
+            stderr=stderr,
+            since=since,
+            until=until,
+            timestamps=timestamps,
+            tail=tail,
+        )
+    except DockerAPIError as e:
+        if e.status == 404:
+            raise HTTPException(status_code=404, detail="容器未找到")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    async def events():
+        async for stream, text in logs:
+            if format == LogStreamFormat.ndjson:
+                yield json.dumps({"stream": stream, "data": text}, ensure_ascii=False) + "\n"
+            else:
+                # 每行一条 data 字段，末尾换行由事件边界表示
+                lines = text[:-1] if text.endswith("\n") else text
+                data = "\n".join(f"data: {line}" for line in lines.split("\n"))
+                yield f"event: {stream}\n{data}\n\n"
+
+    media_type = "text/event-stream" if format == LogStreamFormat.sse else "application/x-ndjson"
+    return StreamingResponse(
+        events(),
+        media_type=media_type,
+        # 关闭反向代理缓冲，日志块到达后立即下发
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.get("/{container_id}/stats")
-def get_container_stats(container_id: str, db: Session = Depends(get_db)):
+async def get_container_stats(container_id: str, db: Session = Depends(get_db)):
     """获取容器统计信息"""
-    stats = docker_service.get_container_stats(container_id)
+    # 后台采集器已有样本时直接从内存返回，其次读取本机 cgroup 文件
+    stats = stats_collector.latest(container_id)
+    if stats is None and cgroup_stats.available:
+        stats = await run_in_threadpool(cgroup_stats.read, container_id)
+    if stats is None:
+        stats = await docker_service.get_container_stats_async(container_id)
     if stats:
         return stats
     raise HTTPException(status_code=404, detail="容器未找到")
 
-@router.get("/{container_id}", response_model=ContainerResponse)
-def get_container(container_id: str, db: Session = Depends(get_db)):
-    """获取容器详情"""
+@router.get("/{container_id}/stats/history")
+def get_container_stats_history(container_id: str, limit: Optional[int] = None):
+    """获取后台采集器缓存的最近统计样本"""
+    samples = stats_collector.history(container_id, limit=limit)
+    if samples is None:
+        raise HTTPException(status_code=404, detail="容器没有统计样本")
+    return samples
+
+@router.get("/image-cache")
+def get_image_cache_stats():
+    """获取镜像标签缓存的命中统计"""
+    return image_cache.stats()
+
+@router.get("/images/pulls")
+def get_image_pulls():
+    """获取进行中和最近完成的镜像拉取及进度"""
+    return image_puller.status()
+
+@router.post("/images/pull")
+def pull_image(image: str):
+    """提交镜像拉取，不等待完成；相同镜像的拉取会合并"""
+    image_puller.pull(docker_service.client, image)
+    return {"message": "镜像拉取已提交", "image": image}
+
+@router.get("/{container_id}")
+def get_container(
+    container_id: str,
+    response: Response,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """获取容器详情，fields 可以跳过 config、networkSettings 等大字段"""
+    try:
+        projection = parse_fields(fields) or list(DETAIL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        container = docker_service.get_container(container_id)
+        version, container = docker_service.get_container_with_version(container_id)
         if container:
-            return container
+            if version is not None:
+                response.headers[INVENTORY_VERSION_HEADER] = str(version)
+            return project_container(container, projection)
         raise HTTPException(status_code=404, detail="容器未找到")
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"获取容器详情时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
@@ -0,0 +1,65 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+from ...services.docker_fleet import DockerFleet
+from ...services.docker_service import parse_fields
+
+router = APIRouter()
+fleet = DockerFleet()
+
+def _check_configured():
+    if not fleet.hosts:
+        raise HTTPException(status_code=400, detail="未配置 DOCKER_HOSTS，多主机模式不可用")
+
+@router.get("/hosts")
+def list_hosts():
+    """列出配置的 Docker 主机"""
+    return fleet.hosts
+
+@router.get("/containers")
+def list_fleet_containers(
+    status: Optional[str] = None,
+    label: Optional[List[str]] = Query(None),
+    name: Optional[str] = None,
+    image: Optional[str] = None,
+    fields: Optional[str] = None,
+    host: Optional[List[str]] = Query(None),
+    timeout: Optional[float] = Query(None, gt=0),
+):
+    """并行汇总所有主机的容器列表，超时的主机在 hosts 中标记为 timeout"""
+    _check_configured()
+    try:
+        return fleet.list_containers(
+            filters={"status": status, "label": label, "name": name, "image": image},
+            fields=parse_fields(fields),
+            hosts=host,
+            timeout=timeout,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/containers/{container_id}/stats")
+def get_fleet_container_stats(
+    container_id: str,
+    host: Optional[List[str]] = Query(None),
+    timeout: Optional[float] = Query(None, gt=0),
+):
+    """在所有主机上并行查找容器并返回统计信息"""
+    _check_configured()
+    try:
+        return fleet.get_container_stats(container_id, hosts=host, timeout=timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/containers/{container_id}/logs")
+def get_fleet_container_logs(
+    container_id: str,
+    tail: int = 100,
+    host: Optional[List[str]] = Query(None),
+    timeout: Optional[float] = Query(None, gt=0),
+):
+    """在所有主机上并行查找容器并返回日志"""
+    _check_configured()
+    try:
+        return fleet.get_container_logs(container_id, tail=tail, hosts=host, timeout=timeout)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,26 +1,113 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Optional
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, Iterator, List, Dict, Optional
+from kubernetes.client.rest import ApiException
 from sqlalchemy.orm import Session
+from ...core.config import settings
 from ...core.database import get_db
 from ...services.kubernetes_service import KubernetesService
+from ...services.k8s_informer import parse_label_selector
+from ...services.k8s_apply import parse_manifests
 from ...schemas.kubernetes import (
     DeploymentCreate,
     DeploymentResponse,
     ServiceCreate,
     ServiceResponse,
+    DeploymentBatchScale,
+    PodResponse,
+    SimulatorConfig,
+    SimulatorSeed,
 )
+import json
 
 router = APIRouter()
 k8s_service = KubernetesService()
 
+def _json_default(value):
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+# 每次写出的行数，避免每个对象都切换一次线程
+NDJSON_CHUNK_LINES = 100
+
+def _ndjson(items: Iterator[Dict]) -> Iterator[str]:
+    """输出 NDJSON；开始输出后出现的错误作为最后一行 {"error": ...} 返回"""
+    lines = []
+    try:
+        for item in items:
+            lines.append(json.dumps(item, default=_json_default, ensure_ascii=False) + "\n")
+            if len(lines) >= NDJSON_CHUNK_LINES:
+                yield "".join(lines)
+                lines = []
+    except Exception as e:
+        lines.append(json.dumps({"error": str(e)}, ensure_ascii=False) + "\n")
+    if lines:
+        yield "".join(lines)
+
+def _stream_list(iter_func, namespace, all_namespaces, label_selector, page_size):
+    try:
+        parse_label_selector(label_selector)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    items = iter_func(
+        namespace=None if all_namespaces else namespace,
+        label_selector=label_selector,
+        page_size=page_size,
+    )
+    return StreamingResponse(_ndjson(items), media_type="application/x-ndjson")
+
 @router.get("/deployments", response_model=List[DeploymentResponse])
-def list_deployments(namespace: str = "default", db: Session = Depends(get_db)):
-    """列出所有部署"""
+def list_deployments(
+    namespace: str = "default",
+    label_selector: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """列出所有部署，label_selector 形如 app=web,tier=frontend"""
     try:
-        return k8s_service.list_deployments(namespace=namespace)
+        return k8s_service.list_deployments(namespace=namespace, label_selector=label_selector)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/cache")
+def get_cache_stats():
+    """informer 缓存的同步状态和对象数量"""
+    return k8s_service.informer_stats()
+
+def _simulator():
+    simulator = k8s_service.simulator
+    if simulator is None:
+        raise HTTPException(status_code=400, detail="未运行在模拟模式")
+    return simulator
+
+@router.get("/simulator")
+def get_simulator_stats():
+    """模拟集群的对象数量、resourceVersion、调用次数和故障注入配置"""
+    return _simulator().stats()
+
+@router.put("/simulator")
+def configure_simulator(simulator_config: SimulatorConfig):
+    """调整模拟集群的延迟、错误率和滚动更新耗时"""
+    simulator = _simulator()
+    simulator.configure(**simulator_config.dict())
+    return simulator.stats()
+
+@router.post("/simulator/seed")
+def seed_simulator(seed: SimulatorSeed):
+    """向模拟集群批量生成部署和服务"""
+    simulator = _simulator()
+    simulator.seed(deployments=seed.deployments, services=seed.services, namespaces=seed.namespaces)
+    return simulator.stats()
+
+@router.get("/deployments/stream")
+def stream_deployments(
+    namespace: str = "default",
+    all_namespaces: bool = False,
+    label_selector: Optional[str] = None,
+    page_size: Optional[int] = Query(None, ge=1, le=5000),
+):
+    """以 NDJSON 流式列出部署，all_namespaces=true 时分页遍历所有命名空间"""
+    return _stream_list(k8s_service.iter_deployments, namespace, all_namespaces, label_selector, page_size)
+
 @router.post("/deployments", response_model=DeploymentResponse)
 def create_deployment(
     deployment: DeploymentCreate,
@@ -47,6 +134,29 @@ def delete_deployment(
         return {"message": "部署已删除"}
     raise HTTPException(status_code=404, detail="部署未找到")
 
+@router.post("/deployments/scale")
+def scale_deployments(request: DeploymentBatchScale):
+    """批量扩缩容部署，wait=true 时等待每个部署滚动完成"""
+    try:
+        results = k8s_service.scale_deployments(
+            replicas=request.replicas,
+            namespace=request.namespace,
+            names=request.names,
+            label_selector=request.label_selector,
+            parallelism=request.parallelism,
+            wait=request.wait,
+            timeout=request.timeout,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {
+        "results": results,
+        "succeeded": sum(1 for result in results if result["success"]),
+        "failed": sum(1 for result in results if not result["success"]),
+    }
+
 @router.put("/deployments/{name}/scale")
 def scale_deployment(
     name: str,
@@ -59,14 +169,108 @@ def scale_deployment(
         return {"message": f"部署已扩缩容至 {replicas} 个副本"}
     raise HTTPException(status_code=404, detail="部署未找到")
 
+async def _first_rollout_status(name: str, namespace: str, timeout: Optional[float], heartbeat: Optional[float] = None):
+    """开始跟踪并取第一个状态，部署不存在时在响应开始前返回 404"""
+    timeout = min(timeout or settings.KUBERNETES_ROLLOUT_TIMEOUT, settings.KUBERNETES_ROLLOUT_TIMEOUT)
+    statuses = k8s_service.iter_rollout_async(name, namespace, timeout, heartbeat)
+    try:
+        return statuses, await statuses.__anext__()
+    except ApiException as e:
+        await statuses.aclose()
+        if e.status == 404:
+            raise HTTPException(status_code=404, detail="部署未找到")
+        raise HTTPException(status_code=500, detail=f"{e.status}: {e.reason}")
+
+@router.get("/deployments/{name}/rollout")
+async def get_rollout_status(
+    name: str,
+    namespace: str = "default",
+    wait: bool = False,
+    timeout: Optional[float] = Query(None, gt=0),
+):
+    """部署的滚动状态；wait=true 时长轮询，直到 complete、failed 或 timeout 才返回"""
+    statuses, status = await _first_rollout_status(name, namespace, timeout)
+    try:
+        if wait:
+            async for latest in statuses:
+                status = latest or status
+        return status
+    finally:
+        await statuses.aclose()
+
+@router.get("/deployments/{name}/rollout/events")
+async def stream_rollout_status(
+    name: str,
+    namespace: str = "default",
+    timeout: Optional[float] = Query(None, gt=0),
+):
+    """以 SSE 推送滚动进度，每次副本数变化一个 progress 事件，以终态事件结束"""
+    statuses, first = await _first_rollout_status(
+        name, namespace, timeout, heartbeat=settings.KUBERNETES_ROLLOUT_HEARTBEAT
+    )
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            status = first
+            while True:
+                if status is None:
+                    yield ": keep-alive\n\n"
+                else:
+                    event = "progress" if status["state"] == "progressing" else status["state"]
+                    data = json.dumps(status, default=_json_default, ensure_ascii=False)
+                    yield f"event: {event}\ndata: {data}\n\n"
+                status = await statuses.__anext__()
+        except StopAsyncIteration:
+            pass
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)}, ensure_ascii=False)}\n\n"
+        finally:
+            await statuses.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/pods", response_model=List[PodResponse])
+def list_pods(namespace: str = "default", label_selector: Optional[str] = None):
+    """列出 Pod，label_selector 形如 app=web,tier=frontend"""
+    try:
+        return k8s_service.list_pods(namespace=namespace, label_selector=label_selector)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/topology")
+def get_topology(namespace: str = "default"):
+    """命名空间内服务 → 部署 → Pod 的关联关系"""
+    try:
+        return k8s_service.topology(namespace=namespace)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/services", response_model=List[ServiceResponse])
-def list_services(namespace: str = "default", db: Session = Depends(get_db)):
-    """列出所有服务"""
+def list_services(
+    namespace: str = "default",
+    label_selector: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """列出所有服务，label_selector 形如 app=web,tier=frontend"""
     try:
-        return k8s_service.list_services(namespace=namespace)
+        return k8s_service.list_services(namespace=namespace, label_selector=label_selector)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.get("/services/stream")
+def stream_services(
+    namespace: str = "default",
+    all_namespaces: bool = False,
+    label_selector: Optional[str] = None,
+    page_size: Optional[int] = Query(None, ge=1, le=5000),
+):
+    """以 NDJSON 流式列出服务，all_namespaces=true 时分页遍历所有命名空间"""
+    return _stream_list(k8s_service.iter_services, namespace, all_namespaces, label_selector, page_size)
+
 @router.post("/services", response_model=ServiceResponse)
 def create_service(
     service: ServiceCreate,
@@ -91,4 +295,37 @@ def delete_service(
     """删除服务"""
     if k8s_service.delete_service(name=name, namespace=namespace):
         return {"message": "服务已删除"}
-    raise HTTPException(status_code=404, detail="服务未找到") 
\ No newline at end of file
+    raise HTTPException(status_code=404, detail="服务未找到")
+
+@router.post("/apply")
+async def apply_manifests(
+    request: Request,
+    namespace: str = "default",
+    dry_run: bool = False,
+    diff: bool = False,
+    force_conflicts: bool = True,
+    parallelism: Optional[int] = Query(None, ge=1),
+):
+    """应用多文档 YAML/JSON 清单
+
+    按命名空间、配置、工作负载、服务的顺序分层，每层内并行 server-side apply；
+    dry_run=true 时只在服务端校验，diff=true 时返回与现有对象的差异。
+    """
+    try:
+        objects = parse_manifests((await request.body()).decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not objects:
+        raise HTTPException(status_code=400, detail="清单为空")
+    try:
+        return await run_in_threadpool(
+            k8s_service.apply_manifests,
+            objects,
+            namespace=namespace,
+            dry_run=dry_run,
+            diff=diff,
+            force_conflicts=force_conflicts,
+            parallelism=parallelism,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
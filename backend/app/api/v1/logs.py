@@ -0,0 +1,29 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import List, Optional
+import re
+from ...services.log_index import LogIndex, LogIngester
+from ...core.config import settings
+from .containers import docker_service
+
+router = APIRouter()
+log_index = LogIndex() if settings.LOG_INDEX_ENABLED else None
+log_ingester = LogIngester(docker_service, log_index) if log_index is not None else None
+
+@router.get("/search")
+def search_logs(
+    q: Optional[str] = None,
+    regex: Optional[str] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    container: Optional[List[str]] = Query(None),
+    limit: int = Query(1000, ge=1, le=10000),
+):
+    """在已索引的容器日志中按词项或正则搜索，start/end 为 unix 时间戳"""
+    if log_index is None:
+        raise HTTPException(status_code=400, detail="日志索引未启用，请设置 LOG_INDEX_ENABLED=true")
+    if not q and not regex:
+        raise HTTPException(status_code=400, detail="q 和 regex 至少需要提供一个")
+    try:
+        return log_index.search(query=q, regex=regex, start=start, end=end, containers=container, limit=limit)
+    except re.error as e:
+        raise HTTPException(status_code=400, detail=f"无效的正则表达式: {str(e)}")
@@ -1,39 +1,73 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import List, Dict, Optional
+from datetime import datetime
 from sqlalchemy.orm import Session
 from ...core.database import get_db
-from ...services.monitoring_service import MonitoringService
+from ...services.monitoring_service import monitoring_service
+from ...schemas.container import ContainerMetricsBatch
+from .containers import docker_service
 
 router = APIRouter()
-monitoring_service = MonitoringService()
 
 @router.get("/containers/{container_id}/metrics")
-def get_container_metrics(
+async def get_container_metrics(
     container_id: str,
     duration: str = "5m",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    max_points: Optional[int] = Query(None, ge=3),
     db: Session = Depends(get_db)
 ):
-    """获取容器的监控指标"""
+    """获取容器的监控指标
+
+    start/end 为 RFC3339 时间或 Unix 时间戳，缺省时取最近 duration；
+    每个序列最多返回 max_points 个点。
+    """
     try:
-        return monitoring_service.get_container_metrics(
+        return await monitoring_service.get_container_metrics(
             container_id=container_id,
-            duration=duration
+            duration=duration,
+            start=start,
+            end=end,
+            max_points=max_points,
         )
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+@router.post("/containers/metrics")
+async def get_containers_metrics(request: ContainerMetricsBatch):
+    """批量获取多个容器的监控指标，每个指标只向 Prometheus 发一个查询"""
+    container_ids = list(request.ids or [])
+    try:
+        if request.label_selector:
+            container_ids += await docker_service.find_container_ids_async(request.label_selector)
+        return await monitoring_service.get_containers_metrics(
+            container_ids,
+            duration=request.duration,
+            start=request.start,
+            end=request.end,
+            max_points=request.max_points,
+        )
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/cache")
+async def get_cache_stats():
+    """Prometheus 查询缓存的条目数、样本数和命中率"""
+    return monitoring_service.cache_stats()
+
 @router.get("/cluster/metrics")
-def get_cluster_metrics(db: Session = Depends(get_db)):
+async def get_cluster_metrics(db: Session = Depends(get_db)):
     """获取集群级别的监控指标"""
     try:
-        return monitoring_service.get_cluster_metrics()
+        return await monitoring_service.get_cluster_metrics()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/alerts")
-def get_alerts(db: Session = Depends(get_db)):
+async def get_alerts(db: Session = Depends(get_db)):
     """获取当前活动的告警"""
     try:
-        return monitoring_service.get_alerts()
+        return await monitoring_service.get_alerts()
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e)) 
\ No newline at end of file
@@ -57,15 +57,81 @@ class Settings(BaseSettings):
     # Kubernetes配置
     KUBERNETES_CONFIG_PATH: Optional[str] = os.getenv("KUBERNETES_CONFIG_PATH", None)
     KUBERNETES_NAMESPACE: str = os.getenv("KUBERNETES_NAMESPACE", "default")
+    # 本地 informer 缓存: list + watch，列表接口直接读内存
+    KUBERNETES_INFORMER_ENABLED: bool = os.getenv("KUBERNETES_INFORMER_ENABLED", "True").lower() == "true"
+    KUBERNETES_INFORMER_SYNC_TIMEOUT: float = float(os.getenv("KUBERNETES_INFORMER_SYNC_TIMEOUT", "5"))
+    KUBERNETES_WATCH_TIMEOUT: int = int(os.getenv("KUBERNETES_WATCH_TIMEOUT", "300"))
+    KUBERNETES_RETRY_INTERVAL: float = float(os.getenv("KUBERNETES_RETRY_INTERVAL", "2"))
+    KUBERNETES_LIST_PAGE_SIZE: int = int(os.getenv("KUBERNETES_LIST_PAGE_SIZE", "500"))
+    # 滚动状态跟踪: 等待上限和 SSE 心跳间隔
+    KUBERNETES_ROLLOUT_TIMEOUT: float = float(os.getenv("KUBERNETES_ROLLOUT_TIMEOUT", "600"))
+    KUBERNETES_ROLLOUT_HEARTBEAT: float = float(os.getenv("KUBERNETES_ROLLOUT_HEARTBEAT", "15"))
+    # 内存模拟集群: 无法加载 kubeconfig 或强制启用时使用
+    KUBERNETES_SIMULATOR_ENABLED: bool = os.getenv("KUBERNETES_SIMULATOR_ENABLED", "False").lower() == "true"
+    KUBERNETES_SIMULATOR_SEED: int = int(os.getenv("KUBERNETES_SIMULATOR_SEED", "42"))
+    KUBERNETES_SIMULATOR_DEPLOYMENTS: int = int(os.getenv("KUBERNETES_SIMULATOR_DEPLOYMENTS", "0"))
+    KUBERNETES_SIMULATOR_SERVICES: int = int(os.getenv("KUBERNETES_SIMULATOR_SERVICES", "0"))
+    KUBERNETES_SIMULATOR_NAMESPACES: int = int(os.getenv("KUBERNETES_SIMULATOR_NAMESPACES", "1"))
+    KUBERNETES_SIMULATOR_LATENCY_MS: float = float(os.getenv("KUBERNETES_SIMULATOR_LATENCY_MS", "0"))
+    KUBERNETES_SIMULATOR_ERROR_RATE: float = float(os.getenv("KUBERNETES_SIMULATOR_ERROR_RATE", "0"))
+    KUBERNETES_SIMULATOR_ROLLOUT_SECONDS: float = float(os.getenv("KUBERNETES_SIMULATOR_ROLLOUT_SECONDS", "2"))
 
     # Docker配置
     DOCKER_HOST: str = os.getenv("DOCKER_HOST", "tcp://localhost:2375")
     DOCKER_TLS_VERIFY: bool = os.getenv("DOCKER_TLS_VERIFY", "0") == "1"
     DOCKER_CERT_PATH: Optional[str] = os.getenv("DOCKER_CERT_PATH", None)
     DOCKER_API_VERSION: str = os.getenv("DOCKER_API_VERSION", "auto")
+    DOCKER_POOL_SIZE: int = int(os.getenv("DOCKER_POOL_SIZE", "10"))
+    # 多主机模式: name=url 逗号分隔
+    DOCKER_HOSTS: str = os.getenv("DOCKER_HOSTS", "")
+    DOCKER_FLEET_TIMEOUT: float = float(os.getenv("DOCKER_FLEET_TIMEOUT", "5"))
+    DOCKER_FLEET_WORKERS_PER_HOST: int = int(os.getenv("DOCKER_FLEET_WORKERS_PER_HOST", "4"))
+    DOCKER_INVENTORY_ENABLED: bool = os.getenv("DOCKER_INVENTORY_ENABLED", "True").lower() == "true"
+    DOCKER_INVENTORY_RETRY_INTERVAL: float = float(os.getenv("DOCKER_INVENTORY_RETRY_INTERVAL", "2"))
+    IMAGE_CACHE_SIZE: int = int(os.getenv("IMAGE_CACHE_SIZE", "1024"))
+    BULK_MAX_PARALLELISM: int = int(os.getenv("BULK_MAX_PARALLELISM", "16"))
+    BULK_OPERATION_TIMEOUT: float = float(os.getenv("BULK_OPERATION_TIMEOUT", "30"))
+    BATCH_CREATE_MAX_COUNT: int = int(os.getenv("BATCH_CREATE_MAX_COUNT", "500"))
+    # 批量创建时自动分配宿主机端口的范围
+    BATCH_PORT_RANGE_START: int = int(os.getenv("BATCH_PORT_RANGE_START", "20000"))
+    BATCH_PORT_RANGE_END: int = int(os.getenv("BATCH_PORT_RANGE_END", "29999"))
+    STATS_COLLECTOR_ENABLED: bool = os.getenv("STATS_COLLECTOR_ENABLED", "True").lower() == "true"
+    STATS_BUFFER_SIZE: int = int(os.getenv("STATS_BUFFER_SIZE", "120"))
+    STATS_RECONCILE_INTERVAL: float = float(os.getenv("STATS_RECONCILE_INTERVAL", "30"))
+    # 镜像拉取配置
+    PULL_MAX_CONCURRENT: int = int(os.getenv("PULL_MAX_CONCURRENT", "3"))
+    PULL_TIMEOUT: float = float(os.getenv("PULL_TIMEOUT", "600"))
+    PREWARM_IMAGES: str = os.getenv("PREWARM_IMAGES", "")
+    # 日志索引配置
+    LOG_INDEX_ENABLED: bool = os.getenv("LOG_INDEX_ENABLED", "False").lower() == "true"
+    LOG_INDEX_DIR: str = os.getenv("LOG_INDEX_DIR", "/var/lib/container-platform/logs")
+    LOG_INDEX_BLOCK_SIZE: int = int(os.getenv("LOG_INDEX_BLOCK_SIZE", str(256 * 1024)))
+    LOG_INDEX_SEGMENT_MAX_BYTES: int = int(os.getenv("LOG_INDEX_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+    LOG_INGEST_INTERVAL: float = float(os.getenv("LOG_INGEST_INTERVAL", "10"))
+    LOG_INGEST_BACKFILL: int = int(os.getenv("LOG_INGEST_BACKFILL", "3600"))
+    LOG_RETENTION_HOURS: int = int(os.getenv("LOG_RETENTION_HOURS", "168"))
+    CGROUP_STATS_ENABLED: bool = os.getenv("CGROUP_STATS_ENABLED", "True").lower() == "true"
+    CGROUP_ROOT: str = os.getenv("CGROUP_ROOT", "/sys/fs/cgroup")
+    PROC_ROOT: str = os.getenv("PROC_ROOT", "/proc")
 
     # 监控配置
     PROMETHEUS_ENDPOINT: str = os.getenv("PROMETHEUS_ENDPOINT", "http://localhost:9090")
+    PROMETHEUS_TIMEOUT: float = float(os.getenv("PROMETHEUS_TIMEOUT", "10"))
+    PROMETHEUS_POOL_SIZE: int = int(os.getenv("PROMETHEUS_POOL_SIZE", "20"))
+    # 查询结果缓存: 在抓取周期边界过期，与 prometheus.yml 的 scrape_interval 保持一致
+    PROMETHEUS_SCRAPE_INTERVAL: float = float(os.getenv("PROMETHEUS_SCRAPE_INTERVAL", "15"))
+    PROMETHEUS_CACHE_ENABLED: bool = os.getenv("PROMETHEUS_CACHE_ENABLED", "True").lower() == "true"
+    PROMETHEUS_CACHE_MAX_ENTRIES: int = int(os.getenv("PROMETHEUS_CACHE_MAX_ENTRIES", "1024"))
+    PROMETHEUS_CACHE_MAX_POINTS: int = int(os.getenv("PROMETHEUS_CACHE_MAX_POINTS", "1000000"))
+    PROMETHEUS_CACHE_HISTORICAL_TTL: float = float(os.getenv("PROMETHEUS_CACHE_HISTORICAL_TTL", "300"))
+    # 增量范围查询: 按 (query, step) 保留的滑动窗口数量上限
+    PROMETHEUS_INCREMENTAL_RANGE: bool = os.getenv("PROMETHEUS_INCREMENTAL_RANGE", "True").lower() == "true"
+    PROMETHEUS_RANGE_WINDOWS: int = int(os.getenv("PROMETHEUS_RANGE_WINDOWS", "256"))
+    # 批量容器指标: 单个 container_id=~"..." 匹配器的最大长度，超出时拆分为多个查询
+    PROMETHEUS_MAX_MATCHER_LENGTH: int = int(os.getenv("PROMETHEUS_MAX_MATCHER_LENGTH", "4000"))
+    # 时间序列的默认点数预算；自动选择 step 时多取 LTTB_OVERSAMPLE 倍的原始点再降采样
+    PROMETHEUS_MAX_POINTS: int = int(os.getenv("PROMETHEUS_MAX_POINTS", "1000"))
+    PROMETHEUS_LTTB_OVERSAMPLE: int = int(os.getenv("PROMETHEUS_LTTB_OVERSAMPLE", "4"))
     GRAFANA_ENDPOINT: str = os.getenv("GRAFANA_ENDPOINT", "http://localhost:3000")
     METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "True").lower() == "true"
 
@@ -2,8 +2,11 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from fastapi.exceptions import RequestValidationError
-from app.api.v1 import containers, kubernetes, monitoring, metrics
+from app.api.v1 import containers, kubernetes, monitoring, metrics, fleet, logs
 from app.core.config import settings
+from app.services.image_puller import image_puller
+from app.services.monitoring_service import monitoring_service
+import asyncio
 import logging
 
 # 配置日志
@@ -46,16 +49,52 @@ async def general_exception_handler(request: Request, exc: Exception):
         content={"detail": "Internal server error"},
     )
 
-# 健康检查
+def _prewarm_images(images):
+    try:
+        image_puller.prewarm(containers.docker_service.connect(), images)
+    except Exception as e:
+        logger.warning(f"Skipping image pre-warm: {str(e)}")
+
+# 在后台连接各依赖并启动统计采集、日志索引和镜像预热，不阻塞服务开始接收请求
+@app.on_event("startup")
+async def start_background_collectors():
+    containers.docker_service.connect_in_background()
+    kubernetes.k8s_service.connect_in_background()
+    if settings.STATS_COLLECTOR_ENABLED:
+        await containers.stats_collector.start()
+    if logs.log_ingester is not None:
+        logs.log_ingester.start()
+    prewarm_images = [image.strip() for image in settings.PREWARM_IMAGES.split(",") if image.strip()]
+    if prewarm_images:
+        asyncio.get_running_loop().run_in_executor(None, _prewarm_images, prewarm_images)
+
+# 停止后台任务并关闭异步客户端的连接池
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await containers.stats_collector.stop()
+    if logs.log_ingester is not None:
+        logs.log_ingester.stop()
+    kubernetes.k8s_service.stop_informers()
+    await containers.docker_service.close()
+    await monitoring_service.close()
+
+# 健康检查: 报告各依赖的连接状态，本身不触发连接
 @app.get(f"{settings.API_V1_STR}/health")
 async def health_check():
-    return {"status": "healthy"}
+    dependencies = {
+        "docker": containers.docker_service.status(),
+        "kubernetes": kubernetes.k8s_service.status(),
+    }
+    healthy = dependencies["docker"]["state"] == "connected"
+    return {"status": "healthy" if healthy else "degraded", "dependencies": dependencies}
 
 # 包含API路由
 app.include_router(containers.router, prefix=f"{settings.API_V1_STR}/containers", tags=["containers"])
 app.include_router(kubernetes.router, prefix=f"{settings.API_V1_STR}/kubernetes", tags=["kubernetes"])
 app.include_router(monitoring.router, prefix=f"{settings.API_V1_STR}/monitoring", tags=["monitoring"])
 app.include_router(metrics.router, prefix=f"{settings.API_V1_STR}/metrics", tags=["metrics"])
+app.include_router(fleet.router, prefix=f"{settings.API_V1_STR}/fleet", tags=["fleet"])
+app.include_router(logs.router, prefix=f"{settings.API_V1_STR}/logs", tags=["logs"])
 
 @app.get("/")
 async def root():
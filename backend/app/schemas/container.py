@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, root_validator
 from typing import Dict, Optional, Any, List
 from datetime import datetime
+from enum import Enum
+from ..core.config import settings
 
 class ContainerBase(BaseModel):
     name: str
@@ -19,4 +21,76 @@ class ContainerResponse(ContainerBase):
     networkSettings: Optional[Dict[str, Any]] = None
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True 
+
+class BulkAction(str, Enum):
+    start = "start"
+    stop = "stop"
+    restart = "restart"
+    remove = "remove"
+
+class ContainerBulkRequest(BaseModel):
+    action: BulkAction
+    ids: Optional[List[str]] = None
+    label_selector: Optional[Dict[str, str]] = None
+    parallelism: Optional[int] = None
+    timeout: Optional[float] = None
+    force: bool = False
+
+    @root_validator
+    def check_targets(cls, values):
+        if not values.get("ids") and not values.get("label_selector"):
+            raise ValueError("ids 和 label_selector 至少需要提供一个")
+        return values
+
+
+class ContainerInstanceOverride(BaseModel):
+    name: Optional[str] = None
+    environment: Optional[Dict[str, str]] = None
+    ports: Optional[Dict[str, Any]] = None
+    labels: Optional[Dict[str, str]] = None
+
+class ContainerBatchCreate(BaseModel):
+    """批量创建模板
+
+    ``name_pattern`` 中的 ``{index}`` 替换为从 1 开始的序号；``ports`` 中值为
+    ``null`` 或 ``"auto"`` 的端口会为每个实例自动分配不冲突的宿主机端口。
+    ``instances`` 按序号覆盖单个实例的名称、环境变量、端口和标签。
+    """
+    image: str
+    count: Optional[int] = Field(None, ge=1)
+    name_pattern: Optional[str] = None
+    environment: Optional[Dict[str, str]] = None
+    ports: Optional[Dict[str, Any]] = None
+    labels: Optional[Dict[str, str]] = None
+    instances: Optional[List[ContainerInstanceOverride]] = None
+    start: bool = True
+    parallelism: Optional[int] = None
+    timeout: Optional[float] = None
+    rollback: bool = True
+
+    @root_validator
+    def check_count(cls, values):
+        count, instances = values.get("count"), values.get("instances")
+        if not count and not instances:
+            raise ValueError("count 和 instances 至少需要提供一个")
+        if count and instances and len(instances) > count:
+            raise ValueError("instances 的数量不能超过 count")
+        if (count or len(instances)) > settings.BATCH_CREATE_MAX_COUNT:
+            raise ValueError(f"单次最多创建 {settings.BATCH_CREATE_MAX_COUNT} 个容器")
+        return values
+
+class ContainerMetricsBatch(BaseModel):
+    """批量查询多个容器的监控指标"""
+    ids: Optional[List[str]] = None
+    label_selector: Optional[Dict[str, str]] = None
+    duration: str = "5m"
+    start: Optional[datetime] = None
+    end: Optional[datetime] = None
+    max_points: Optional[int] = Field(None, ge=3)
+
+    @root_validator
+    def check_targets(cls, values):
+        if not values.get("ids") and not values.get("label_selector"):
+            raise ValueError("ids 和 label_selector 至少需要提供一个")
+        return values
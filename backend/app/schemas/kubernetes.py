@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, root_validator
 from typing import Dict, List, Optional
 from datetime import datetime
 
@@ -38,4 +38,41 @@ class ServiceResponse(ServiceBase):
     external_ip: Optional[str] = None
 
     class Config:
-        orm_mode = True 
\ No newline at end of file
+        orm_mode = True
+
+class PodResponse(BaseModel):
+    name: str
+    namespace: str
+    phase: Optional[str] = None
+    ready: bool = False
+    restarts: int = 0
+    node: Optional[str] = None
+    pod_ip: Optional[str] = None
+    labels: Optional[Dict] = None
+    owner: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+class DeploymentBatchScale(BaseModel):
+    replicas: int = Field(..., ge=0)
+    namespace: str = "default"
+    names: Optional[List[str]] = None
+    label_selector: Optional[str] = None
+    parallelism: Optional[int] = None
+    wait: bool = False
+    timeout: Optional[float] = None
+
+    @root_validator
+    def check_targets(cls, values):
+        if not values.get("names") and not values.get("label_selector"):
+            raise ValueError("names 和 label_selector 至少需要提供一个")
+        return values
+
+class SimulatorConfig(BaseModel):
+    latency_ms: Optional[float] = Field(None, ge=0)
+    error_rate: Optional[float] = Field(None, ge=0, le=1)
+    rollout_seconds: Optional[float] = Field(None, ge=0)
+
+class SimulatorSeed(BaseModel):
+    deployments: int = Field(0, ge=0, le=200000)
+    services: int = Field(0, ge=0, le=200000)
+    namespaces: int = Field(1, ge=1, le=1000)
@@ -0,0 +1,317 @@
+import os
+import ssl
+import asyncio
+import json
+import struct
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+import aiohttp
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 多路复用日志流的帧头: 1 字节流类型 + 3 字节填充 + 4 字节大端长度
+LOG_FRAME_HEADER = struct.Struct(">BxxxI")
+STDIN, STDOUT, STDERR = 0, 1, 2
+
+
+class DockerAPIError(Exception):
+    """Docker Engine API 返回的错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _port_bindings(ports: Optional[Dict[str, Any]]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """把端口映射转换为 (ExposedPorts, HostConfig.PortBindings)
+
+    支持 docker SDK 的写法 (``{"80/tcp": 8080}``、``("0.0.0.0", 8080)``)
+    和 inspect 的写法 (``{"80/tcp": [{"HostIp": "", "HostPort": "8080"}]}``)。
+    """
+    exposed: Dict[str, Any] = {}
+    bindings: Dict[str, Any] = {}
+    for container_port, host in (ports or {}).items():
+        key = container_port if "/" in str(container_port) else f"{container_port}/tcp"
+        exposed[key] = {}
+        values = host if isinstance(host, list) else [host]
+        port_bindings = []
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, dict):
+                port_bindings.append({
+                    "HostIp": value.get("HostIp", ""),
+                    "HostPort": str(value.get("HostPort", "")),
+                })
+            elif isinstance(value, tuple):
+                host_ip, host_port = value if len(value) == 2 else (value[0], "")
+                port_bindings.append({"HostIp": host_ip, "HostPort": str(host_port or "")})
+            else:
+                port_bindings.append({"HostIp": "", "HostPort": str(value)})
+        bindings[key] = port_bindings
+    return exposed, bindings
+
+
+def build_container_config(
+    image: str,
+    environment: Optional[Dict[str, str]] = None,
+    ports: Optional[Dict[str, Any]] = None,
+    labels: Optional[Dict[str, str]] = None,
+    command: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """构建 ``POST /containers/create`` 的请求体"""
+    exposed, bindings = _port_bindings(ports)
+    config: Dict[str, Any] = {"Image": image, "HostConfig": {}}
+    if environment:
+        config["Env"] = [f"{key}={value}" for key, value in environment.items()]
+    if exposed:
+        config["ExposedPorts"] = exposed
+        config["HostConfig"]["PortBindings"] = bindings
+    if labels:
+        config["Labels"] = labels
+    if command:
+        config["Cmd"] = command
+    return config
+
+
+def default_docker_host() -> str:
+    """与 docker.from_env 相同: 环境变量 DOCKER_HOST，未设置时为本机 unix 套接字"""
+    return os.environ.get("DOCKER_HOST") or "unix:///var/run/docker.sock"
+
+
+class AsyncDockerClient:
+    """基于 aiohttp 的 Docker Engine API 异步客户端
+
+    支持 ``unix://`` 套接字和 ``tcp://``/``http(s)://`` 地址。会话在首次请求时
+    于当前事件循环中创建，连接由 aiohttp 连接池复用。
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        api_version: Optional[str] = None,
+        tls_verify: Optional[bool] = None,
+        cert_path: Optional[str] = None,
+        timeout: float = 60.0,
+        pool_size: int = 100,
+    ):
+        self.base_url = base_url or default_docker_host()
+        api_version = api_version if api_version is not None else settings.DOCKER_API_VERSION
+        self.api_version = None if api_version in (None, "", "auto") else api_version
+        self.tls_verify = settings.DOCKER_TLS_VERIFY if tls_verify is None else tls_verify
+        self.cert_path = cert_path if cert_path is not None else settings.DOCKER_CERT_PATH
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        parsed = urlparse(self.base_url)
+        if parsed.scheme in ("unix", "http+unix"):
+            self._socket_path = parsed.path
+            self._url = "http://docker"
+        else:
+            self._socket_path = None
+            scheme = "https" if parsed.scheme == "https" or self.tls_verify else "http"
+            self._url = f"{scheme}://{parsed.netloc}"
+
+    def _ssl_context(self) -> Optional[ssl.SSLContext]:
+        if not self.tls_verify:
+            return None
+        context = ssl.create_default_context()
+        if self.cert_path:
+            context.load_verify_locations(os.path.join(self.cert_path, "ca.pem"))
+            context.load_cert_chain(
+                os.path.join(self.cert_path, "cert.pem"),
+                os.path.join(self.cert_path, "key.pem"),
+            )
+        return context
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            if self._socket_path:
+                connector = aiohttp.UnixConnector(path=self._socket_path, limit=self.pool_size)
+            else:
+                connector = aiohttp.TCPConnector(limit=self.pool_size, ssl=self._ssl_context())
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _endpoint(self, path: str) -> str:
+        if self.api_version:
+            return f"{self._url}/v{self.api_version}{path}"
+        return f"{self._url}{path}"
+
+    @staticmethod
+    def _params(params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        result = {}
+        for key, value in (params or {}).items():
+            if value is None:
+                continue
+            if isinstance(value, bool):
+                value = "1" if value else "0"
+            elif isinstance(value, dict):
+                value = json.dumps(value)
+            result[key] = str(value)
+        return result
+
+    async def _raise_for_status(self, response: aiohttp.ClientResponse):
+        if response.status < 400:
+            return
+        text = await response.text()
+        try:
+            message = json.loads(text).get("message", text)
+        except ValueError:
+            message = text
+        raise DockerAPIError(response.status, message)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        body: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+    ) -> Any:
+        session = self._get_session()
+        async with session.request(
+            method,
+            self._endpoint(path),
+            params=self._params(params),
+            json=body,
+            timeout=aiohttp.ClientTimeout(total=timeout or self.timeout),
+        ) as response:
+            await self._raise_for_status(response)
+            if response.status in (204, 304):
+                return None
+            if response.content_type == "application/json":
+                return await response.json()
+            return await response.read()
+
+    async def _open_stream(
+        self, path: str, params: Optional[Dict[str, Any]] = None
+    ) -> aiohttp.ClientResponse:
+        """打开一个长连接流式请求，调用方负责关闭响应"""
+        session = self._get_session()
+        response = await session.get(
+            self._endpoint(path),
+            params=self._params(params),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=self.timeout),
+        )
+        try:
+            await self._raise_for_status(response)
+        except Exception:
+            response.release()
+            raise
+        return response
+
+    async def ping(self) -> bool:
+        return (await self._request("GET", "/_ping")) in (b"OK", "OK")
+
+    async def list_containers(
+        self, all: bool = True, filters: Optional[Dict[str, List[str]]] = None
+    ) -> List[Dict[str, Any]]:
+        return await self._request("GET", "/containers/json", params={"all": all, "filters": filters})
+
+    async def inspect_container(self, container_id: str) -> Dict[str, Any]:
+        return await self._request("GET", f"/containers/{container_id}/json")
+
+    async def inspect_image(self, name: str) -> Dict[str, Any]:
+        return await self._request("GET", f"/images/{name}/json")
+
+    async def create_container(self, config: Dict[str, Any], name: Optional[str] = None) -> Dict[str, Any]:
+        return await self._request("POST", "/containers/create", params={"name": name}, body=config)
+
+    async def start_container(self, container_id: str):
+        await self._request("POST", f"/containers/{container_id}/start")
+
+    async def stop_container(self, container_id: str, timeout: Optional[int] = None):
+        # 请求超时要留出容器优雅退出的时间
+        request_timeout = self.timeout + (timeout if timeout is not None else 10)
+        await self._request(
+            "POST", f"/containers/{container_id}/stop", params={"t": timeout}, timeout=request_timeout
+        )
+
+    async def restart_container(self, container_id: str, timeout: Optional[int] = None):
+        request_timeout = self.timeout + (timeout if timeout is not None else 10)
+        await self._request(
+            "POST", f"/containers/{container_id}/restart", params={"t": timeout}, timeout=request_timeout
+        )
+
+    async def remove_container(self, container_id: str, force: bool = False, volumes: bool = False):
+        await self._request("DELETE", f"/containers/{container_id}", params={"force": force, "v": volumes})
+
+    async def stats(self, container_id: str) -> Dict[str, Any]:
+        return await self._request("GET", f"/containers/{container_id}/stats", params={"stream": False})
+
+    async def stream_stats(self, container_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """持续读取容器统计信息，每个样本一行 JSON"""
+        response = await self._open_stream(f"/containers/{container_id}/stats", params={"stream": True})
+        try:
+            async for line in response.content:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        finally:
+            response.release()
+
+    async def stream_logs(
+        self,
+        container_id: str,
+        follow: bool = False,
+        stdout: bool = True,
+        stderr: bool = True,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        timestamps: bool = False,
+        tail: Any = "all",
+        tty: Optional[bool] = None,
+    ) -> AsyncIterator[Tuple[int, bytes]]:
+        """逐帧读取容器日志，返回 (流类型, 数据) 元组
+
+        非 TTY 容器的日志是多路复用格式，按帧头拆分 stdout/stderr；
+        TTY 容器的日志是原始字节流，统一标记为 stdout。
+        """
+        if tty is None:
+            info = await self.inspect_container(container_id)
+            tty = bool((info.get("Config") or {}).get("Tty"))
+        response = await self._open_stream(
+            f"/containers/{container_id}/logs",
+            params={
+                "follow": follow,
+                "stdout": stdout,
+                "stderr": stderr,
+                "since": since,
+                "until": until,
+                "timestamps": timestamps,
+                "tail": tail,
+            },
+        )
+        try:
+            if tty:
+                async for chunk in response.content.iter_any():
+                    yield STDOUT, chunk
+                return
+            while True:
+                try:
+                    header = await response.content.readexactly(LOG_FRAME_HEADER.size)
+                except asyncio.IncompleteReadError:
+                    # 流结束
+                    return
+                stream_type, size = LOG_FRAME_HEADER.unpack(header)
+                if size:
+                    yield stream_type, await response.content.readexactly(size)
+        finally:
+            response.release()
+
+    async def logs(self, container_id: str, tail: Any = 100, **kwargs) -> bytes:
+        """读取容器日志并拼接为一个字节串"""
+        chunks = []
+        async for _, chunk in self.stream_logs(container_id, tail=tail, **kwargs):
+            chunks.append(chunk)
+        return b"".join(chunks)
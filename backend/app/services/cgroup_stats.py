@@ -0,0 +1,237 @@
+import os
+import threading
+import time
+import logging
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 65536
+
+# 没有容器清单事件时，按此间隔检查已打开的句柄对应的 cgroup 是否还存在
+SWEEP_INTERVAL = 60.0
+
+
+class _CgroupHandle:
+    """一个容器的 cgroup 文件句柄，打开一次后重复使用 pread 读取"""
+
+    FILES = ("cpu.stat", "memory.current", "io.stat")
+
+    def __init__(self, cgroup_path: str, net_dev_path: Optional[str]):
+        self.cgroup_path = cgroup_path
+        self.fds: Dict[str, int] = {}
+        try:
+            for name in self.FILES:
+                self.fds[name] = os.open(os.path.join(cgroup_path, name), os.O_RDONLY)
+            if net_dev_path is not None:
+                self.fds["net/dev"] = os.open(net_dev_path, os.O_RDONLY)
+        except OSError:
+            self.close()
+            raise
+
+    def read(self, name: str) -> str:
+        return os.pread(self.fds[name], READ_SIZE, 0).decode()
+
+    def close(self):
+        for fd in self.fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self.fds = {}
+
+
+def _parse_cpu_usage_ns(text: str) -> int:
+    for line in text.splitlines():
+        key, _, value = line.partition(" ")
+        if key == "usage_usec":
+            return int(value) * 1000
+    return 0
+
+
+def _parse_io(text: str):
+    read = write = 0
+    for line in text.splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition("=")
+            if key == "rbytes":
+                read += int(value)
+            elif key == "wbytes":
+                write += int(value)
+    return read, write
+
+
+def _parse_net_dev(text: str) -> Dict[str, Dict[str, int]]:
+    networks = {}
+    # 前两行是表头
+    for line in text.splitlines()[2:]:
+        interface, _, counters = line.partition(":")
+        values = counters.split()
+        if len(values) >= 9:
+            networks[interface.strip()] = {"rx_bytes": int(values[0]), "tx_bytes": int(values[8])}
+    return networks
+
+
+class CgroupStatsProvider:
+    """直接读取 cgroup v2 文件的容器统计，作为本机容器的快速路径
+
+    能解析出 cgroup 路径的容器从 ``cpu.stat``、``memory.current``、``io.stat``
+    和 ``/proc/<pid>/net/dev`` 读取；其他情况回退到
+    ``DockerService.get_container_stats``。
+
+    容器 die/destroy 事件到达时释放其句柄；此外打开新句柄时会定期清理
+    cgroup 已被删除的句柄，因此容器频繁创建删除时文件描述符不会累积。
+    """
+
+    def __init__(self, docker_service, cgroup_root: Optional[str] = None, proc_root: Optional[str] = None):
+        self.docker_service = docker_service
+        self.cgroup_root = cgroup_root or settings.CGROUP_ROOT
+        self.proc_root = proc_root or settings.PROC_ROOT
+        self._handles: Dict[str, _CgroupHandle] = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        inventory = getattr(docker_service, "inventory", None)
+        if inventory is not None:
+            inventory.add_listener(self.handle_event)
+
+    @property
+    def open_handles(self) -> int:
+        with self._lock:
+            return len(set(self._handles.values()))
+
+    @property
+    def available(self) -> bool:
+        """只支持 cgroup v2 统一层级"""
+        return settings.CGROUP_STATS_ENABLED and os.path.exists(
+            os.path.join(self.cgroup_root, "cgroup.controllers")
+        )
+
+    def _cgroup_path(self, container_id: str, pid: Optional[int]) -> Optional[str]:
+        candidates = []
+        if pid:
+            # /proc/<pid>/cgroup 中 v2 的行形如 "0::/system.slice/docker-<id>.scope"
+            try:
+                with open(os.path.join(self.proc_root, str(pid), "cgroup")) as f:
+                    for line in f:
+                        if line.startswith("0::"):
+                            candidates.append(os.path.join(self.cgroup_root, line[3:].strip().lstrip("/")))
+            except OSError:
+                pass
+        # systemd 和 cgroupfs 两种 cgroup 驱动的默认路径
+        candidates += [
+            os.path.join(self.cgroup_root, "system.slice", f"docker-{container_id}.scope"),
+            os.path.join(self.cgroup_root, "docker", container_id),
+        ]
+        for path in candidates:
+            if os.path.exists(os.path.join(path, "cpu.stat")):
+                return path
+        return None
+
+    def _resolve(self, container_id: str) -> Optional[_CgroupHandle]:
+        with self._lock:
+            handle = self._handles.get(container_id)
+        if handle is not None:
+            return handle
+        # 查询容器信息可能访问守护进程，不在锁内进行
+        container = self.docker_service.get_container(container_id)
+        if not container:
+            return None
+        full_id = container["id"]
+        pid = (container.get("state") or {}).get("Pid")
+        self._maybe_sweep()
+        with self._lock:
+            # 并发的读取者只有一个会打开文件，其余复用它的句柄
+            handle = self._handles.get(full_id)
+            if handle is None:
+                cgroup_path = self._cgroup_path(full_id, pid)
+                if cgroup_path is None:
+                    return None
+                net_dev = os.path.join(self.proc_root, str(pid), "net", "dev") if pid else None
+                if net_dev is not None and not os.path.exists(net_dev):
+                    net_dev = None
+                handle = _CgroupHandle(cgroup_path, net_dev)
+                self._handles[full_id] = handle
+            self._handles[container_id] = handle
+        return handle
+
+    def _release(self, handle: _CgroupHandle):
+        with self._lock:
+            for key in [key for key, value in self._handles.items() if value is handle]:
+                del self._handles[key]
+        handle.close()
+
+    def release(self, container_id: str):
+        """释放容器的句柄，容器 ID 可以是前缀"""
+        with self._lock:
+            handles = {
+                handle for key, handle in self._handles.items()
+                if key.startswith(container_id) or container_id.startswith(key)
+            }
+        for handle in handles:
+            self._release(handle)
+
+    def sweep(self):
+        """释放 cgroup 目录已不存在的句柄"""
+        with self._lock:
+            handles = set(self._handles.values())
+            self._last_sweep = time.monotonic()
+        for handle in handles:
+            if not os.path.exists(handle.cgroup_path):
+                self._release(handle)
+
+    def _maybe_sweep(self):
+        if time.monotonic() - self._last_sweep >= SWEEP_INTERVAL:
+            self.sweep()
+
+    def handle_event(self, event: Dict[str, Any]):
+        """容器清单的事件监听器: 容器停止或删除时释放句柄"""
+        if event.get("Type") != "container":
+            return
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if container_id and action in ("die", "destroy"):
+            self.release(container_id)
+
+    def read(self, container_id: str) -> Optional[Dict[str, Any]]:
+        """从 cgroup 文件读取统计，无法解析时返回 None"""
+        if not self.available:
+            return None
+        try:
+            handle = self._resolve(container_id)
+        except Exception as e:
+            logger.debug(f"Cannot resolve cgroup for container {container_id}: {str(e)}")
+            return None
+        if handle is None:
+            return None
+        try:
+            networks = _parse_net_dev(handle.read("net/dev")) if "net/dev" in handle.fds else {}
+            blkio_read, blkio_write = _parse_io(handle.read("io.stat"))
+            eth0 = networks.get("eth0") or {"rx_bytes": 0, "tx_bytes": 0}
+            return {
+                "cpu_usage": _parse_cpu_usage_ns(handle.read("cpu.stat")),
+                "memory_usage": int(handle.read("memory.current").strip() or 0),
+                "network_rx": eth0["rx_bytes"],
+                "network_tx": eth0["tx_bytes"],
+                "blkio_read": blkio_read,
+                "blkio_write": blkio_write,
+                "networks": networks,
+                "source": "cgroup",
+            }
+        except OSError:
+            # 容器已停止，cgroup 目录被删除
+            self._release(handle)
+            return None
+
+    def get_container_stats(self, container_id: str) -> Dict[str, Any]:
+        stats = self.read(container_id)
+        if stats is None:
+            stats = self.docker_service.get_container_stats(container_id)
+        return stats
+
+    def close(self):
+        with self._lock:
+            handles = set(self._handles.values())
+            self._handles = {}
+        for handle in handles:
+            handle.close()
@@ -0,0 +1,177 @@
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 会改变容器清单内容的事件
+CONTAINER_EVENTS = {
+    "create", "start", "restart", "stop", "die", "kill", "destroy",
+    "rename", "pause", "unpause", "update", "oom",
+}
+
+
+class ContainerInventory:
+    """基于 Docker 事件流维护的内存容器清单
+
+    启动后先全量加载一次，之后根据 ``/events`` 事件逐个刷新容器记录；
+    每次变化都会让 ``version`` 单调递增。事件流中断时自动全量重建。
+
+    - ``loader()`` 返回全部容器记录（每条记录必须包含 ``id``）
+    - ``fetcher(container_id)`` 返回单个容器记录，容器不存在时返回 ``None``
+    - ``event_source(since)`` 返回从 ``since`` (unix 时间戳) 开始的事件迭代器
+    """
+
+    def __init__(
+        self,
+        loader: Callable[[], Iterable[Dict[str, Any]]],
+        fetcher: Callable[[str], Optional[Dict[str, Any]]],
+        event_source: Callable[[int], Iterable[Dict[str, Any]]],
+        retry_interval: float = 2.0,
+    ):
+        self._loader = loader
+        self._fetcher = fetcher
+        self._event_source = event_source
+        self._retry_interval = retry_interval
+        self._containers: Dict[str, Dict[str, Any]] = {}
+        self._version = 0
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stream = None
+        self._listeners: List[Callable[[Dict[str, Any]], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def add_listener(self, callback: Callable[[Dict[str, Any]], None]):
+        """注册事件监听器，每个收到的原始事件都会回调一次"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """在后台线程中加载清单并开始跟踪事件流"""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self._thread = threading.Thread(
+                target=self._run, name="container-inventory", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """停止跟踪事件流"""
+        self._stopped.set()
+        stream = self._stream
+        if stream is not None and hasattr(stream, "close"):
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def rebuild(self) -> int:
+        """全量重建清单，返回重建开始的时间戳"""
+        since = int(time.time())
+        records = {record["id"]: record for record in self._loader()}
+        with self._lock:
+            self._containers = records
+            self._version += 1
+        self._ready.set()
+        logger.info(f"Container inventory rebuilt with {len(records)} containers (version {self._version})")
+        return since
+
+    def refresh(self, container_id: str, attempts: int = 3) -> Optional[Dict[str, Any]]:
+        """重新获取单个容器并更新清单（供写操作之后的请求线程调用）
+
+        获取期间清单有变化（例如事件线程处理了 destroy）时结果可能已过期，
+        不写入而是重试；多次冲突后放弃，由事件线程处理随后到达的事件。
+        """
+        record = None
+        for _ in range(attempts):
+            version = self._version
+            record = self._fetcher(container_id)
+            with self._lock:
+                if self._version == version:
+                    self._store(container_id, record)
+                    return record
+        return record
+
+    def apply_event(self, event: Dict[str, Any]):
+        """处理一条 Docker 事件"""
+        for listener in self._listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                logger.warning(f"Inventory listener failed: {str(e)}")
+
+        if event.get("Type", "container") != "container":
+            return
+        # exec_start: xxx 这类动作只取冒号前的部分
+        action = (event.get("Action") or event.get("status") or "").split(":", 1)[0].strip()
+        if action not in CONTAINER_EVENTS:
+            return
+        container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if not container_id:
+            return
+
+        # 事件按顺序在事件线程中处理，直接写入
+        if action == "destroy":
+            self._store(container_id, None)
+        else:
+            self._store(container_id, self._fetcher(container_id))
+
+    def snapshot(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """返回 (版本号, 全部容器记录)"""
+        with self._lock:
+            return self._version, list(self._containers.values())
+
+    def get(self, key: str) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """按 ID、名称或唯一的 ID 前缀查找容器"""
+        with self._lock:
+            record = self._containers.get(key)
+            if record is None:
+                name = key.lstrip("/")
+                matches = [
+                    r for r in self._containers.values()
+                    if r.get("name") == name or r["id"].startswith(key)
+                ]
+                if len(matches) == 1:
+                    record = matches[0]
+            return self._version, record
+
+    def _store(self, container_id: str, record: Optional[Dict[str, Any]]):
+        with self._lock:
+            if record is None:
+                if self._containers.pop(container_id, None) is None:
+                    return
+            else:
+                self._containers[record["id"]] = record
+            self._version += 1
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                since = self.rebuild()
+                self._stream = self._event_source(since)
+                for event in self._stream:
+                    if self._stopped.is_set():
+                        break
+                    self.apply_event(event)
+                if not self._stopped.is_set():
+                    logger.warning("Docker event stream ended, rebuilding inventory")
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Docker event stream dropped: {str(e)}, rebuilding inventory")
+            finally:
+                self._stream = None
+            self._stopped.wait(self._retry_interval)
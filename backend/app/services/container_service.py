@@ -1,34 +1,54 @@
+import asyncio
+import threading
 import docker
+from datetime import datetime, timezone
 from typing import List, Dict, Any
 import logging
+from app.services.image_cache import image_cache
+from app.services.image_puller import image_puller
+from app.services.async_docker import AsyncDockerClient, default_docker_host
 
 class ContainerService:
     def __init__(self):
-        try:
-            self.client = docker.from_env()
-            logging.info("Docker client initialized successfully")
-        except Exception as e:
-            logging.error(f"Failed to initialize Docker client: {str(e)}")
-            raise
+        # 同步客户端在首次使用时才连接，导入模块时不访问守护进程
+        self._client = None
+        self._lock = threading.Lock()
+        # 与 docker.from_env() 的同步客户端连接同一个守护进程
+        self.aclient = AsyncDockerClient(base_url=default_docker_host())
+
+    @property
+    def client(self) -> docker.DockerClient:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = docker.from_env()
+                        logging.info("Docker client initialized successfully")
+                    except Exception as e:
+                        logging.error(f"Failed to initialize Docker client: {str(e)}")
+                        raise
+        return self._client
 
     def list_containers(self) -> List[Dict[str, Any]]:
-        """ȡб"""
+        """获取所有容器列表"""
         try:
-            containers = self.client.containers.list(all=True)
+            # sparse 模式只发一次列表请求，镜像标签走共享缓存
+            containers = self.client.containers.list(all=True, sparse=True)
             return [{
                 'id': container.id,
-                'name': container.name,
+                'name': (container.attrs.get('Names') or ['/'])[0].lstrip('/'),
                 'status': container.status,
-                'image': container.image.tags[0] if container.image.tags else 'none',
-                'created': container.attrs['Created']
+                'image': image_cache.get_image_name(self.client, container.attrs.get('ImageID', ''), default='none'),
+                'created': datetime.fromtimestamp(container.attrs['Created'], tz=timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
             } for container in containers]
         except Exception as e:
             logging.error(f"Failed to list containers: {str(e)}")
             raise
 
     def create_container(self, image: str, name: str) -> Dict[str, Any]:
-        """"""
+        """创建新容器"""
         try:
+            image_puller.ensure_image(self.client, image)
             container = self.client.containers.run(
                 image=image,
                 name=name,
@@ -44,7 +64,7 @@ class ContainerService:
             raise
 
     def start_container(self, container_id: str) -> Dict[str, Any]:
-        """"""
+        """启动容器"""
         try:
             container = self.client.containers.get(container_id)
             container.start()
@@ -58,7 +78,7 @@ class ContainerService:
             raise
 
     def stop_container(self, container_id: str) -> Dict[str, Any]:
-        """ֹͣ"""
+        """停止容器"""
         try:
             container = self.client.containers.get(container_id)
             container.stop()
@@ -72,7 +92,7 @@ class ContainerService:
             raise
 
     def remove_container(self, container_id: str) -> bool:
-        """ɾ"""
+        """删除容器"""
         try:
             container = self.client.containers.get(container_id)
             container.remove(force=True)
@@ -80,3 +100,50 @@ class ContainerService:
         except Exception as e:
             logging.error(f"Failed to remove container: {str(e)}")
             raise
+
+    async def _summary_async(self, container_id: str) -> Dict[str, Any]:
+        info = await self.aclient.inspect_container(container_id)
+        return {
+            'id': info['Id'],
+            'name': info.get('Name', '').lstrip('/'),
+            'status': (info.get('State') or {}).get('Status', 'unknown')
+        }
+
+    async def create_container_async(self, image: str, name: str) -> Dict[str, Any]:
+        """异步创建并启动容器"""
+        try:
+            client = await asyncio.get_running_loop().run_in_executor(None, lambda: self.client)
+            await image_puller.ensure_image_async(client, self.aclient, image)
+            created = await self.aclient.create_container({'Image': image}, name=name)
+            await self.aclient.start_container(created['Id'])
+            return await self._summary_async(created['Id'])
+        except Exception as e:
+            logging.error(f"Failed to create container: {str(e)}")
+            raise
+
+    async def start_container_async(self, container_id: str) -> Dict[str, Any]:
+        """异步启动容器"""
+        try:
+            await self.aclient.start_container(container_id)
+            return await self._summary_async(container_id)
+        except Exception as e:
+            logging.error(f"Failed to start container: {str(e)}")
+            raise
+
+    async def stop_container_async(self, container_id: str) -> Dict[str, Any]:
+        """异步停止容器"""
+        try:
+            await self.aclient.stop_container(container_id)
+            return await self._summary_async(container_id)
+        except Exception as e:
+            logging.error(f"Failed to stop container: {str(e)}")
+            raise
+
+    async def remove_container_async(self, container_id: str) -> bool:
+        """异步删除容器"""
+        try:
+            await self.aclient.remove_container(container_id, force=True)
+            return True
+        except Exception as e:
+            logging.error(f"Failed to remove container: {str(e)}")
+            raise
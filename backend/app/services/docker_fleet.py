@@ -0,0 +1,197 @@
+import time
+import threading
+import logging
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import urlparse
+from docker.errors import NotFound
+from app.core.config import settings
+from app.services.docker_service import DockerService
+
+logger = logging.getLogger(__name__)
+
+
+def parse_docker_hosts(value: str) -> Dict[str, str]:
+    """解析 DOCKER_HOSTS，格式为 ``name=url,name2=url2``，省略名称时用主机名"""
+    hosts = {}
+    for entry in (value or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        name, sep, url = entry.partition("=")
+        if not sep:
+            url = entry
+            parsed = urlparse(url)
+            name = parsed.hostname or parsed.path or url
+        hosts[name.strip()] = url.strip()
+    return hosts
+
+
+class DockerFleet:
+    """多主机 Docker 集群
+
+    每个主机一个带连接池的 DockerService（首次使用时才连接），查询并行
+    分发到各主机。每个主机有独立的截止时间，超时或出错的主机只记录在
+    ``hosts`` 报告里，不会拖慢整体响应。
+
+    每个主机有自己的线程池，客户端超时不超过分发超时：无响应的主机最多
+    占满自己的线程，直到 SDK 调用超时返回；在此期间对它的调用直接报告
+    busy，不排队，也不影响其他主机。
+    """
+
+    def __init__(
+        self,
+        hosts: Optional[Dict[str, str]] = None,
+        timeout: Optional[float] = None,
+        workers_per_host: Optional[int] = None,
+    ):
+        self.hosts = hosts if hosts is not None else parse_docker_hosts(settings.DOCKER_HOSTS)
+        self.timeout = timeout or settings.DOCKER_FLEET_TIMEOUT
+        self.workers_per_host = workers_per_host or settings.DOCKER_FLEET_WORKERS_PER_HOST
+        self._services: Dict[str, DockerService] = {}
+        self._executors: Dict[str, ThreadPoolExecutor] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def service(self, host: str) -> DockerService:
+        service = self._services.get(host)
+        if service is None:
+            with self._lock:
+                service = self._services.get(host)
+                if service is None:
+                    # 客户端超时不超过分发超时，卡住的调用会及时释放线程
+                    service = DockerService(base_url=self.hosts[host], timeout=self.timeout)
+                    self._services[host] = service
+        return service
+
+    def _executor(self, host: str) -> ThreadPoolExecutor:
+        executor = self._executors.get(host)
+        if executor is None:
+            with self._lock:
+                executor = self._executors.get(host)
+                if executor is None:
+                    self._slots[host] = threading.BoundedSemaphore(self.workers_per_host)
+                    executor = ThreadPoolExecutor(
+                        max_workers=self.workers_per_host, thread_name_prefix=f"docker-fleet-{host}"
+                    )
+                    self._executors[host] = executor
+        return executor
+
+    def _submit(self, host: str, func: Callable[[DockerService], Any]) -> Optional[Future]:
+        """提交到主机自己的线程池；线程都被占用时返回 None"""
+        executor = self._executor(host)
+        slots = self._slots[host]
+        if not slots.acquire(blocking=False):
+            return None
+        future = executor.submit(self._call, host, func)
+        future.add_done_callback(lambda _: slots.release())
+        return future
+
+    def _call(self, host: str, func: Callable[[DockerService], Any]) -> Dict[str, Any]:
+        started = time.monotonic()
+        result = func(self.service(host))
+        return {"result": result, "duration_ms": round((time.monotonic() - started) * 1000, 1)}
+
+    def fan_out(
+        self,
+        func: Callable[[DockerService], Any],
+        hosts: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """在各主机上并行执行 ``func(service)``，返回 results 和每个主机的状态"""
+        targets = hosts or list(self.hosts)
+        unknown = [host for host in targets if host not in self.hosts]
+        if unknown:
+            raise ValueError(f"未知主机: {', '.join(unknown)}")
+        timeout = timeout or self.timeout
+
+        results: Dict[str, Any] = {}
+        report: Dict[str, Dict[str, Any]] = {}
+        futures = {}
+        for host in targets:
+            future = self._submit(host, func)
+            if future is None:
+                report[host] = {"status": "busy", "error": "该主机之前的调用尚未返回"}
+            else:
+                futures[future] = host
+        done, not_done = wait(futures, timeout=timeout)
+
+        for future in done:
+            host = futures[future]
+            try:
+                outcome = future.result()
+                results[host] = outcome["result"]
+                report[host] = {"status": "ok", "duration_ms": outcome["duration_ms"]}
+            except Exception as e:
+                logger.warning(f"Docker host {host} failed: {str(e)}")
+                report[host] = {"status": "error", "error": str(e)}
+        for future in not_done:
+            host = futures[future]
+            # 已经在执行的调用无法中断，结果会被丢弃
+            future.cancel()
+            report[host] = {"status": "timeout", "error": f"超过 {timeout}s 未返回"}
+        return {
+            "results": results,
+            "hosts": report,
+            "partial": any(entry["status"] != "ok" for entry in report.values()),
+        }
+
+    def list_containers(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        fields: Optional[List[str]] = None,
+        hosts: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """汇总各主机的容器列表，每个容器带上 host 字段"""
+        outcome = self.fan_out(
+            lambda service: service.query_containers(filters=filters, fields=fields)["items"],
+            hosts=hosts,
+            timeout=timeout,
+        )
+        items = [
+            dict(item, host=host)
+            for host, host_items in outcome["results"].items()
+            for item in host_items
+        ]
+        return {"items": items, "hosts": outcome["hosts"], "partial": outcome["partial"]}
+
+    def _find_on_hosts(
+        self,
+        func: Callable[[DockerService], Any],
+        hosts: Optional[List[str]],
+        timeout: Optional[float],
+    ) -> Dict[str, Any]:
+        def lookup(service: DockerService):
+            try:
+                return func(service)
+            except NotFound:
+                return None
+
+        outcome = self.fan_out(lookup, hosts=hosts, timeout=timeout)
+        items = [
+            {"host": host, "data": result}
+            for host, result in outcome["results"].items()
+            if result is not None
+        ]
+        return {"items": items, "hosts": outcome["hosts"], "partial": outcome["partial"]}
+
+    def get_container_stats(
+        self, container_id: str, hosts: Optional[List[str]] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """在各主机上查找容器并返回统计信息"""
+        return self._find_on_hosts(
+            lambda service: service.get_container_stats(container_id), hosts, timeout
+        )
+
+    def get_container_logs(
+        self,
+        container_id: str,
+        tail: int = 100,
+        hosts: Optional[List[str]] = None,
+        timeout: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """在各主机上查找容器并返回日志"""
+        return self._find_on_hosts(
+            lambda service: service.get_container_logs(container_id, tail=tail), hosts, timeout
+        )
@@ -1,57 +1,418 @@
 import os
+import time
+import uuid
+import base64
+import threading
+import codecs
+import asyncio
 import docker
-from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+from docker.errors import NotFound
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 import logging
 from app.core.config import settings
+from app.services.container_inventory import ContainerInventory
+from app.services.image_cache import image_cache
+from app.services.image_puller import image_puller
+from app.services.async_docker import AsyncDockerClient, DockerAPIError, build_container_config, default_docker_host, STDOUT, STDERR
+from app.utils.concurrency import bounded_as_completed
 
 logger = logging.getLogger(__name__)
 
+# 列表接口返回的字段
+SUMMARY_FIELDS = ("id", "name", "image", "status", "ports", "createdAt")
+# 详情接口额外返回的字段
+DETAIL_FIELDS = SUMMARY_FIELDS + ("state", "config", "networkSettings")
+
+
+def _container_summary(record: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: record.get(field) for field in SUMMARY_FIELDS}
+
+
+def project_container(record: Dict[str, Any], fields: Optional[List[str]] = None) -> Dict[str, Any]:
+    """只保留请求的字段，不指定时返回列表摘要字段"""
+    return {field: record.get(field) for field in (fields or SUMMARY_FIELDS)}
+
+
+def parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析逗号分隔的 fields 参数，包含未知字段时抛出 ValueError"""
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name not in DETAIL_FIELDS]
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(unknown)}")
+    if "id" not in names:
+        names.insert(0, "id")
+    return names
+
+
+def encode_cursor(container_id: str) -> str:
+    return base64.urlsafe_b64encode(container_id.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except Exception:
+        raise ValueError("无效的 cursor")
+
+
+def _match_labels(labels: Dict[str, str], selectors: List[str]) -> bool:
+    for selector in selectors:
+        key, sep, value = selector.partition("=")
+        if key not in labels or (sep and labels[key] != value):
+            return False
+    return True
+
+
+def _match_record(record: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    """在内存中按 Docker filters 的语义匹配容器记录"""
+    if filters.get("status") and record.get("status") != filters["status"]:
+        return False
+    if filters.get("name") and filters["name"] not in (record.get("name") or ""):
+        return False
+    if filters.get("image"):
+        image = filters["image"]
+        config_image = (record.get("config") or {}).get("Image") or ""
+        if image not in (record.get("image"), config_image) and not config_image.startswith(f"{image}:"):
+            return False
+    if filters.get("label"):
+        labels = (record.get("config") or {}).get("Labels") or {}
+        if not _match_labels(labels, filters["label"]):
+            return False
+    return True
+
+
+def _ports_from_list_entry(ports: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, str]]]:
+    """把列表接口的端口格式转换为 inspect 的 NetworkSettings.Ports 格式"""
+    result: Dict[str, List[Dict[str, str]]] = {}
+    for port in ports or []:
+        key = f"{port.get('PrivatePort')}/{port.get('Type', 'tcp')}"
+        bindings = result.setdefault(key, [])
+        if port.get("PublicPort"):
+            bindings.append({"HostIp": port.get("IP", ""), "HostPort": str(port["PublicPort"])})
+    return result
+
+
+def _created_from_list_entry(created: Any) -> str:
+    if isinstance(created, (int, float)):
+        return datetime.fromtimestamp(created, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+    return created or ""
+
+# 批量创建的容器带上批次标签，回滚时按标签查找
+BATCH_LABEL = "container-platform.batch"
+
+
+def _is_auto_port(value: Any) -> bool:
+    return value is None or value == "auto"
+
+
+def _host_ports(ports: Dict[str, Any]) -> List[int]:
+    """取出端口映射中显式指定的宿主机端口"""
+    explicit = {key: value for key, value in ports.items() if not _is_auto_port(value)}
+    bindings = build_container_config("", ports=explicit)["HostConfig"].get("PortBindings", {})
+    return [
+        int(binding["HostPort"])
+        for values in bindings.values()
+        for binding in values
+        if str(binding.get("HostPort", "")).isdigit()
+    ]
+
+
 class DockerService:
-    def __init__(self):
+    """Docker 守护进程访问服务
+
+    构造时不做任何网络调用：同步客户端在首次使用时（或由
+    ``connect_in_background`` 在后台）连接，异步客户端在首次使用时创建。
+    连接状态通过 ``status()`` 报告给健康检查。
+    """
+
+    def __init__(self, base_url: Optional[str] = None, timeout: Optional[float] = None):
+        # 显式指定守护进程地址时为多主机模式
+        self._base_url = base_url
+        # 单次 API 调用的超时时间，None 时使用 SDK 的默认值（60 秒）
+        self.timeout = timeout
+        self._client: Optional[docker.DockerClient] = None
+        self._aclient: Optional[AsyncDockerClient] = None
+        self._stale_aclients: List[AsyncDockerClient] = []
+        self._connect_lock = threading.Lock()
+        self._state = "not_connected"
+        self._last_error: Optional[str] = None
+        self._connected_at: Optional[float] = None
+        self.base_url = base_url or self._candidate_hosts()[0]
+
+        # 事件驱动的内存容器清单，首次读取时才启动
+        self.inventory: Optional[ContainerInventory] = None
+        if settings.DOCKER_INVENTORY_ENABLED:
+            self.inventory = ContainerInventory(
+                loader=self._load_inventory,
+                fetcher=self._fetch_inventory_record,
+                event_source=self._container_events,
+                retry_interval=settings.DOCKER_INVENTORY_RETRY_INTERVAL,
+            )
+            self.inventory.add_listener(image_cache.handle_event)
+
+        # 进行中的批量创建已经分配、但容器尚未创建的宿主机端口
+        self._reserved_ports: set = set()
+
+    @staticmethod
+    def _candidate_hosts() -> List[str]:
+        """默认连接顺序: 环境变量（docker.from_env 的行为），然后是配置的 DOCKER_HOST"""
+        return [
+            default_docker_host(),
+            settings.DOCKER_HOST or "tcp://docker-proxy:2375",
+        ]
+
+    @property
+    def client(self) -> docker.DockerClient:
+        if self._client is None:
+            self.connect()
+        return self._client
+
+    @property
+    def aclient(self) -> AsyncDockerClient:
+        # 与同步客户端连接同一个守护进程的异步客户端，供 async 路由使用
+        if self._aclient is None:
+            if self.timeout is not None:
+                self._aclient = AsyncDockerClient(base_url=self.base_url, timeout=self.timeout)
+            else:
+                self._aclient = AsyncDockerClient(base_url=self.base_url)
+        return self._aclient
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    def connect(self) -> docker.DockerClient:
+        """连接守护进程，已连接时直接返回；失败时抛出异常，下次使用时重试"""
+        with self._connect_lock:
+            if self._client is not None:
+                return self._client
+            self._state = "connecting"
+            try:
+                if self._base_url:
+                    logger.info(f"Initializing Docker client for {self._base_url}")
+                    options = {"timeout": self.timeout} if self.timeout is not None else {}
+                    client = docker.DockerClient(
+                        base_url=self._base_url, max_pool_size=settings.DOCKER_POOL_SIZE, **options
+                    )
+                    client.ping()
+                    base_url = self._base_url
+                else:
+                    client, base_url = self._connect_default()
+            except Exception as e:
+                self._state = "error"
+                self._last_error = str(e)
+                logger.error(f"Error initializing Docker client: {str(e)}")
+                raise
+            if self._aclient is not None and self._aclient.base_url != base_url:
+                # 回退到了另一个地址，之前按默认地址创建的异步客户端作废
+                self._stale_aclients.append(self._aclient)
+                self._aclient = None
+            self.base_url = base_url
+            self._client = client
+            self._state = "connected"
+            self._last_error = None
+            self._connected_at = time.time()
+            return client
+
+    async def _client_async(self) -> docker.DockerClient:
+        """在 async 代码中取同步客户端，首次连接放到线程池里，不阻塞事件循环"""
+        if self._client is None:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self.connect)
+        return self._client
+
+    def connect_in_background(self) -> threading.Thread:
+        """在后台线程中连接，不阻塞启动；失败只记录在状态里"""
+        def run():
+            try:
+                self.connect()
+            except Exception:
+                pass
+
+        thread = threading.Thread(target=run, name="docker-connect", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict[str, Any]:
+        """连接状态，不触发连接"""
+        return {
+            "state": self._state,
+            "base_url": self.base_url,
+            "error": self._last_error,
+            "connected_at": self._connected_at,
+            "inventory_ready": self.inventory is not None and self.inventory.ready,
+        }
+
+    def _connect_default(self) -> Tuple[docker.DockerClient, str]:
+        """优先使用环境变量连接，失败后使用配置的 DOCKER_HOST"""
+        logger.info(f"Initializing Docker client with DOCKER_HOST: {settings.DOCKER_HOST}")
+        env_host, docker_host = self._candidate_hosts()
+
+        # 尝试使用环境变量中的配置
         try:
-            logger.info(f"Initializing Docker client with DOCKER_HOST: {settings.DOCKER_HOST}")
-            
-            # 尝试使用环境变量中的配置
+            client = docker.from_env(max_pool_size=settings.DOCKER_POOL_SIZE)
+            # 测试连接
+            client.ping()
+            logger.info("Successfully connected to Docker daemon using environment variables")
+            return client, env_host
+        except Exception as e:
+            logger.warning(f"Failed to initialize Docker client from env: {str(e)}")
+            # 尝试使用配置的 DOCKER_HOST
+            logger.info(f"Trying to connect using docker host: {docker_host}")
+            client = docker.DockerClient(base_url=docker_host, max_pool_size=settings.DOCKER_POOL_SIZE)
+            # 测试连接
+            client.ping()
+            logger.info("Successfully connected to Docker daemon using explicit host")
+            return client, docker_host
+
+    def _container_info(self, container) -> Dict[str, Any]:
+        """把 SDK 容器对象转换为详细信息字典"""
+        # 通过共享缓存解析镜像标签，避免每个容器检查一次镜像
+        image_id = container.attrs.get("ImageID") or container.attrs.get("Image", "")
+        return {
+            "id": container.id,
+            "name": container.name or "",
+            "image": image_cache.get_image_name(self.client, image_id),
+            "status": container.status or "unknown",
+            "ports": container.ports or {},
+            "createdAt": container.attrs.get("Created", ""),
+            "state": container.attrs.get("State", {}),
+            "config": container.attrs.get("Config", {}),
+            "networkSettings": container.attrs.get("NetworkSettings", {})
+        }
+
+    def _load_inventory(self) -> List[Dict[str, Any]]:
+        records = []
+        for container in self.client.containers.list(all=True):
+            try:
+                records.append(self._container_info(container))
+            except Exception as e:
+                logger.warning(f"Error getting container info for {container.id}: {str(e)}")
+        return records
+
+    def _fetch_inventory_record(self, container_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return self._container_info(self.client.containers.get(container_id))
+        except NotFound:
+            return None
+
+    def _container_summary_from_list_entry(self, attrs: Dict[str, Any]) -> Dict[str, Any]:
+        """从容器列表接口的原始数据构建摘要，不需要逐个 inspect"""
+        names = attrs.get("Names") or []
+        return {
+            "id": attrs["Id"],
+            "name": names[0].lstrip("/") if names else "",
+            "image": image_cache.get_image_name(self.client, attrs.get("ImageID", "")),
+            "status": attrs.get("State") or "unknown",
+            "ports": _ports_from_list_entry(attrs.get("Ports")),
+            "createdAt": _created_from_list_entry(attrs.get("Created")),
+        }
+
+    def _container_events(self, since: int):
+        return self.client.events(
+            since=since, decode=True, filters={"type": ["container", "image"]}
+        )
+
+    def _inventory_ready(self) -> bool:
+        if self.inventory is None:
+            return False
+        self.inventory.start()
+        return self.inventory.ready
+
+    def _refresh_inventory(self, container_id: str):
+        """写操作后立即刷新清单，避免紧接着的读取拿到旧状态"""
+        if self.inventory is not None and self.inventory.ready:
             try:
-                self.client = docker.from_env()
-                # 测试连接
-                self.client.ping()
-                logger.info("Successfully connected to Docker daemon using environment variables")
+                self.inventory.refresh(container_id)
             except Exception as e:
-                logger.warning(f"Failed to initialize Docker client from env: {str(e)}")
-                # 尝试使用配置的 DOCKER_HOST
-                docker_host = settings.DOCKER_HOST or 'tcp://docker-proxy:2375'
-                logger.info(f"Trying to connect using docker host: {docker_host}")
-                self.client = docker.DockerClient(base_url=docker_host)
-                # 测试连接
-                self.client.ping()
-                logger.info("Successfully connected to Docker daemon using explicit host")
+                logger.warning(f"Error refreshing inventory for {container_id}: {str(e)}")
+
+    async def _refresh_inventory_async(self, container_id: str):
+        if self.inventory is not None and self.inventory.ready:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._refresh_inventory, container_id)
+
+    def snapshot_containers(self) -> Tuple[Optional[int], List[Dict[str, Any]]]:
+        """返回 (清单版本号, 容器列表)，未使用清单时版本号为 None"""
+        if self._inventory_ready():
+            version, records = self.inventory.snapshot()
+            return version, [_container_summary(record) for record in records]
+        return None, self.list_containers_from_daemon()
+
+    def list_containers(self) -> List[Dict[str, Any]]:
+        return self.snapshot_containers()[1]
+
+    def query_containers(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """按条件分页查询容器，返回 version/items/total/next_cursor
+
+        结果按容器 ID 排序，cursor 指向上一页最后一个容器。清单可用时在内存中
+        过滤，否则把条件转换为 Docker 的 filters 参数交给守护进程。
+        """
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        version = None
+        if self._inventory_ready():
+            version, records = self.inventory.snapshot()
+            records = [record for record in records if _match_record(record, filters)]
+        else:
+            records = self._query_daemon(filters, detail=bool(fields and set(fields) - set(SUMMARY_FIELDS)))
+
+        records.sort(key=lambda record: record["id"])
+        # 总数是过滤后的全部容器，不受 cursor 影响
+        total = len(records)
+        if cursor:
+            after = decode_cursor(cursor)
+            records = [record for record in records if record["id"] > after]
+        page = records[:limit] if limit else records
+        next_cursor = encode_cursor(page[-1]["id"]) if limit and len(records) > len(page) else None
+        return {
+            "version": version,
+            "items": [project_container(record, fields) for record in page],
+            "total": total,
+            "next_cursor": next_cursor,
+        }
+
+    def _query_daemon(self, filters: Dict[str, Any], detail: bool = False) -> List[Dict[str, Any]]:
+        docker_filters = {}
+        if filters.get("status"):
+            docker_filters["status"] = filters["status"]
+        if filters.get("name"):
+            docker_filters["name"] = filters["name"]
+        if filters.get("image"):
+            docker_filters["ancestor"] = filters["image"]
+        if filters.get("label"):
+            docker_filters["label"] = filters["label"]
+        try:
+            if detail:
+                # 需要 state/config 等详细字段时只能逐个 inspect
+                return [
+                    self._container_info(container)
+                    for container in self.client.containers.list(all=True, filters=docker_filters)
+                ]
+            return [
+                self._container_summary_from_list_entry(container.attrs)
+                for container in self.client.containers.list(all=True, sparse=True, filters=docker_filters)
+            ]
         except Exception as e:
-            logger.error(f"Error initializing Docker client: {str(e)}")
+            logger.error(f"Error listing containers: {str(e)}")
             raise
 
-    def list_containers(self) -> List[Dict[str, Any]]:
+    def list_containers_from_daemon(self) -> List[Dict[str, Any]]:
         try:
-            containers = self.client.containers.list(all=True)
+            # sparse 模式只发一次列表请求，不会逐个 inspect 容器
+            containers = self.client.containers.list(all=True, sparse=True)
             container_list = []
             for container in containers:
                 try:
-                    # 安全地获取镜像标签
-                    image_name = "<none>"
-                    if hasattr(container, 'image') and container.image:
-                        if hasattr(container.image, 'tags') and container.image.tags:
-                            image_name = container.image.tags[0]
-                    
-                    # 构建基本容器信息
-                    container_info = {
-                        "id": container.id,
-                        "name": container.name or "",
-                        "image": image_name,
-                        "status": container.status or "unknown",
-                        "ports": container.ports or {},
-                        "createdAt": container.attrs.get("Created", "")
-                    }
-                    container_list.append(container_info)
+                    container_list.append(self._container_summary_from_list_entry(container.attrs))
                 except Exception as e:
                     logger.warning(f"Error getting container info for {container.id}: {str(e)}")
                     continue
@@ -62,11 +423,14 @@ class DockerService:
 
     def create_container(self, image: str, name: str, **kwargs) -> Dict[str, Any]:
         try:
+            # 镜像缺失时经由调度器拉取，并发创建共享同一次拉取
+            image_puller.ensure_image(self.client, image)
             container = self.client.containers.create(
                 image=image,
                 name=name,
                 **kwargs
             )
+            self._refresh_inventory(container.id)
             return {
                 "id": container.id,
                 "name": container.name,
@@ -80,6 +444,7 @@ class DockerService:
         try:
             container = self.client.containers.get(container_id)
             container.stop()
+            self._refresh_inventory(container.id)
             return True
         except Exception as e:
             logger.error(f"Error stopping container {container_id}: {str(e)}")
@@ -89,6 +454,7 @@ class DockerService:
         try:
             container = self.client.containers.get(container_id)
             container.start()
+            self._refresh_inventory(container.id)
             return True
         except Exception as e:
             logger.error(f"Error starting container {container_id}: {str(e)}")
@@ -98,6 +464,7 @@ class DockerService:
         try:
             container = self.client.containers.get(container_id)
             container.remove(force=force)
+            self._refresh_inventory(container.id)
             return True
         except Exception as e:
             logger.error(f"Error removing container {container_id}: {str(e)}")
@@ -127,30 +494,401 @@ class DockerService:
 
     def get_container(self, container_id: str) -> Optional[Dict[str, Any]]:
         """获取单个容器的详细信息"""
+        return self.get_container_with_version(container_id)[1]
+
+    def get_container_with_version(self, container_id: str) -> Tuple[Optional[int], Optional[Dict[str, Any]]]:
+        """返回 (清单版本号, 容器详情)，未命中清单时从守护进程读取"""
+        if self._inventory_ready():
+            version, record = self.inventory.get(container_id)
+            if record is not None:
+                return version, record
         try:
             container = self.client.containers.get(container_id)
             if not container:
-                return None
-                
-            # 安全地获取镜像标签
-            image_name = "<none>"
-            if hasattr(container, 'image') and container.image:
-                if hasattr(container.image, 'tags') and container.image.tags:
-                    image_name = container.image.tags[0]
-            
-            # 构建详细的容器信息
-            container_info = {
-                "id": container.id,
-                "name": container.name or "",
-                "image": image_name,
-                "status": container.status or "unknown",
-                "ports": container.ports or {},
-                "createdAt": container.attrs.get("Created", ""),
-                "state": container.attrs.get("State", {}),
-                "config": container.attrs.get("Config", {}),
-                "networkSettings": container.attrs.get("NetworkSettings", {})
-            }
-            return container_info
+                return None, None
+            return None, self._container_info(container)
+        except docker.errors.NotFound:
+            return None, None
         except Exception as e:
             logger.error(f"Error getting container {container_id}: {str(e)}")
-            raise 
\ No newline at end of file
+            raise
+
+    async def create_container_async(
+        self,
+        image: str,
+        name: str,
+        ports: Optional[Dict[str, Any]] = None,
+        environment: Optional[Dict[str, str]] = None,
+        labels: Optional[Dict[str, str]] = None,
+    ) -> Dict[str, Any]:
+        """异步创建容器，不阻塞事件循环"""
+        try:
+            await image_puller.ensure_image_async(await self._client_async(), self.aclient, image)
+            config = build_container_config(image, environment=environment, ports=ports, labels=labels)
+            created = await self.aclient.create_container(config, name=name)
+            info = await self.aclient.inspect_container(created["Id"])
+            await self._refresh_inventory_async(created["Id"])
+            return {
+                "id": info["Id"],
+                "name": info.get("Name", "").lstrip("/"),
+                "status": (info.get("State") or {}).get("Status", "created")
+            }
+        except Exception as e:
+            logger.error(f"Error creating container: {str(e)}")
+            raise
+
+    async def start_container_async(self, container_id: str) -> bool:
+        try:
+            await self.aclient.start_container(container_id)
+            await self._refresh_inventory_async(container_id)
+            return True
+        except DockerAPIError as e:
+            if e.status == 404:
+                return False
+            logger.error(f"Error starting container {container_id}: {str(e)}")
+            raise
+
+    async def stop_container_async(self, container_id: str, timeout: Optional[int] = None) -> bool:
+        try:
+            await self.aclient.stop_container(container_id, timeout=timeout)
+            await self._refresh_inventory_async(container_id)
+            return True
+        except DockerAPIError as e:
+            if e.status == 404:
+                return False
+            logger.error(f"Error stopping container {container_id}: {str(e)}")
+            raise
+
+    async def restart_container_async(self, container_id: str, timeout: Optional[int] = None) -> bool:
+        try:
+            await self.aclient.restart_container(container_id, timeout=timeout)
+            await self._refresh_inventory_async(container_id)
+            return True
+        except DockerAPIError as e:
+            if e.status == 404:
+                return False
+            logger.error(f"Error restarting container {container_id}: {str(e)}")
+            raise
+
+    async def remove_container_async(self, container_id: str, force: bool = False) -> bool:
+        try:
+            await self.aclient.remove_container(container_id, force=force)
+            await self._refresh_inventory_async(container_id)
+            return True
+        except DockerAPIError as e:
+            if e.status == 404:
+                return False
+            logger.error(f"Error removing container {container_id}: {str(e)}")
+            raise
+
+    async def get_container_logs_async(self, container_id: str, tail: int = 100) -> str:
+        try:
+            logs = await self.aclient.logs(container_id, tail=tail)
+            return logs.decode('utf-8', errors='replace')
+        except Exception as e:
+            logger.error(f"Error getting logs for container {container_id}: {str(e)}")
+            raise
+
+    async def open_log_stream(self, container_id: str, **kwargs) -> AsyncIterator[Tuple[str, str]]:
+        """确认容器存在并返回日志流，容器不存在时在开始传输前抛出 DockerAPIError"""
+        tty = None
+        if self._inventory_ready():
+            _, record = self.inventory.get(container_id)
+            if record is not None:
+                tty = bool((record.get("config") or {}).get("Tty"))
+        if tty is None:
+            info = await self.aclient.inspect_container(container_id)
+            tty = bool((info.get("Config") or {}).get("Tty"))
+        return self.stream_container_logs(container_id, tty=tty, **kwargs)
+
+    async def stream_container_logs(
+        self,
+        container_id: str,
+        follow: bool = False,
+        stdout: bool = True,
+        stderr: bool = True,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+        timestamps: bool = False,
+        tail: Any = "all",
+        tty: Optional[bool] = None,
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """逐块读取容器日志，返回 (stdout/stderr, 文本) 元组
+
+        数据按帧从守护进程读出后立即交给调用方，内存占用与日志总量无关；
+        每个流各自增量解码 UTF-8，多字节字符跨帧时不会被截断。
+        """
+        decoders = {
+            STDOUT: codecs.getincrementaldecoder("utf-8")(errors="replace"),
+            STDERR: codecs.getincrementaldecoder("utf-8")(errors="replace"),
+        }
+        names = {STDOUT: "stdout", STDERR: "stderr"}
+        async for stream_type, chunk in self.aclient.stream_logs(
+            container_id,
+            follow=follow,
+            stdout=stdout,
+            stderr=stderr,
+            since=since,
+            until=until,
+            timestamps=timestamps,
+            tail=tail,
+            tty=tty,
+        ):
+            decoder = decoders.get(stream_type)
+            if decoder is None:
+                continue
+            text = decoder.decode(chunk)
+            if text:
+                yield names[stream_type], text
+        for stream_type, decoder in decoders.items():
+            text = decoder.decode(b"", final=True)
+            if text:
+                yield names[stream_type], text
+
+    async def get_container_stats_async(self, container_id: str) -> Dict[str, Any]:
+        try:
+            stats = await self.aclient.stats(container_id)
+            return {
+                "cpu_usage": stats["cpu_stats"]["cpu_usage"]["total_usage"],
+                "memory_usage": stats["memory_stats"]["usage"],
+                "network_rx": stats["networks"]["eth0"]["rx_bytes"],
+                "network_tx": stats["networks"]["eth0"]["tx_bytes"]
+            }
+        except Exception as e:
+            logger.error(f"Error getting stats for container {container_id}: {str(e)}")
+            raise
+
+    async def find_container_ids_async(self, labels: Dict[str, str]) -> List[str]:
+        """按标签查找容器 ID"""
+        filters = {"label": [f"{key}={value}" for key, value in labels.items()]}
+        containers = await self.aclient.list_containers(all=True, filters=filters)
+        return [container["Id"] for container in containers]
+
+    async def bulk_action(
+        self,
+        action: str,
+        container_ids: List[str],
+        parallelism: Optional[int] = None,
+        timeout: Optional[float] = None,
+        force: bool = False,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """并发执行批量生命周期操作，按完成顺序返回每个容器的结果"""
+        operations = {
+            "start": self.start_container_async,
+            "stop": self.stop_container_async,
+            "restart": self.restart_container_async,
+            "remove": lambda container_id: self.remove_container_async(container_id, force=force),
+        }
+        operation = operations[action]
+        limit = min(parallelism or settings.BULK_MAX_PARALLELISM, settings.BULK_MAX_PARALLELISM)
+        async for outcome in bounded_as_completed(
+            dict.fromkeys(container_ids),
+            operation,
+            limit=limit,
+            timeout=timeout or settings.BULK_OPERATION_TIMEOUT,
+        ):
+            error = outcome["error"]
+            if error is None and not outcome["result"]:
+                error = "容器未找到"
+            yield {
+                "id": outcome["item"],
+                "action": action,
+                "success": error is None,
+                "error": error,
+                "duration_ms": outcome["duration_ms"],
+            }
+
+    async def _used_host_ports(self) -> set:
+        """已被容器占用或预留的宿主机端口
+
+        运行中的容器从列表接口的 ``Ports`` 读取；已创建或已停止的容器没有
+        PublicPort，但 ``HostConfig.PortBindings`` 中的端口在它们启动时仍会
+        被占用，需要逐个 inspect。
+        """
+        containers = await self.aclient.list_containers(all=True)
+        used = {
+            port["PublicPort"]
+            for container in containers
+            for port in container.get("Ports") or []
+            if port.get("PublicPort")
+        }
+        stopped = [
+            container["Id"] for container in containers
+            if container.get("State") not in ("running", "paused")
+        ]
+        async for outcome in bounded_as_completed(
+            stopped, self.aclient.inspect_container, limit=settings.BULK_MAX_PARALLELISM
+        ):
+            # inspect 失败（例如容器刚被删除）时忽略该容器
+            bindings = ((outcome["result"] or {}).get("HostConfig") or {}).get("PortBindings") or {}
+            used.update(
+                int(binding["HostPort"])
+                for values in bindings.values()
+                for binding in values or []
+                if str(binding.get("HostPort", "")).isdigit()
+            )
+        return used | self._reserved_ports
+
+    def _reserve_host_ports(self, count: int, exclude: set) -> List[int]:
+        """在 BATCH_PORT_RANGE_START..END 中分配 count 个未占用的端口"""
+        allocated = []
+        if count:
+            for port in range(settings.BATCH_PORT_RANGE_START, settings.BATCH_PORT_RANGE_END + 1):
+                if port in exclude or port in self._reserved_ports:
+                    continue
+                allocated.append(port)
+                if len(allocated) == count:
+                    break
+        if len(allocated) < count:
+            raise ValueError(f"端口范围内可用端口不足，需要 {count} 个")
+        self._reserved_ports.update(allocated)
+        return allocated
+
+    async def _plan_batch(
+        self,
+        batch_id: str,
+        count: int,
+        name_pattern: Optional[str],
+        environment: Optional[Dict[str, str]],
+        ports: Optional[Dict[str, Any]],
+        labels: Optional[Dict[str, str]],
+        instances: List[Dict[str, Any]],
+    ) -> Tuple[List[Dict[str, Any]], List[int]]:
+        """展开模板并分配端口，返回 (每个实例的参数, 预留的端口)"""
+        specs = []
+        for index in range(1, count + 1):
+            override = instances[index - 1] if index <= len(instances) else {}
+            try:
+                name = override.get("name") or (name_pattern.format(index=index) if name_pattern else None)
+            except (KeyError, IndexError, ValueError):
+                raise ValueError(f"无效的 name_pattern: {name_pattern}")
+            specs.append({
+                "index": index,
+                "name": name,
+                "environment": {**(environment or {}), **(override.get("environment") or {})},
+                "ports": {**(ports or {}), **(override.get("ports") or {})},
+                "labels": {**(labels or {}), **(override.get("labels") or {}), BATCH_LABEL: batch_id},
+            })
+
+        names = [spec["name"] for spec in specs if spec["name"]]
+        if len(names) != len(set(names)):
+            raise ValueError("实例名称重复，name_pattern 需要包含 {index}")
+
+        used = await self._used_host_ports()
+        explicit: set = set()
+        for spec in specs:
+            for port in _host_ports(spec["ports"]):
+                if port in explicit or port in used:
+                    raise ValueError(f"宿主机端口 {port} 已被占用或在多个实例中重复")
+                explicit.add(port)
+
+        auto_count = sum(
+            1 for spec in specs for value in spec["ports"].values() if _is_auto_port(value)
+        )
+        allocated = self._reserve_host_ports(auto_count, used | explicit)
+        free_ports = iter(allocated)
+        for spec in specs:
+            spec["ports"] = {
+                key: next(free_ports) if _is_auto_port(value) else value
+                for key, value in spec["ports"].items()
+            }
+        return specs, allocated
+
+    async def batch_create_async(
+        self,
+        image: str,
+        count: Optional[int] = None,
+        name_pattern: Optional[str] = None,
+        environment: Optional[Dict[str, str]] = None,
+        ports: Optional[Dict[str, Any]] = None,
+        labels: Optional[Dict[str, str]] = None,
+        instances: Optional[List[Dict[str, Any]]] = None,
+        start: bool = True,
+        parallelism: Optional[int] = None,
+        timeout: Optional[float] = None,
+        rollback: bool = True,
+    ) -> Dict[str, Any]:
+        """按模板并发创建一批容器
+
+        镜像只检查/拉取一次，端口在创建前统一分配；任一实例失败且 ``rollback``
+        为真时，删除本批次已创建的全部容器。参数错误抛出 ValueError。
+        """
+        started = time.monotonic()
+        instances = instances or []
+        count = count or len(instances)
+        batch_id = uuid.uuid4().hex[:12]
+        specs, reserved = await self._plan_batch(
+            batch_id, count, name_pattern, environment, ports, labels, instances
+        )
+        created_ids: Dict[int, str] = {}
+        limit = min(parallelism or settings.BULK_MAX_PARALLELISM, settings.BULK_MAX_PARALLELISM)
+        try:
+            await image_puller.ensure_image_async(await self._client_async(), self.aclient, image)
+
+            async def create_one(spec: Dict[str, Any]) -> str:
+                config = build_container_config(
+                    image, environment=spec["environment"], ports=spec["ports"], labels=spec["labels"]
+                )
+                created = await self.aclient.create_container(config, name=spec["name"])
+                created_ids[spec["index"]] = created["Id"]
+                if start:
+                    await self.aclient.start_container(created["Id"])
+                return created["Id"]
+
+            results = []
+            async for outcome in bounded_as_completed(
+                specs, create_one, limit=limit, timeout=timeout or settings.BULK_OPERATION_TIMEOUT
+            ):
+                spec = outcome["item"]
+                results.append({
+                    "index": spec["index"],
+                    "name": spec["name"],
+                    "id": created_ids.get(spec["index"]),
+                    "ports": spec["ports"],
+                    "status": ("running" if start else "created") if outcome["error"] is None else "failed",
+                    "error": outcome["error"],
+                    "duration_ms": outcome["duration_ms"],
+                })
+        finally:
+            self._reserved_ports.difference_update(reserved)
+        results.sort(key=lambda result: result["index"])
+
+        failed = [result for result in results if result["error"] is not None]
+        rolled_back = False
+        rollback_errors = []
+        if failed and rollback:
+            # 超时被取消的创建可能已在守护进程上完成，因此同时按批次标签查找
+            container_ids = set(created_ids.values())
+            container_ids.update(await self.find_container_ids_async({BATCH_LABEL: batch_id}))
+            async for outcome in bounded_as_completed(
+                container_ids,
+                lambda container_id: self.remove_container_async(container_id, force=True),
+                limit=limit,
+                timeout=settings.BULK_OPERATION_TIMEOUT,
+            ):
+                if outcome["error"] is not None:
+                    rollback_errors.append({"id": outcome["item"], "error": outcome["error"]})
+            rolled_back = not rollback_errors
+            for result in results:
+                if result["error"] is None:
+                    result["status"] = "rolled_back"
+            logger.warning(f"Batch {batch_id}: {len(failed)} of {count} containers failed, rolled back")
+
+        return {
+            "batch_id": batch_id,
+            "image": image,
+            "requested": count,
+            "succeeded": len(results) - len(failed),
+            "failed": len(failed),
+            "rolled_back": rolled_back,
+            "rollback_errors": rollback_errors,
+            "instances": results,
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+
+    async def close(self):
+        """关闭异步客户端的连接池"""
+        for aclient in self._stale_aclients + [self._aclient]:
+            if aclient is not None:
+                await aclient.close()
+        self._stale_aclients = []
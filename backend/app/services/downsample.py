@@ -0,0 +1,83 @@
+import math
+import re
+from typing import Any, List, Sequence
+import numpy as np
+
+# Prometheus 单个序列最多返回 11000 个点
+PROMETHEUS_MAX_RESOLUTION = 11000
+
+# 自动选择的 step 取这些“整”值，相邻请求的 step 不会因为窗口长度的微小变化而抖动
+NICE_STEPS = [
+    15, 30, 60, 120, 300, 600, 900, 1800, 3600, 7200, 10800, 21600, 43200, 86400,
+]
+
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800, "y": 31536000}
+_DURATION_PATTERN = re.compile(r"(\d+)(ms|s|m|h|d|w|y)")
+
+
+def parse_duration(duration: str) -> float:
+    """解析 Prometheus 格式的时长（如 5m、1h30m、30d），返回秒数"""
+    parts = _DURATION_PATTERN.findall(duration or "")
+    if not parts or "".join(value + unit for value, unit in parts) != duration:
+        raise ValueError(f"无效的时长: {duration}")
+    return sum(int(value) * _DURATION_UNITS[unit] for value, unit in parts)
+
+
+def choose_step(start: float, end: float, max_points: int, min_step: float = 15, oversample: int = 1) -> float:
+    """按点数预算选择 step
+
+    取不小于抓取周期、使 (end - start) / step 不超过 ``max_points * oversample``
+    （以及 Prometheus 的分辨率上限）的最小整 step。oversample 大于 1 时多取一些
+    原始点，交给 LTTB 降采样，比直接用大 step 更能保留尖峰。
+    """
+    budget = max(1, min(max_points * oversample, PROMETHEUS_MAX_RESOLUTION))
+    raw = max(min_step, (end - start) / budget)
+    for step in NICE_STEPS:
+        if step >= raw:
+            return float(step)
+    return float(math.ceil(raw / 86400) * 86400)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets 降采样，返回保留的点的下标
+
+    首尾两点固定保留，其余点均分为 threshold - 2 个桶，每个桶选出与上一个
+    选中点、下一个桶均值构成三角形面积最大的点。桶均值用前缀和一次算出，
+    桶内面积用向量运算，Python 循环只按桶数执行。
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    # 各桶的均值，最后一个“下一桶”是末尾的点
+    cum_x = np.concatenate(([0.0], np.cumsum(x)))
+    cum_y = np.concatenate(([0.0], np.cumsum(y)))
+    counts = edges[1:] - edges[:-1]
+    avg_x = np.append((cum_x[edges[1:]] - cum_x[edges[:-1]]) / counts, x[-1])
+    avg_y = np.append((cum_y[edges[1:]] - cum_y[edges[:-1]]) / counts, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_x, next_y = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[a] - next_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (next_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample(values: Sequence[List[Any]], max_points: int) -> List[List[Any]]:
+    """对 Prometheus 的 [timestamp, "value"] 序列做 LTTB 降采样，保留原始格式"""
+    if len(values) <= max_points:
+        return list(values)
+    x = np.fromiter((point[0] for point in values), dtype=np.float64, count=len(values))
+    y = np.fromiter((float(point[1]) for point in values), dtype=np.float64, count=len(values))
+    # NaN/Inf（如除零）不参与面积比较，但仍可能被选中
+    y = np.nan_to_num(y, nan=0.0, posinf=0.0, neginf=0.0)
+    return [values[i] for i in lttb_indices(x, y, max_points)]
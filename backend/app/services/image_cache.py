@@ -0,0 +1,103 @@
+import threading
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from docker.errors import NotFound
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# 会改变镜像标签的事件
+IMAGE_EVENTS = {"tag", "untag", "delete", "import", "load", "pull"}
+
+
+def _normalize_image_id(image_id: str) -> str:
+    if image_id and not image_id.startswith("sha256:"):
+        return f"sha256:{image_id}"
+    return image_id
+
+
+class ImageCache:
+    """按镜像 ID 缓存镜像标签，容量有限，按 LRU 淘汰
+
+    容器列表只需要镜像标签，而 docker SDK 的 ``container.image`` 每次都会
+    检查一次镜像。同一镜像的容器共享一条缓存，收到镜像 tag/untag/delete
+    事件时失效对应条目。
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, List[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_tags(self, client, image_id: str) -> List[str]:
+        """获取镜像标签，未命中时检查一次镜像并缓存结果"""
+        image_id = _normalize_image_id(image_id)
+        if not image_id:
+            return []
+        with self._lock:
+            tags = self._entries.get(image_id)
+            if tags is not None:
+                self._entries.move_to_end(image_id)
+                self.hits += 1
+                return tags
+            self.misses += 1
+
+        try:
+            tags = list(client.images.get(image_id).tags or [])
+        except NotFound:
+            tags = []
+
+        with self._lock:
+            self._entries[image_id] = tags
+            self._entries.move_to_end(image_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return tags
+
+    def get_image_name(self, client, image_id: str, default: str = "<none>") -> str:
+        tags = self.get_tags(client, image_id)
+        return tags[0] if tags else default
+
+    def invalidate(self, image_id: Optional[str] = None):
+        """失效单个镜像，不传 ID 时清空缓存"""
+        with self._lock:
+            if image_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(_normalize_image_id(image_id), None)
+
+    def handle_event(self, event: Dict[str, Any]):
+        """处理 Docker 镜像事件"""
+        if event.get("Type") != "image":
+            return
+        action = event.get("Action") or event.get("status") or ""
+        if action not in IMAGE_EVENTS:
+            return
+        image_id = (event.get("Actor") or {}).get("ID") or event.get("id")
+        if image_id and image_id.startswith("sha256:"):
+            self.invalidate(image_id)
+        else:
+            # 只有镜像名时无法定位条目，直接清空
+            self.invalidate()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# 进程内共享的镜像缓存
+image_cache = ImageCache(maxsize=settings.IMAGE_CACHE_SIZE)
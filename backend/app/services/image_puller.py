@@ -0,0 +1,171 @@
+import time
+import asyncio
+import threading
+import logging
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+from docker.errors import ImageNotFound
+from docker.utils import parse_repository_tag
+from app.core.config import settings
+from app.services.async_docker import DockerAPIError
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_reference(reference: str) -> str:
+    """补全默认的 latest 标签，使 nginx 和 nginx:latest 合并为同一次拉取"""
+    repository, tag = parse_repository_tag(reference)
+    if tag is None:
+        return f"{repository}:latest"
+    separator = "@" if tag.startswith("sha256:") else ":"
+    return f"{repository}{separator}{tag}"
+
+
+class PullJob:
+    """一次镜像拉取及其分层进度"""
+
+    def __init__(self, host: str, reference: str):
+        self.host = host
+        self.reference = reference
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.layers: Dict[str, Dict[str, Any]] = {}
+        self.waiters = 1
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Future = Future()
+
+    def update(self, event: Dict[str, Any]):
+        layer = event.get("id")
+        if not layer or layer == self.reference.rsplit(":", 1)[-1]:
+            return
+        detail = event.get("progressDetail") or {}
+        entry = self.layers.setdefault(layer, {"status": "", "current": 0, "total": 0})
+        entry["status"] = event.get("status", entry["status"])
+        if detail.get("total"):
+            entry["current"] = detail.get("current", 0)
+            entry["total"] = detail["total"]
+
+    def to_dict(self) -> Dict[str, Any]:
+        current = sum(layer["current"] for layer in self.layers.values())
+        total = sum(layer["total"] for layer in self.layers.values())
+        return {
+            "host": self.host,
+            "reference": self.reference,
+            "status": self.status,
+            "error": self.error,
+            "waiters": self.waiters,
+            "layers": len(self.layers),
+            "downloaded_bytes": current,
+            "total_bytes": total,
+            "progress": round(current / total * 100, 1) if total else None,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class ImagePullScheduler:
+    """镜像拉取调度器
+
+    同一守护进程上对同一镜像的并发拉取合并为一次，所有调用方等待同一个
+    Future；同时进行的拉取总数受 ``PULL_MAX_CONCURRENT`` 限制，其余排队。
+    """
+
+    def __init__(self, max_concurrent: Optional[int] = None, history_size: int = 50):
+        self.max_concurrent = max_concurrent or settings.PULL_MAX_CONCURRENT
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent, thread_name_prefix="image-pull")
+        self._jobs: Dict[Tuple[str, str], PullJob] = {}
+        self._history: deque = deque(maxlen=history_size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _host(client) -> str:
+        return getattr(client.api, "base_url", "")
+
+    def pull(self, client, reference: str) -> Future:
+        """提交拉取，已有相同拉取时直接复用它的 Future"""
+        reference = normalize_reference(reference)
+        key = (self._host(client), reference)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None:
+                job.waiters += 1
+                return job.future
+            job = PullJob(key[0], reference)
+            self._jobs[key] = job
+        self._executor.submit(self._run, client, job, key)
+        return job.future
+
+    def ensure_image(self, client, reference: str, timeout: Optional[float] = None):
+        """本地没有镜像时拉取并等待完成"""
+        try:
+            client.images.get(reference)
+            return
+        except ImageNotFound:
+            pass
+        self.pull(client, reference).result(timeout=timeout or settings.PULL_TIMEOUT)
+
+    async def ensure_image_async(self, client, aclient, reference: str, timeout: Optional[float] = None):
+        """异步版本: 用异步客户端检查本地镜像，缺失时等待合并后的拉取完成"""
+        try:
+            await aclient.inspect_image(reference)
+            return
+        except DockerAPIError as e:
+            if e.status != 404:
+                raise
+        # 拉取由多个调用方共享，单个调用方超时或被取消时不能取消拉取本身
+        await asyncio.wait_for(
+            asyncio.shield(asyncio.wrap_future(self.pull(client, reference))),
+            timeout or settings.PULL_TIMEOUT,
+        )
+
+    def prewarm(self, client, references: List[str]) -> List[Future]:
+        """后台预拉取镜像，不等待结果"""
+        futures = []
+        for reference in references:
+            try:
+                client.images.get(reference)
+            except ImageNotFound:
+                logger.info(f"Pre-warming image {reference}")
+                futures.append(self.pull(client, reference))
+            except Exception as e:
+                logger.warning(f"Cannot check image {reference} for pre-warm: {str(e)}")
+        return futures
+
+    def _run(self, client, job: PullJob, key: Tuple[str, str]):
+        job.status = "pulling"
+        job.started_at = time.time()
+        try:
+            repository, tag = parse_repository_tag(job.reference)
+            for event in client.api.pull(repository, tag=tag, stream=True, decode=True):
+                if "error" in event:
+                    raise RuntimeError(event["error"])
+                job.update(event)
+            job.status = "done"
+            if not job.future.done():
+                job.future.set_result(job.reference)
+            logger.info(f"Pulled image {job.reference} in {time.time() - job.started_at:.1f}s")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            if not job.future.done():
+                job.future.set_exception(e)
+            logger.error(f"Error pulling image {job.reference}: {str(e)}")
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._jobs.pop(key, None)
+                self._history.append(job)
+
+    def status(self) -> Dict[str, List[Dict[str, Any]]]:
+        with self._lock:
+            active = [job.to_dict() for job in self._jobs.values()]
+            recent = [job.to_dict() for job in reversed(self._history)]
+        return {"active": active, "recent": recent}
+
+
+# 进程内共享的拉取调度器
+image_puller = ImagePullScheduler()
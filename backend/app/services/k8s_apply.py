@@ -0,0 +1,229 @@
+import json
+import time
+import difflib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+import yaml
+from kubernetes.dynamic.exceptions import NotFoundError
+
+logger = logging.getLogger(__name__)
+
+FIELD_MANAGER = "container-platform"
+
+# 按依赖顺序分层: 命名空间和 CRD，配置和权限，工作负载，服务和入口；其他类型最后
+TIER_KINDS = [
+    {"Namespace", "CustomResourceDefinition", "PriorityClass", "StorageClass"},
+    {
+        "ServiceAccount", "Secret", "ConfigMap", "PersistentVolume", "PersistentVolumeClaim",
+        "ResourceQuota", "LimitRange", "Role", "ClusterRole", "RoleBinding", "ClusterRoleBinding",
+        "NetworkPolicy",
+    },
+    {
+        "Deployment", "StatefulSet", "DaemonSet", "ReplicaSet", "Job", "CronJob", "Pod",
+        "HorizontalPodAutoscaler", "PodDisruptionBudget",
+    },
+    {"Service", "Ingress", "IngressClass", "Endpoints", "EndpointSlice"},
+]
+
+# 集群级别（不属于任何命名空间）的常见类型；连接真实集群时以 API 发现结果为准
+CLUSTER_SCOPED_KINDS = {
+    "Namespace", "CustomResourceDefinition", "PriorityClass", "StorageClass", "PersistentVolume",
+    "ClusterRole", "ClusterRoleBinding", "IngressClass",
+}
+
+# 比较差异时忽略的由服务端维护的字段
+_SERVER_METADATA = ("managedFields", "resourceVersion", "generation", "uid", "creationTimestamp", "selfLink")
+
+
+def manifest_tier(kind: str) -> int:
+    for tier, kinds in enumerate(TIER_KINDS):
+        if kind in kinds:
+            return tier
+    return len(TIER_KINDS)
+
+
+def parse_manifests(text: str) -> List[Dict[str, Any]]:
+    """解析多文档 YAML 或 JSON（对象、数组或 kind: List），展开 List 并校验必需字段"""
+    try:
+        parsed = json.loads(text)
+        documents = parsed if isinstance(parsed, list) else [parsed]
+    except ValueError:
+        try:
+            documents = list(yaml.safe_load_all(text))
+        except yaml.YAMLError as e:
+            raise ValueError(f"无法解析清单: {str(e)}")
+
+    objects = []
+    for document in documents:
+        if document is None:
+            continue
+        if not isinstance(document, dict):
+            raise ValueError(f"清单中的第 {len(objects) + 1} 个对象不是映射")
+        if document.get("kind", "").endswith("List") and isinstance(document.get("items"), list):
+            objects.extend(document["items"])
+        else:
+            objects.append(document)
+
+    for index, obj in enumerate(objects):
+        if not obj.get("apiVersion") or not obj.get("kind") or not (obj.get("metadata") or {}).get("name"):
+            raise ValueError(f"第 {index + 1} 个对象缺少 apiVersion、kind 或 metadata.name")
+    return objects
+
+
+def _comparable(obj: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not obj:
+        return {}
+    obj = dict(obj)
+    obj.pop("status", None)
+    metadata = dict(obj.get("metadata") or {})
+    for field in _SERVER_METADATA:
+        metadata.pop(field, None)
+    annotations = {
+        key: value for key, value in (metadata.get("annotations") or {}).items()
+        if key != "deployment.kubernetes.io/revision"
+    }
+    if annotations:
+        metadata["annotations"] = annotations
+    else:
+        metadata.pop("annotations", None)
+    obj["metadata"] = metadata
+    return obj
+
+
+def manifest_diff(live: Optional[Dict[str, Any]], applied: Dict[str, Any], label: str) -> str:
+    """live 与 apply 结果之间的 unified diff，忽略服务端维护的元数据和 status"""
+    before = yaml.safe_dump(_comparable(live), sort_keys=True).splitlines() if live else []
+    after = yaml.safe_dump(_comparable(applied), sort_keys=True).splitlines()
+    return "\n".join(difflib.unified_diff(before, after, f"live/{label}", f"applied/{label}", lineterm=""))
+
+
+class ManifestApplier:
+    """按依赖层级并行执行 server-side apply
+
+    同一层内的对象并发 apply，层与层之间顺序执行；某一层有失败时后续层全部
+    跳过（dry-run 除外）。``dry_run`` 时使用 ``dryRun=All``，服务端完成校验和
+    默认值填充但不持久化，配合 ``diff`` 返回与当前对象的差异。
+    """
+
+    def __init__(self, dynamic_client, parallelism: int = 8, field_manager: str = FIELD_MANAGER):
+        self.client = dynamic_client
+        self.parallelism = max(1, parallelism)
+        self.field_manager = field_manager
+
+    def apply(
+        self,
+        objects: List[Dict[str, Any]],
+        namespace: str = "default",
+        dry_run: bool = False,
+        diff: bool = False,
+        force_conflicts: bool = True,
+    ) -> Dict[str, Any]:
+        started = time.monotonic()
+        tiers: Dict[int, List[Dict[str, Any]]] = {}
+        for obj in objects:
+            tiers.setdefault(manifest_tier(obj["kind"]), []).append(obj)
+        # 本清单中创建的命名空间，dry-run 时它们还不存在
+        bundle_namespaces = {obj["metadata"]["name"] for obj in objects if obj["kind"] == "Namespace"}
+
+        results: List[Dict[str, Any]] = []
+        failed = False
+        with ThreadPoolExecutor(max_workers=self.parallelism, thread_name_prefix="k8s-apply") as executor:
+            for tier in sorted(tiers):
+                if failed:
+                    results += [dict(self._describe(obj, namespace, tier), action="skipped") for obj in tiers[tier]]
+                    continue
+                futures = [
+                    executor.submit(
+                        self._apply_one, obj, tier, namespace, dry_run, diff, force_conflicts, bundle_namespaces
+                    )
+                    for obj in tiers[tier]
+                ]
+                tier_results = [future.result() for future in futures]
+                # dry-run 不改变集群，继续检查后续层以便一次报告所有问题
+                failed = not dry_run and any(result["error"] for result in tier_results)
+                results += tier_results
+        return self._summary(results, dry_run, started)
+
+    @staticmethod
+    def _summary(results: List[Dict[str, Any]], dry_run: bool, started: float) -> Dict[str, Any]:
+        return {
+            "dry_run": dry_run,
+            "results": results,
+            "succeeded": sum(1 for result in results if result["action"] not in ("failed", "skipped")),
+            "failed": sum(1 for result in results if result["action"] == "failed"),
+            "skipped": sum(1 for result in results if result["action"] == "skipped"),
+            "duration_ms": round((time.monotonic() - started) * 1000, 1),
+        }
+
+    @staticmethod
+    def _describe(obj: Dict[str, Any], namespace: str, tier: int) -> Dict[str, Any]:
+        return {
+            "tier": tier,
+            "apiVersion": obj["apiVersion"],
+            "kind": obj["kind"],
+            "namespace": obj["metadata"].get("namespace") or namespace,
+            "name": obj["metadata"]["name"],
+            "action": None,
+            "error": None,
+            "diff": None,
+            "duration_ms": None,
+        }
+
+    def _apply_one(
+        self,
+        obj: Dict[str, Any],
+        tier: int,
+        namespace: str,
+        dry_run: bool,
+        diff: bool,
+        force_conflicts: bool,
+        bundle_namespaces: set,
+    ) -> Dict[str, Any]:
+        result = self._describe(obj, namespace, tier)
+        started = time.monotonic()
+        try:
+            resource = self.client.resources.get(api_version=obj["apiVersion"], kind=obj["kind"])
+            target_namespace = result["namespace"] if resource.namespaced else None
+            if not resource.namespaced:
+                result["namespace"] = None
+            if dry_run and target_namespace in bundle_namespaces:
+                # 命名空间在 dry-run 中不会真正创建，其中的对象只能按新建处理
+                try:
+                    namespaces = self.client.resources.get(api_version="v1", kind="Namespace")
+                    self.client.get(namespaces, name=target_namespace)
+                except NotFoundError:
+                    result["action"] = "created"
+                    if diff:
+                        result["diff"] = manifest_diff(None, obj, f"{obj['kind']}/{result['name']}")
+                    return result
+
+            live = None
+            if diff:
+                try:
+                    live = self.client.get(resource, name=result["name"], namespace=target_namespace).to_dict()
+                except NotFoundError:
+                    live = None
+            applied = self.client.server_side_apply(
+                resource,
+                body=obj,
+                namespace=target_namespace,
+                field_manager=self.field_manager,
+                force_conflicts=force_conflicts,
+                dry_run="All" if dry_run else None,
+            ).to_dict()
+            if diff:
+                result["diff"] = manifest_diff(live, applied, f"{obj['kind']}/{result['name']}")
+                if live is None:
+                    result["action"] = "created"
+                else:
+                    result["action"] = "configured" if result["diff"] else "unchanged"
+            else:
+                result["action"] = "applied"
+        except Exception as e:
+            result["action"] = "failed"
+            result["error"] = e.summary() if hasattr(e, "summary") else str(e)
+            logger.warning(f"Failed to apply {obj['kind']}/{result['name']}: {result['error']}")
+        finally:
+            result["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+        return result
@@ -0,0 +1,256 @@
+import threading
+import time
+import logging
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from kubernetes import watch
+from kubernetes.client.rest import ApiException
+
+logger = logging.getLogger(__name__)
+
+HTTP_GONE = 410
+
+
+def parse_label_selector(selector: Optional[str]) -> Dict[str, str]:
+    """解析 ``app=web,tier=frontend`` 形式的等值标签选择器"""
+    labels = {}
+    for requirement in (selector or "").split(","):
+        requirement = requirement.strip()
+        if not requirement:
+            continue
+        key, sep, value = requirement.partition("=")
+        key = key.strip()
+        value = value.lstrip("=").strip()
+        if not sep or not key or key.endswith("!") or any(c in value for c in "!=()"):
+            raise ValueError(f"只支持 key=value 形式的标签选择器: {requirement}")
+        labels[key] = value
+    return labels
+
+
+def object_key(obj) -> str:
+    return f"{obj.metadata.namespace}/{obj.metadata.name}"
+
+
+class LabelIndex:
+    """按命名空间和标签索引的对象集合，等值选择器通过求交集匹配，不扫描全部对象"""
+
+    def __init__(self, objects=()):
+        self._objects: Dict[str, Any] = {}
+        self._labels: Dict[str, Dict[str, str]] = {}
+        self._by_namespace: Dict[str, Set[str]] = {}
+        self._by_label: Dict[Tuple[str, str], Set[str]] = {}
+        for obj in objects:
+            self.add(object_key(obj), obj)
+
+    def __len__(self) -> int:
+        return len(self._objects)
+
+    @property
+    def namespaces(self) -> int:
+        return len(self._by_namespace)
+
+    def get(self, key: str):
+        return self._objects.get(key)
+
+    def add(self, key: str, obj):
+        self.remove(key)
+        labels = dict(obj.metadata.labels or {})
+        self._objects[key] = obj
+        self._labels[key] = labels
+        self._by_namespace.setdefault(obj.metadata.namespace, set()).add(key)
+        for label in labels.items():
+            self._by_label.setdefault(label, set()).add(key)
+
+    def remove(self, key: str):
+        obj = self._objects.pop(key, None)
+        if obj is None:
+            return
+        namespace_keys = self._by_namespace.get(obj.metadata.namespace)
+        if namespace_keys is not None:
+            namespace_keys.discard(key)
+            if not namespace_keys:
+                del self._by_namespace[obj.metadata.namespace]
+        for label in self._labels.pop(key, {}).items():
+            label_keys = self._by_label.get(label)
+            if label_keys is not None:
+                label_keys.discard(key)
+                if not label_keys:
+                    del self._by_label[label]
+
+    def select(self, namespace: Optional[str] = None, labels: Optional[Dict[str, str]] = None) -> List[Any]:
+        """按命名空间和等值标签选择器读取，条件全部走索引求交集"""
+        candidates: List[Set[str]] = []
+        if namespace:
+            candidates.append(self._by_namespace.get(namespace, set()))
+        for label in (labels or {}).items():
+            candidates.append(self._by_label.get(label, set()))
+        if candidates:
+            candidates.sort(key=len)
+            keys = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            keys = self._objects.keys()
+        return [self._objects[key] for key in sorted(keys)]
+
+
+class Informer:
+    """Kubernetes 资源的本地缓存（informer）
+
+    先全量 list 一次，再从返回的 resourceVersion 开始 watch；watch 超时后
+    从最后的 resourceVersion（包括 BOOKMARK 事件带来的）继续，收到 410 Gone
+    时重新 list。缓存按命名空间和标签建立索引，读取不访问 API Server。
+
+    ``list_func`` 是跨命名空间的列表函数，例如
+    ``AppsV1Api().list_deployment_for_all_namespaces``，同时用于 list 和 watch，
+    因此可以指向任何兼容的 API Server（包括本地的模拟服务）。
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        list_func: Callable[..., Any],
+        retry_interval: float = 2.0,
+        watch_timeout: int = 300,
+    ):
+        self.kind = kind
+        self._list_func = list_func
+        self._retry_interval = retry_interval
+        self._watch_timeout = watch_timeout
+        self._index = LabelIndex()
+        self._resource_version: Optional[str] = None
+        self._lock = threading.RLock()
+        self._ready = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._watch: Optional[watch.Watch] = None
+        self._listeners: List[Callable[[str, Any], None]] = []
+        self._relists = 0
+        self._events = 0
+        self._last_sync: Optional[float] = None
+        self.started_at: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def resource_version(self) -> Optional[str]:
+        return self._resource_version
+
+    def add_listener(self, callback: Callable[[str, Any], None]):
+        """注册监听器，回调参数为 (事件类型, 对象)；重新 list 后回调 ("RELISTED", None)"""
+        self._listeners.append(callback)
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopped.clear()
+            self.started_at = time.monotonic()
+            self._thread = threading.Thread(
+                target=self._run, name=f"informer-{self.kind}", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._watch is not None:
+            self._watch.stop()
+
+    def wait_ready(self, timeout: Optional[float] = None) -> bool:
+        return self._ready.wait(timeout)
+
+    def relist(self):
+        """全量 list 并替换缓存"""
+        response = self._list_func()
+        with self._lock:
+            self._index = LabelIndex(response.items)
+            self._resource_version = response.metadata.resource_version
+            self._relists += 1
+            self._last_sync = time.time()
+        self._ready.set()
+        logger.info(
+            f"Informer {self.kind} listed {len(response.items)} objects "
+            f"(resourceVersion {self._resource_version})"
+        )
+        self._notify("RELISTED", None)
+
+    def apply(self, event_type: str, obj):
+        """把一个 watch 事件应用到缓存，写操作后也可直接调用以便立即可读"""
+        key = object_key(obj)
+        with self._lock:
+            if event_type == "DELETED":
+                self._index.remove(key)
+            else:
+                self._index.add(key, obj)
+            self._events += 1
+        self._notify(event_type, obj)
+
+    def get(self, namespace: str, name: str):
+        with self._lock:
+            return self._index.get(f"{namespace}/{name}")
+
+    def list(self, namespace: Optional[str] = None, labels: Optional[Dict[str, str]] = None) -> List[Any]:
+        """按命名空间和等值标签选择器读取，条件全部走索引求交集"""
+        with self._lock:
+            return self._index.select(namespace, labels)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "ready": self.ready,
+                "objects": len(self._index),
+                "namespaces": self._index.namespaces,
+                "resource_version": self._resource_version,
+                "relists": self._relists,
+                "events": self._events,
+                "last_sync": self._last_sync,
+            }
+
+    def _notify(self, event_type: str, obj):
+        for listener in self._listeners:
+            try:
+                listener(event_type, obj)
+            except Exception as e:
+                logger.warning(f"Informer {self.kind} listener failed: {str(e)}")
+
+    def _follow(self):
+        """从当前 resourceVersion 开始 watch，直到超时、出错或停止"""
+        self._watch = watch.Watch()
+        for event in self._watch.stream(
+            self._list_func,
+            resource_version=self._resource_version,
+            allow_watch_bookmarks=True,
+            timeout_seconds=self._watch_timeout,
+        ):
+            if self._stopped.is_set():
+                break
+            raw = event.get("raw_object") or {}
+            resource_version = (raw.get("metadata") or {}).get("resourceVersion")
+            if event["type"] != "BOOKMARK":
+                self.apply(event["type"], event["object"])
+            if resource_version:
+                self._resource_version = resource_version
+
+    def _run(self):
+        need_relist = True
+        while not self._stopped.is_set():
+            try:
+                if need_relist:
+                    self.relist()
+                    need_relist = False
+                self._follow()
+                continue
+            except ApiException as e:
+                if e.status == HTTP_GONE:
+                    # resourceVersion 已过期，立即重新 list
+                    logger.info(f"Informer {self.kind} watch expired, relisting")
+                    need_relist = True
+                    continue
+                logger.warning(f"Informer {self.kind} watch failed: {str(e)}")
+            except Exception as e:
+                if not self._stopped.is_set():
+                    logger.warning(f"Informer {self.kind} watch dropped: {str(e)}")
+            finally:
+                self._watch = None
+            need_relist = True
+            self._stopped.wait(self._retry_interval)
@@ -0,0 +1,253 @@
+import asyncio
+import queue
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+from .k8s_informer import Informer, object_key
+
+REVISION_ANNOTATION = "deployment.kubernetes.io/revision"
+
+
+def _revision(obj) -> int:
+    try:
+        return int((obj.metadata.annotations or {}).get(REVISION_ANNOTATION, 0))
+    except ValueError:
+        return 0
+
+
+def _replica_set_summary(rs) -> Dict:
+    return {
+        "name": rs.metadata.name,
+        "revision": _revision(rs),
+        "replicas": rs.spec.replicas or 0,
+        "ready_replicas": (rs.status.ready_replicas or 0) if rs.status else 0,
+        "available_replicas": (rs.status.available_replicas or 0) if rs.status else 0,
+    }
+
+
+def rollout_status(dep, replica_sets: Optional[List[Any]] = None) -> Dict:
+    """按 kubectl rollout status 的规则判断部署的滚动状态
+
+    返回 state 为 complete、progressing 或 failed（超过 progressDeadlineSeconds）。
+    传入 ``replica_sets`` 时附带各版本 ReplicaSet 的副本数，按 revision 从新到旧。
+    """
+    spec_replicas = dep.spec.replicas if dep.spec.replicas is not None else 1
+    status = dep.status
+    updated = status.updated_replicas or 0
+    total = status.replicas or 0
+    ready = status.ready_replicas or 0
+    available = status.available_replicas or 0
+    result = {
+        "name": dep.metadata.name,
+        "namespace": dep.metadata.namespace,
+        "replicas": spec_replicas,
+        "updated_replicas": updated,
+        "ready_replicas": ready,
+        "available_replicas": available,
+        "state": "progressing",
+        "message": None,
+    }
+    if replica_sets is not None:
+        result["replica_sets"] = sorted(
+            (_replica_set_summary(rs) for rs in replica_sets), key=lambda rs: rs["revision"], reverse=True
+        )
+        result["revision"] = result["replica_sets"][0]["revision"] if result["replica_sets"] else None
+    for condition in status.conditions or []:
+        if condition.type == "Progressing" and condition.reason == "ProgressDeadlineExceeded":
+            return dict(result, state="failed", message=condition.message)
+    if (status.observed_generation or 0) < (dep.metadata.generation or 0):
+        result["message"] = "等待控制器处理最新的 spec"
+    elif updated < spec_replicas:
+        result["message"] = f"{updated}/{spec_replicas} 个副本已更新"
+    elif total > updated:
+        result["message"] = f"{total - updated} 个旧副本等待终止"
+    elif available < updated:
+        result["message"] = f"{available}/{updated} 个更新后的副本可用"
+    elif replica_sets and not _replica_sets_settled(result["replica_sets"], spec_replicas):
+        # Deployment 与 ReplicaSet 来自两条 watch，等两者一致后再报告完成
+        result["message"] = "等待 ReplicaSet 状态同步"
+    else:
+        result["state"] = "complete"
+    return result
+
+
+def _replica_sets_settled(replica_sets: List[Dict], spec_replicas: int) -> bool:
+    newest, old = replica_sets[0], replica_sets[1:]
+    if newest["available_replicas"] < spec_replicas:
+        return False
+    return all(rs["replicas"] == 0 and rs["ready_replicas"] == 0 for rs in old)
+
+
+class _AsyncWaiter:
+    """把监听器线程中的通知转交给事件循环"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue()
+
+    def put(self, event_type: str):
+        try:
+            self._loop.call_soon_threadsafe(self.queue.put_nowait, event_type)
+        except RuntimeError:
+            # 事件循环已关闭，等待者随之失效
+            pass
+
+
+class RolloutTracker:
+    """基于 informer 的滚动状态跟踪
+
+    不为每个等待者单独 watch，而是在 Deployment 和 ReplicaSet 的 informer 上
+    注册监听器：事件到达时只唤醒等待同一个部署的调用方，由它们从缓存读取
+    最新对象重新计算状态。因此任意数量的等待者共享 informer 的那一条 watch。
+    ``follow_async`` 的等待者不占用线程，适合长轮询和 SSE。
+    """
+
+    def __init__(self, deployments: Informer, replica_sets: Optional[Informer] = None):
+        self._deployments = deployments
+        self._replica_sets = replica_sets
+        self._waiters: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        deployments.add_listener(self._on_deployment)
+        if replica_sets is not None:
+            replica_sets.add_listener(self._on_replica_set)
+
+    @property
+    def ready(self) -> bool:
+        return self._deployments.ready and (self._replica_sets is None or self._replica_sets.ready)
+
+    def waiters(self) -> int:
+        with self._lock:
+            return sum(len(waiters) for waiters in self._waiters.values())
+
+    def _signal(self, key: Optional[str], event_type: str):
+        with self._lock:
+            if key is None:
+                targets = [waiter for waiters in self._waiters.values() for waiter in waiters]
+            else:
+                targets = list(self._waiters.get(key, ()))
+        for waiter in targets:
+            waiter.put(event_type)
+
+    def _on_deployment(self, event_type: str, obj):
+        # 重新 list 后无法确定哪些部署变了，唤醒全部等待者
+        self._signal(None if obj is None else object_key(obj), event_type)
+
+    def _on_replica_set(self, event_type: str, obj):
+        if obj is None:
+            self._signal(None, event_type)
+            return
+        for owner in obj.metadata.owner_references or []:
+            if owner.kind == "Deployment" and owner.controller:
+                self._signal(f"{obj.metadata.namespace}/{owner.name}", "MODIFIED")
+
+    def replica_sets_of(self, dep) -> Optional[List[Any]]:
+        """部署所属的 ReplicaSet：按选择器标签走索引，再按 ownerReference 过滤"""
+        if self._replica_sets is None:
+            return None
+        labels = (dep.spec.selector.match_labels if dep.spec.selector else None) or {}
+        return [
+            rs for rs in self._replica_sets.list(dep.metadata.namespace, labels)
+            if any(owner.uid == dep.metadata.uid for owner in rs.metadata.owner_references or [])
+        ]
+
+    def status(self, namespace: str, name: str) -> Optional[Dict]:
+        dep = self._deployments.get(namespace, name)
+        if dep is None:
+            return None
+        return rollout_status(dep, self.replica_sets_of(dep))
+
+    def follow(
+        self,
+        namespace: str,
+        name: str,
+        timeout: float,
+        heartbeat: Optional[float] = None,
+    ) -> Iterator[Optional[Dict]]:
+        """返回当前状态和之后的每次变化，直到完成、失败、部署被删除或超时
+
+        设置 ``heartbeat`` 时，空闲超过该秒数产出一个 None，供 SSE 发送心跳。
+        """
+        key = f"{namespace}/{name}"
+        events: "queue.Queue[str]" = queue.Queue()
+        self._register(key, events)
+        try:
+            deadline = time.monotonic() + timeout
+            last = None
+            while True:
+                status = self.status(namespace, name)
+                if status is None:
+                    yield {"name": name, "namespace": namespace, "state": "failed", "message": "部署已被删除"}
+                    return
+                if status != last:
+                    last = status
+                    yield status
+                    if status["state"] != "progressing":
+                        return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield dict(status, state="timeout", message=f"超过 {timeout}s 未完成")
+                    return
+                try:
+                    events.get(timeout=min(remaining, heartbeat) if heartbeat else remaining)
+                except queue.Empty:
+                    if heartbeat and time.monotonic() < deadline:
+                        yield None
+                    continue
+                # 合并积压的事件，只按最新缓存计算一次
+                while not events.empty():
+                    events.get_nowait()
+        finally:
+            self._unregister(key, events)
+
+    async def follow_async(
+        self,
+        namespace: str,
+        name: str,
+        timeout: float,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncIterator[Optional[Dict]]:
+        """``follow`` 的协程版本，在事件循环中等待而不阻塞线程"""
+        key = f"{namespace}/{name}"
+        waiter = _AsyncWaiter(asyncio.get_running_loop())
+        self._register(key, waiter)
+        try:
+            deadline = time.monotonic() + timeout
+            last = None
+            while True:
+                status = self.status(namespace, name)
+                if status is None:
+                    yield {"name": name, "namespace": namespace, "state": "failed", "message": "部署已被删除"}
+                    return
+                if status != last:
+                    last = status
+                    yield status
+                    if status["state"] != "progressing":
+                        return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    yield dict(status, state="timeout", message=f"超过 {timeout}s 未完成")
+                    return
+                try:
+                    await asyncio.wait_for(
+                        waiter.queue.get(), min(remaining, heartbeat) if heartbeat else remaining
+                    )
+                except asyncio.TimeoutError:
+                    if heartbeat and time.monotonic() < deadline:
+                        yield None
+                    continue
+                while not waiter.queue.empty():
+                    waiter.queue.get_nowait()
+        finally:
+            self._unregister(key, waiter)
+
+    def _register(self, key: str, waiter):
+        with self._lock:
+            self._waiters.setdefault(key, []).append(waiter)
+
+    def _unregister(self, key: str, waiter):
+        with self._lock:
+            waiters = self._waiters.get(key, [])
+            if waiter in waiters:
+                waiters.remove(waiter)
+            if not waiters:
+                self._waiters.pop(key, None)
@@ -0,0 +1,835 @@
+import copy
+import hashlib
+import heapq
+import json
+import time
+import random
+import bisect
+import threading
+import logging
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from kubernetes import client
+from kubernetes.client.rest import ApiException
+from app.core.config import settings
+from app.services.k8s_informer import parse_label_selector
+
+logger = logging.getLogger(__name__)
+
+# 各资源的列表类型和对象类型
+KINDS = {
+    "deployments": (client.V1DeploymentList, "V1Deployment"),
+    "replicasets": (client.V1ReplicaSetList, "V1ReplicaSet"),
+    "pods": (client.V1PodList, "V1Pod"),
+    "services": (client.V1ServiceList, "V1Service"),
+}
+API_VERSIONS = {"deployments": "apps/v1", "replicasets": "apps/v1", "pods": "v1", "services": "v1"}
+
+_POD_SUFFIX_CHARS = "bcdfghjklmnpqrstvwxz2456789"
+
+REVISION_ANNOTATION = "deployment.kubernetes.io/revision"
+
+HTTP_GONE = 410
+
+
+def _parse_field_selector(selector: Optional[str]) -> Dict[str, str]:
+    fields = {}
+    for requirement in (selector or "").split(","):
+        key, sep, value = requirement.strip().partition("=")
+        if sep:
+            fields[key.strip()] = value.lstrip("=").strip()
+    return fields
+
+
+class _WatchResponse:
+    """模拟 watch 的 HTTP 响应，提供 ``kubernetes.watch.Watch`` 需要的接口
+
+    ``stream()`` 逐行产出 JSON 事件，从请求的 resourceVersion 之后开始，没有
+    新事件时等待，直到 ``timeout_seconds`` 到期或被关闭。
+    """
+
+    def __init__(self, cluster: "FakeCluster", kind: str, filters: Dict[str, Any],
+                 resource_version: Optional[str], timeout: Optional[float], bookmarks: bool):
+        self._cluster = cluster
+        self._kind = kind
+        self._filters = filters
+        self._resource_version = int(resource_version) if resource_version else None
+        self._deadline = time.monotonic() + timeout if timeout else None
+        self._bookmarks = bookmarks
+        self._closed = False
+
+    def stream(self, amt=None, decode_content=False) -> Iterator[bytes]:
+        cluster = self._cluster
+        cursor = self._resource_version if self._resource_version is not None else cluster.current_version()
+        last_sent = time.monotonic()
+        while not self._closed:
+            with cluster._changed:
+                if cursor >= cluster.oldest_version() and not cluster.events_after(cursor):
+                    remaining = None if self._deadline is None else self._deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return
+                    wait = cluster.bookmark_interval if self._bookmarks else 1.0
+                    cluster._changed.wait(wait if remaining is None else min(wait, remaining))
+                # 等待期间历史可能已被裁剪，游标之后的事件不再完整
+                expired = cursor < cluster.oldest_version()
+                events = [] if expired else cluster.events_after(cursor)
+            if expired:
+                yield cluster.status_line(HTTP_GONE, "Expired", f"too old resource version: {cursor}")
+                return
+            for event in events:
+                cursor = event.resource_version
+                if event.kind == self._kind and cluster.matches(event.obj, self._filters):
+                    last_sent = time.monotonic()
+                    yield event.line()
+            if self._bookmarks and not events and time.monotonic() - last_sent >= cluster.bookmark_interval:
+                last_sent = time.monotonic()
+                yield cluster.bookmark_line(self._kind, cursor)
+
+    def close(self):
+        self._closed = True
+
+    def release_conn(self):
+        pass
+
+
+class _Event:
+    __slots__ = ("resource_version", "kind", "type", "obj", "_line", "_cluster")
+
+    def __init__(self, cluster, resource_version: int, kind: str, event_type: str, obj):
+        self._cluster = cluster
+        self.resource_version = resource_version
+        self.kind = kind
+        self.type = event_type
+        self.obj = obj
+        self._line = None
+
+    def line(self) -> bytes:
+        # 序列化一次，所有 watch 共用
+        if self._line is None:
+            payload = {"type": self.type, "object": self._cluster.serialize(self.obj)}
+            self._line = (json.dumps(payload) + "\n").encode()
+        return self._line
+
+
+class FakeCluster:
+    """有状态的内存 Kubernetes 集群
+
+    维护 Deployment 和 Service 对象、单调递增的 resourceVersion 和事件历史，
+    通过 ``apps``/``core`` 暴露与 ``AppsV1Api``/``CoreV1Api`` 同名的方法，因此
+    KubernetesService 的 list、分页、watch、informer 和扩缩容代码无需修改即可
+    运行在它之上。
+
+    - ``latency_ms``: 每次 API 调用注入的延迟（±50% 抖动）
+    - ``error_rate``: 每次 API 调用以该概率返回 500
+    - ``rollout_seconds``: 创建或扩缩容后副本就绪所需的时间，期间像 Deployment
+      控制器一样维护各模板版本的 ReplicaSet 及其 Pod
+    - ``seed``: 随机数种子，同一种子生成相同的对象和故障序列
+    """
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        latency_ms: float = 0.0,
+        error_rate: float = 0.0,
+        rollout_seconds: float = 2.0,
+        history_size: int = 100000,
+        bookmark_interval: float = 30.0,
+    ):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.rollout_seconds = rollout_seconds
+        self.bookmark_interval = bookmark_interval
+        self._rng = random.Random(seed)
+        self._seed = seed
+        self._history_size = history_size
+        self._changed = threading.Condition(threading.RLock())
+        self._objects: Dict[str, Dict[Tuple[str, str], Any]] = {kind: {} for kind in KINDS}
+        self._sorted_keys: Dict[str, Optional[List[Tuple[str, str]]]] = {kind: None for kind in KINDS}
+        self._history: List[_Event] = []
+        self._history_versions: List[int] = []
+        self._resource_version = 0
+        self._dropped_version = 0
+        # Deployment -> 按 revision 排序的 ReplicaSet 名称，最后一个是当前版本
+        self._replica_sets: Dict[Tuple[str, str], List[str]] = {}
+        # ReplicaSet -> 所属 Pod 名称，前 ready_replicas 个为就绪状态
+        self._pods: Dict[Tuple[str, str], List[str]] = {}
+        # 模拟集群不建模的类型按 (apiVersion, kind, namespace, name) 保存最近一次 apply 的清单
+        self._manifests: Dict[Tuple[str, str, Optional[str], str], Dict[str, Any]] = {}
+        self._pending: List[Tuple[float, int, str, str, int]] = []
+        self._pending_seq = 0
+        self._controller: Optional[threading.Thread] = None
+        self._api_client = client.ApiClient()
+        # 模型对象默认每次复制一份全局配置，共享一份可以大幅降低构造开销
+        self._model_config = client.Configuration()
+        self._model_config.client_side_validation = False
+        self.calls: Dict[str, int] = {}
+        self.injected_errors = 0
+        self.apps = FakeAppsV1Api(self)
+        self.core = FakeCoreV1Api(self)
+
+    @classmethod
+    def from_settings(cls) -> "FakeCluster":
+        cluster = cls(
+            seed=settings.KUBERNETES_SIMULATOR_SEED,
+            latency_ms=settings.KUBERNETES_SIMULATOR_LATENCY_MS,
+            error_rate=settings.KUBERNETES_SIMULATOR_ERROR_RATE,
+            rollout_seconds=settings.KUBERNETES_SIMULATOR_ROLLOUT_SECONDS,
+        )
+        cluster.seed(
+            deployments=settings.KUBERNETES_SIMULATOR_DEPLOYMENTS,
+            services=settings.KUBERNETES_SIMULATOR_SERVICES,
+            namespaces=settings.KUBERNETES_SIMULATOR_NAMESPACES,
+        )
+        return cluster
+
+    # ---- 版本与事件 ----
+
+    def current_version(self) -> int:
+        return self._resource_version
+
+    def oldest_version(self) -> int:
+        """仍可 watch 的最早版本，更早的版本返回 410 Gone"""
+        return self._dropped_version
+
+    def events_after(self, resource_version: int) -> List[_Event]:
+        index = bisect.bisect_right(self._history_versions, resource_version)
+        return self._history[index:]
+
+    def _record(self, kind: str, event_type: str, obj):
+        event = _Event(self, self._resource_version, kind, event_type, obj)
+        self._history.append(event)
+        self._history_versions.append(event.resource_version)
+        if len(self._history) > self._history_size * 2:
+            # 批量裁剪，均摊开销
+            cut = len(self._history) - self._history_size
+            self._dropped_version = self._history_versions[cut - 1]
+            del self._history[:cut]
+            del self._history_versions[:cut]
+        self._changed.notify_all()
+
+    def _next_version(self) -> str:
+        self._resource_version += 1
+        return str(self._resource_version)
+
+    def serialize(self, obj) -> Dict[str, Any]:
+        return self._api_client.sanitize_for_serialization(obj)
+
+    def status_line(self, code: int, reason: str, message: str) -> bytes:
+        status = {"kind": "Status", "apiVersion": "v1", "status": "Failure",
+                  "code": code, "reason": reason, "message": message}
+        return (json.dumps({"type": "ERROR", "object": status}) + "\n").encode()
+
+    def bookmark_line(self, kind: str, resource_version: int) -> bytes:
+        item_type = KINDS[kind][1]
+        bookmark = {"kind": item_type[3:], "apiVersion": API_VERSIONS[kind],
+                    "metadata": {"resourceVersion": str(resource_version)}}
+        return (json.dumps({"type": "BOOKMARK", "object": bookmark}) + "\n").encode()
+
+    # ---- 故障注入 ----
+
+    def _call(self, operation: str):
+        self.calls[operation] = self.calls.get(operation, 0) + 1
+        if self.latency_ms:
+            time.sleep(self.latency_ms * self._rng.uniform(0.5, 1.5) / 1000)
+        if self.error_rate and self._rng.random() < self.error_rate:
+            self.injected_errors += 1
+            raise ApiException(status=500, reason="Injected failure")
+
+    def configure(self, latency_ms: Optional[float] = None, error_rate: Optional[float] = None,
+                  rollout_seconds: Optional[float] = None):
+        if latency_ms is not None:
+            self.latency_ms = latency_ms
+        if error_rate is not None:
+            self.error_rate = error_rate
+        if rollout_seconds is not None:
+            self.rollout_seconds = rollout_seconds
+
+    def stats(self) -> Dict[str, Any]:
+        with self._changed:
+            return {
+                "seed": self._seed,
+                "resource_version": self._resource_version,
+                "objects": {kind: len(objects) for kind, objects in self._objects.items()},
+                "history": len(self._history),
+                "pending_rollouts": len(self._pending),
+                "latency_ms": self.latency_ms,
+                "error_rate": self.error_rate,
+                "rollout_seconds": self.rollout_seconds,
+                "calls": dict(self.calls),
+                "injected_errors": self.injected_errors,
+            }
+
+    # ---- 对象构造 ----
+
+    def _model(self, cls, **kwargs):
+        return cls(local_vars_configuration=self._model_config, **kwargs)
+
+    def _deserialize(self, data: Dict[str, Any], type_name: str):
+        return self._api_client.deserialize(SimpleNamespace(data=json.dumps(data)), type_name)
+
+    def new_deployment(self, name: str, namespace: str, image: str = "nginx:latest",
+                       replicas: int = 1, labels: Optional[Dict[str, str]] = None):
+        labels = labels or {"app": name}
+        m = self._model
+        return m(
+            client.V1Deployment,
+            api_version="apps/v1",
+            kind="Deployment",
+            metadata=m(client.V1ObjectMeta, name=name, namespace=namespace, labels=labels),
+            spec=m(
+                client.V1DeploymentSpec,
+                replicas=replicas,
+                selector=m(client.V1LabelSelector, match_labels=labels),
+                template=m(
+                    client.V1PodTemplateSpec,
+                    metadata=m(client.V1ObjectMeta, labels=labels),
+                    spec=m(client.V1PodSpec, containers=[m(client.V1Container, name=name, image=image)]),
+                ),
+            ),
+        )
+
+    def new_service(self, name: str, namespace: str, selector: Optional[Dict[str, str]] = None,
+                    port: int = 80, service_type: str = "ClusterIP"):
+        m = self._model
+        return m(
+            client.V1Service,
+            api_version="v1",
+            kind="Service",
+            metadata=m(client.V1ObjectMeta, name=name, namespace=namespace, labels=selector or {"app": name}),
+            spec=m(
+                client.V1ServiceSpec,
+                type=service_type,
+                selector=selector or {"app": name},
+                ports=[m(client.V1ServicePort, port=port, target_port=port, protocol="TCP")],
+            ),
+        )
+
+    def seed(self, deployments: int = 0, services: int = 0, namespaces: int = 1):
+        """生成示例对象和 ``deployments``/``services`` 个随机对象，分布在多个命名空间"""
+        namespace_names = ["default"] + [f"ns-{i:03d}" for i in range(1, max(1, namespaces))]
+        self.create("deployments", "default", self.new_deployment("sample-deployment", "default", replicas=3),
+                    exists_ok=True)
+        self.create("services", "default", self.new_service("sample-service", "default",
+                                                            selector={"app": "sample-deployment"}),
+                    exists_ok=True)
+        images = ["nginx:1.25", "redis:7", "busybox:1.36", "python:3.11-slim", "postgres:15"]
+        tiers = ["frontend", "backend", "cache", "db"]
+        for i in range(deployments):
+            namespace = namespace_names[i % len(namespace_names)]
+            labels = {"app": f"app-{i:05d}", "tier": self._rng.choice(tiers)}
+            dep = self.new_deployment(f"app-{i:05d}", namespace, image=self._rng.choice(images),
+                                      replicas=self._rng.randint(1, 5), labels=labels)
+            self.create("deployments", namespace, dep, exists_ok=True, ready=True)
+        for i in range(services):
+            namespace = namespace_names[i % len(namespace_names)]
+            svc = self.new_service(f"app-{i:05d}", namespace, selector={"app": f"app-{i:05d}"},
+                                   port=self._rng.choice([80, 443, 6379, 8080, 5432]))
+            self.create("services", namespace, svc, exists_ok=True)
+        logger.info(f"Simulator seeded: {self.stats()['objects']}")
+
+    # ---- 读写操作 ----
+
+    def _initialize(self, kind: str, namespace: str, obj, ready: bool):
+        m = self._model
+        obj = copy.copy(obj)
+        obj.metadata = copy.copy(obj.metadata)
+        obj.metadata.namespace = namespace
+        obj.metadata.uid = "%032x" % self._rng.getrandbits(128)
+        obj.metadata.creation_timestamp = datetime.now(timezone.utc)
+        obj.metadata.generation = 1
+        obj.metadata.resource_version = self._next_version()
+        if kind == "deployments":
+            obj.api_version, obj.kind = "apps/v1", "Deployment"
+            replicas = obj.spec.replicas if obj.spec.replicas is not None else 1
+            obj.status = m(
+                client.V1DeploymentStatus,
+                observed_generation=1 if ready else 0,
+                replicas=replicas if ready else 0,
+                updated_replicas=replicas if ready else 0,
+                ready_replicas=replicas if ready else 0,
+                available_replicas=replicas if ready else 0,
+            )
+        else:
+            obj.api_version, obj.kind = "v1", "Service"
+            obj.spec = copy.copy(obj.spec)
+            if not obj.spec.cluster_ip:
+                obj.spec.cluster_ip = f"10.96.{self._rng.randint(0, 255)}.{self._rng.randint(1, 254)}"
+            if not obj.spec.type:
+                obj.spec.type = "ClusterIP"
+            obj.status = m(client.V1ServiceStatus, load_balancer=m(client.V1LoadBalancerStatus))
+        return obj
+
+    def create(self, kind: str, namespace: str, body, exists_ok: bool = False, ready: bool = False):
+        if isinstance(body, dict):
+            body = self._deserialize(body, KINDS[kind][1])
+        key = (namespace, body.metadata.name)
+        with self._changed:
+            if key in self._objects[kind]:
+                if exists_ok:
+                    return self._objects[kind][key]
+                raise ApiException(status=409, reason="AlreadyExists")
+            obj = self._initialize(kind, namespace, body, ready)
+            self._objects[kind][key] = obj
+            self._sorted_keys[kind] = None
+            self._record(kind, "ADDED", obj)
+            if kind == "deployments":
+                self._sync_replica_sets(obj, "ready" if ready else "spec")
+                if not ready:
+                    self._schedule_rollout(namespace, obj.metadata.name, obj.metadata.generation)
+            return obj
+
+    def replace(self, kind: str, namespace: str, body):
+        """用新的 spec/labels 替换已有对象（模拟 apply），不存在时创建"""
+        if isinstance(body, dict):
+            body = self._deserialize(body, KINDS[kind][1])
+        key = (namespace, body.metadata.name)
+        with self._changed:
+            current = self._objects[kind].get(key)
+            if current is None:
+                return self.create(kind, namespace, body)
+            obj = self._merged(kind, current, body)
+            obj.metadata.resource_version = self._next_version()
+            self._objects[kind][key] = obj
+            self._record(kind, "MODIFIED", obj)
+            if kind == "deployments":
+                self._sync_replica_sets(obj, "spec")
+                self._schedule_rollout(namespace, obj.metadata.name, obj.metadata.generation)
+            return obj
+
+    @staticmethod
+    def _merged(kind: str, current, body):
+        """已有对象换上新的 spec/labels 后的结果，不写入集群"""
+        obj = copy.copy(current)
+        obj.metadata = copy.copy(current.metadata)
+        obj.metadata.labels = body.metadata.labels or current.metadata.labels
+        obj.spec = body.spec
+        if kind == "services":
+            # 与服务端一样保留已分配的 clusterIP 和默认的 type
+            obj.spec = copy.copy(body.spec)
+            obj.spec.cluster_ip = obj.spec.cluster_ip or current.spec.cluster_ip
+            obj.spec.type = obj.spec.type or current.spec.type
+        obj.metadata.generation = (current.metadata.generation or 1) + 1
+        return obj
+
+    def read(self, kind: str, namespace: str, name: str):
+        obj = self._objects[kind].get((namespace, name))
+        if obj is None:
+            raise ApiException(status=404, reason="NotFound")
+        return obj
+
+    def delete(self, kind: str, namespace: str, name: str):
+        with self._changed:
+            obj = self._objects[kind].pop((namespace, name), None)
+            if obj is None:
+                raise ApiException(status=404, reason="NotFound")
+            self._sorted_keys[kind] = None
+            obj = copy.copy(obj)
+            obj.metadata = copy.copy(obj.metadata)
+            obj.metadata.resource_version = self._next_version()
+            self._record(kind, "DELETED", obj)
+            if kind == "deployments":
+                # 级联删除所属的 ReplicaSet
+                for rs_name in self._replica_sets.pop((namespace, name), []):
+                    rs = self._objects["replicasets"][(namespace, rs_name)]
+                    self._sync_pods(rs, 0, 0)
+                    self._put_replica_set(rs, "DELETED")
+            return self._model(client.V1Status, status="Success")
+
+    def scale(self, namespace: str, name: str, replicas: int):
+        with self._changed:
+            current = self.read("deployments", namespace, name)
+            obj = copy.copy(current)
+            obj.metadata = copy.copy(current.metadata)
+            obj.spec = copy.copy(current.spec)
+            obj.spec.replicas = replicas
+            obj.metadata.generation = (current.metadata.generation or 1) + 1
+            obj.metadata.resource_version = self._next_version()
+            self._objects["deployments"][(namespace, name)] = obj
+            self._record("deployments", "MODIFIED", obj)
+            self._sync_replica_sets(obj, "spec")
+            self._schedule_rollout(namespace, name, obj.metadata.generation)
+            m = self._model
+            return m(
+                client.V1Scale,
+                api_version="autoscaling/v1",
+                kind="Scale",
+                metadata=m(client.V1ObjectMeta, name=name, namespace=namespace,
+                           resource_version=obj.metadata.resource_version),
+                spec=m(client.V1ScaleSpec, replicas=replicas),
+                status=m(client.V1ScaleStatus, replicas=obj.status.replicas or 0),
+            )
+
+    def matches(self, obj, filters: Dict[str, Any]) -> bool:
+        if filters.get("namespace") and obj.metadata.namespace != filters["namespace"]:
+            return False
+        for field, value in filters.get("fields", {}).items():
+            if field == "metadata.name" and obj.metadata.name != value:
+                return False
+            if field == "metadata.namespace" and obj.metadata.namespace != value:
+                return False
+        labels = obj.metadata.labels or {}
+        return all(labels.get(key) == value for key, value in filters.get("labels", {}).items())
+
+    def list(self, kind: str, namespace: Optional[str] = None, watch: bool = False,
+             label_selector: Optional[str] = None, field_selector: Optional[str] = None,
+             limit: Optional[int] = None, _continue: Optional[str] = None,
+             resource_version: Optional[str] = None, timeout_seconds: Optional[int] = None,
+             allow_watch_bookmarks: Optional[bool] = None, **kwargs):
+        filters = {
+            "namespace": namespace,
+            "labels": parse_label_selector(label_selector),
+            "fields": _parse_field_selector(field_selector),
+        }
+        if watch:
+            self._call(f"watch_{kind}")
+            return _WatchResponse(self, kind, filters, resource_version, timeout_seconds, bool(allow_watch_bookmarks))
+
+        self._call(f"list_{kind}")
+        with self._changed:
+            keys = self._sorted_keys[kind]
+            if keys is None:
+                keys = self._sorted_keys[kind] = sorted(self._objects[kind])
+            start = 0
+            if _continue:
+                start = bisect.bisect_right(keys, tuple(_continue.split("/", 1)))
+            elif namespace:
+                start = bisect.bisect_left(keys, (namespace, ""))
+            items, token = [], None
+            last_key: Optional[Tuple[str, str]] = None
+            objects = self._objects[kind]
+            for index in range(start, len(keys)):
+                if namespace and keys[index][0] != namespace:
+                    break
+                obj = objects[keys[index]]
+                if not self.matches(obj, filters):
+                    continue
+                if limit and len(items) >= limit:
+                    # continue 令牌是本页最后一个对象的键，下一页从它之后开始
+                    token = "/".join(last_key)
+                    break
+                items.append(obj)
+                last_key = keys[index]
+            list_cls = KINDS[kind][0]
+            return list_cls(
+                items=items,
+                metadata=client.V1ListMeta(resource_version=str(self._resource_version), _continue=token),
+                local_vars_configuration=self._model_config,
+            )
+
+    # ---- 滚动更新模拟 ----
+
+    def _schedule_rollout(self, namespace: str, name: str, generation: int):
+        """副本在 rollout_seconds 内分两步就绪: 先更新副本数，再变为可用"""
+        now = time.monotonic()
+        self._pending_seq += 1
+        heapq.heappush(self._pending, (now + self.rollout_seconds / 2, self._pending_seq, namespace, name, generation))
+        self._pending_seq += 1
+        heapq.heappush(self._pending, (now + self.rollout_seconds, self._pending_seq, namespace, name, -generation))
+        if self._controller is None or not self._controller.is_alive():
+            self._controller = threading.Thread(target=self._run_controller, name="k8s-simulator", daemon=True)
+            self._controller.start()
+        self._changed.notify_all()
+
+    def _advance(self, namespace: str, name: str, step: int):
+        current = self._objects["deployments"].get((namespace, name))
+        generation = abs(step)
+        if current is None or current.metadata.generation != generation:
+            # 已被删除或有更新的变更，由后续的步骤处理
+            return
+        replicas = current.spec.replicas if current.spec.replicas is not None else 1
+        old_replicas = self._sync_replica_sets(current, "ready" if step < 0 else "updated")
+        obj = copy.copy(current)
+        obj.metadata = copy.copy(current.metadata)
+        obj.status = copy.copy(current.status)
+        obj.status.observed_generation = generation
+        obj.status.replicas = replicas + old_replicas
+        obj.status.updated_replicas = replicas
+        if step < 0:
+            obj.status.ready_replicas = replicas
+            obj.status.available_replicas = replicas
+        else:
+            obj.status.ready_replicas = min(obj.status.ready_replicas or 0, replicas)
+            obj.status.available_replicas = min(obj.status.available_replicas or 0, replicas)
+        obj.metadata.resource_version = self._next_version()
+        self._objects["deployments"][(namespace, name)] = obj
+        self._record("deployments", "MODIFIED", obj)
+
+    def _template_hash(self, dep) -> str:
+        template = json.dumps(self.serialize(dep.spec.template), sort_keys=True)
+        return hashlib.sha1(template.encode()).hexdigest()[:10]
+
+    def _put_owned(self, kind: str, obj, event_type: str):
+        """写入由控制器维护的对象（ReplicaSet、Pod）并记录事件"""
+        key = (obj.metadata.namespace, obj.metadata.name)
+        obj.metadata.resource_version = self._next_version()
+        if event_type == "DELETED":
+            self._objects[kind].pop(key, None)
+        else:
+            self._objects[kind][key] = obj
+        if event_type != "MODIFIED":
+            self._sorted_keys[kind] = None
+        self._record(kind, event_type, obj)
+
+    def _put_replica_set(self, rs, event_type: str):
+        self._put_owned("replicasets", rs, event_type)
+
+    def _new_pod(self, rs, ready: bool):
+        m = self._model
+        suffix = "".join(self._rng.choices(_POD_SUFFIX_CHARS, k=5))
+        return m(
+            client.V1Pod,
+            api_version="v1",
+            kind="Pod",
+            metadata=m(
+                client.V1ObjectMeta,
+                name=f"{rs.metadata.name}-{suffix}",
+                namespace=rs.metadata.namespace,
+                labels=rs.spec.template.metadata.labels,
+                uid="%032x" % self._rng.getrandbits(128),
+                creation_timestamp=datetime.now(timezone.utc),
+                owner_references=[m(client.V1OwnerReference, api_version="apps/v1", kind="ReplicaSet",
+                                    name=rs.metadata.name, uid=rs.metadata.uid, controller=True)],
+            ),
+            spec=m(client.V1PodSpec, containers=rs.spec.template.spec.containers,
+                   node_name=f"sim-node-{self._rng.randint(1, 10)}"),
+            status=self._pod_status(ready, f"10.244.{self._rng.randint(0, 255)}.{self._rng.randint(1, 254)}"),
+        )
+
+    def _pod_status(self, ready: bool, pod_ip: str):
+        m = self._model
+        return m(
+            client.V1PodStatus,
+            phase="Running",
+            pod_ip=pod_ip,
+            conditions=[m(client.V1PodCondition, type="Ready", status="True" if ready else "False")],
+        )
+
+    def _sync_pods(self, rs, running: int, ready: int):
+        """使 ReplicaSet 的 Pod 数量等于 running，其中前 ready 个就绪"""
+        key = (rs.metadata.namespace, rs.metadata.name)
+        pods = self._pods.setdefault(key, [])
+        while len(pods) > running:
+            self._put_owned("pods", self._objects["pods"][(key[0], pods.pop())], "DELETED")
+        while len(pods) < running:
+            pod = self._new_pod(rs, len(pods) < ready)
+            pods.append(pod.metadata.name)
+            self._put_owned("pods", pod, "ADDED")
+        for index, pod_name in enumerate(pods):
+            pod = self._objects["pods"][(key[0], pod_name)]
+            is_ready = pod.status.conditions[0].status == "True"
+            if is_ready != (index < ready):
+                updated = copy.copy(pod)
+                updated.metadata = copy.copy(pod.metadata)
+                updated.status = self._pod_status(index < ready, pod.status.pod_ip)
+                self._put_owned("pods", updated, "MODIFIED")
+        if not pods:
+            self._pods.pop(key, None)
+
+    def _new_replica_set(self, dep, name: str, pod_hash: str, revision: int):
+        m = self._model
+        labels = dict(dep.spec.template.metadata.labels or {}, **{"pod-template-hash": pod_hash})
+        template = copy.copy(dep.spec.template)
+        template.metadata = m(client.V1ObjectMeta, labels=labels)
+        return m(
+            client.V1ReplicaSet,
+            api_version="apps/v1",
+            kind="ReplicaSet",
+            metadata=m(
+                client.V1ObjectMeta,
+                name=name,
+                namespace=dep.metadata.namespace,
+                labels=labels,
+                uid="%032x" % self._rng.getrandbits(128),
+                creation_timestamp=datetime.now(timezone.utc),
+                generation=1,
+                annotations={REVISION_ANNOTATION: str(revision)},
+                owner_references=[m(client.V1OwnerReference, api_version="apps/v1", kind="Deployment",
+                                    name=dep.metadata.name, uid=dep.metadata.uid, controller=True)],
+            ),
+            spec=m(client.V1ReplicaSetSpec, replicas=0, selector=m(client.V1LabelSelector, match_labels=labels),
+                   template=template),
+            status=m(client.V1ReplicaSetStatus, replicas=0, ready_replicas=0, available_replicas=0,
+                     observed_generation=1),
+        )
+
+    def _sync_replica_sets(self, dep, phase: str) -> int:
+        """按 Deployment 当前模板维护 ReplicaSet，返回旧版本仍在运行的副本数
+
+        phase 为 spec（spec 刚变更）、updated（新版本副本已创建，旧版本缩容中）
+        或 ready（新版本全部就绪，旧版本缩到 0）。
+        """
+        namespace, name = dep.metadata.namespace, dep.metadata.name
+        replicas = dep.spec.replicas if dep.spec.replicas is not None else 1
+        pod_hash = self._template_hash(dep)
+        current_name = f"{name}-{pod_hash}"
+        owned = self._replica_sets.setdefault((namespace, name), [])
+        revision = None
+        if not owned or owned[-1] != current_name:
+            latest = self._objects["replicasets"][(namespace, owned[-1])] if owned else None
+            next_revision = int((latest.metadata.annotations or {}).get(REVISION_ANNOTATION, 0)) + 1 if latest else 1
+            if current_name in owned:
+                # 回滚到旧模板时复用原 ReplicaSet 并分配新的 revision
+                owned.remove(current_name)
+                revision = next_revision
+            else:
+                self._put_replica_set(self._new_replica_set(dep, current_name, pod_hash, next_revision), "ADDED")
+            owned.append(current_name)
+
+        old_running = 0
+        for rs_name in owned:
+            rs = self._objects["replicasets"][(namespace, rs_name)]
+            status = rs.status
+            spec_replicas = rs.spec.replicas
+            running, ready = status.replicas or 0, status.ready_replicas or 0
+            if rs_name == current_name:
+                spec_replicas = replicas
+                if phase != "spec":
+                    running = replicas
+                ready = replicas if phase == "ready" else min(ready, replicas)
+            elif phase == "updated":
+                spec_replicas, running = 0, ready
+            elif phase == "ready":
+                spec_replicas, running, ready = 0, 0, 0
+            if rs_name != current_name:
+                old_running += running
+            changed = (spec_replicas, running, ready) != (rs.spec.replicas, status.replicas or 0, status.ready_replicas or 0)
+            if not changed and not (rs_name == current_name and revision is not None):
+                continue
+            updated = copy.copy(rs)
+            updated.metadata = copy.copy(rs.metadata)
+            updated.spec = copy.copy(rs.spec)
+            updated.status = copy.copy(rs.status)
+            if rs_name == current_name and revision is not None:
+                updated.metadata.annotations = {REVISION_ANNOTATION: str(revision)}
+            updated.spec.replicas = spec_replicas
+            updated.status.replicas = running
+            updated.status.ready_replicas = ready
+            updated.status.available_replicas = ready
+            self._put_replica_set(updated, "MODIFIED")
+            self._sync_pods(updated, running, ready)
+        return old_running
+
+    def _run_controller(self):
+        while True:
+            with self._changed:
+                if not self._pending:
+                    return
+                due = self._pending[0][0]
+                delay = due - time.monotonic()
+                if delay > 0:
+                    self._changed.wait(delay)
+                    continue
+                _, _, namespace, name, step = heapq.heappop(self._pending)
+                self._advance(namespace, name, step)
+
+    # ---- manifest apply ----
+
+    def apply(
+        self, obj: Dict[str, Any], namespace: Optional[str], dry_run: bool = False
+    ) -> Tuple[str, Optional[Dict[str, Any]], Dict[str, Any]]:
+        """应用一个清单对象，返回 (created/configured, 应用前的对象, 应用后的对象)
+
+        Deployment 和 Service 写入模拟集群；其他类型只按原样保存清单，用于判断
+        动作和计算差异。``namespace`` 为 None 表示集群级别的对象。
+        """
+        name = obj["metadata"]["name"]
+        # dry-run 新建时的结果就是清单本身
+        manifest = dict(obj, metadata=dict(obj["metadata"], namespace=namespace))
+        if namespace is None:
+            manifest["metadata"].pop("namespace")
+        kind = {"Deployment": "deployments", "Service": "services"}.get(obj.get("kind"))
+        if kind is None:
+            key = (obj["apiVersion"], obj["kind"], namespace, name)
+            with self._changed:
+                live = self._manifests.get(key)
+                if not dry_run:
+                    self._manifests[key] = copy.deepcopy(manifest)
+            return ("configured" if live else "created"), live, manifest
+
+        self._call(f"apply_{kind}")
+        with self._changed:
+            current = self._objects[kind].get((namespace, name))
+            live = self.serialize(current) if current is not None else None
+            if not dry_run:
+                applied = self.serialize(self.replace(kind, namespace, obj))
+            elif current is not None:
+                applied = self.serialize(self._merged(kind, current, self._deserialize(obj, KINDS[kind][1])))
+            else:
+                applied = manifest
+        return ("configured" if current is not None else "created"), live, applied
+
+
+class FakeAppsV1Api:
+    """与 ``AppsV1Api`` 同名的方法；docstring 中的 ``:return:`` 供 watch 推断对象类型"""
+
+    def __init__(self, cluster: FakeCluster):
+        self._cluster = cluster
+
+    def list_deployment_for_all_namespaces(self, **kwargs):
+        """:return: V1DeploymentList"""
+        return self._cluster.list("deployments", None, **kwargs)
+
+    def list_namespaced_deployment(self, namespace, **kwargs):
+        """:return: V1DeploymentList"""
+        return self._cluster.list("deployments", namespace, **kwargs)
+
+    def read_namespaced_deployment(self, name, namespace, **kwargs):
+        self._cluster._call("read_deployments")
+        return self._cluster.read("deployments", namespace, name)
+
+    def create_namespaced_deployment(self, namespace, body, **kwargs):
+        self._cluster._call("create_deployments")
+        return self._cluster.create("deployments", namespace, body)
+
+    def delete_namespaced_deployment(self, name, namespace, **kwargs):
+        self._cluster._call("delete_deployments")
+        return self._cluster.delete("deployments", namespace, name)
+
+    def patch_namespaced_deployment_scale(self, name, namespace, body, **kwargs):
+        self._cluster._call("scale_deployments")
+        replicas = body["spec"]["replicas"] if isinstance(body, dict) else body.spec.replicas
+        return self._cluster.scale(namespace, name, replicas)
+
+    def list_replica_set_for_all_namespaces(self, **kwargs):
+        """:return: V1ReplicaSetList"""
+        return self._cluster.list("replicasets", None, **kwargs)
+
+    def list_namespaced_replica_set(self, namespace, **kwargs):
+        """:return: V1ReplicaSetList"""
+        return self._cluster.list("replicasets", namespace, **kwargs)
+
+
+class FakeCoreV1Api:
+    """与 ``CoreV1Api`` 同名的方法"""
+
+    def __init__(self, cluster: FakeCluster):
+        self._cluster = cluster
+
+    def list_service_for_all_namespaces(self, **kwargs):
+        """:return: V1ServiceList"""
+        return self._cluster.list("services", None, **kwargs)
+
+    def list_namespaced_service(self, namespace, **kwargs):
+        """:return: V1ServiceList"""
+        return self._cluster.list("services", namespace, **kwargs)
+
+    def list_pod_for_all_namespaces(self, **kwargs):
+        """:return: V1PodList"""
+        return self._cluster.list("pods", None, **kwargs)
+
+    def list_namespaced_pod(self, namespace, **kwargs):
+        """:return: V1PodList"""
+        return self._cluster.list("pods", namespace, **kwargs)
+
+    def read_namespaced_service(self, name, namespace, **kwargs):
+        self._cluster._call("read_services")
+        return self._cluster.read("services", namespace, name)
+
+    def create_namespaced_service(self, namespace, body, **kwargs):
+        self._cluster._call("create_services")
+        return self._cluster.create("services", namespace, body)
+
+    def delete_namespaced_service(self, name, namespace, **kwargs):
+        self._cluster._call("delete_services")
+        return self._cluster.delete("services", namespace, name)
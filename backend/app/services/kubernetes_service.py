@@ -1,67 +1,382 @@
-from kubernetes import client, config
-from typing import List, Dict, Optional
+from kubernetes import client, config, watch
+from kubernetes.dynamic import DynamicClient
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, AsyncIterator, Callable, Iterator, List, Dict, Optional
 from ..core.config import settings
+from .k8s_informer import Informer, LabelIndex, parse_label_selector
+from .k8s_apply import CLUSTER_SCOPED_KINDS, ManifestApplier, manifest_diff, manifest_tier
+from .k8s_simulator import FakeCluster
+from .k8s_rollout import RolloutTracker, rollout_status
 import os
+import copy
+import asyncio
+import time
+import queue
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
+def _deployment_summary(dep) -> Dict:
+    return {
+        "name": dep.metadata.name,
+        "namespace": dep.metadata.namespace,
+        "replicas": dep.spec.replicas,
+        "available_replicas": dep.status.available_replicas,
+        "image": dep.spec.template.spec.containers[0].image,
+        "labels": dep.metadata.labels,
+        "created_at": dep.metadata.creation_timestamp,
+    }
+
+
+def _service_summary(svc) -> Dict:
+    return {
+        "name": svc.metadata.name,
+        "namespace": svc.metadata.namespace,
+        "type": svc.spec.type,
+        "cluster_ip": svc.spec.cluster_ip,
+        "external_ip": svc.status.load_balancer.ingress[0].ip
+        if svc.status.load_balancer and svc.status.load_balancer.ingress
+        else None,
+        "ports": [
+            {"port": port.port, "target_port": port.target_port}
+            for port in svc.spec.ports or []
+        ],
+        "selector": svc.spec.selector or {},
+    }
+
+
+def _pod_summary(pod) -> Dict:
+    status = pod.status
+    return {
+        "name": pod.metadata.name,
+        "namespace": pod.metadata.namespace,
+        "phase": status.phase if status else None,
+        "ready": any(
+            condition.type == "Ready" and condition.status == "True"
+            for condition in (status.conditions if status else None) or []
+        ),
+        "restarts": sum(
+            container.restart_count or 0
+            for container in (status.container_statuses if status else None) or []
+        ),
+        "node": pod.spec.node_name if pod.spec else None,
+        "pod_ip": status.pod_ip if status else None,
+        "labels": pod.metadata.labels,
+        "owner": next(
+            (f"{owner.kind}/{owner.name}" for owner in pod.metadata.owner_references or [] if owner.controller),
+            None,
+        ),
+        "created_at": pod.metadata.creation_timestamp,
+    }
+
+
+_END_OF_PAGES = object()
+_END_OF_ROLLOUT = object()
+
+
+def iter_pages(list_func: Callable[..., Any], page_size: int, **kwargs) -> Iterator[Any]:
+    """用 limit/continue 分页遍历列表接口，逐个返回对象
+
+    下一页在后台线程中预取，调用方处理当前页时请求已经在进行；队列只容纳
+    一页，因此内存中最多同时存在约三页对象。调用方提前停止迭代时预取线程
+    随之退出。
+    """
+    pages: "queue.Queue[Any]" = queue.Queue(maxsize=1)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        while not stopped.is_set():
+            try:
+                pages.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def fetch():
+        token = None
+        try:
+            while True:
+                page = list_func(limit=page_size, _continue=token, **kwargs)
+                if not put(page.items):
+                    return
+                token = page.metadata._continue
+                if not token:
+                    break
+            put(_END_OF_PAGES)
+        except Exception as e:
+            put(e)
+
+    threading.Thread(target=fetch, name="k8s-pager", daemon=True).start()
+    try:
+        while True:
+            page = pages.get()
+            if page is _END_OF_PAGES:
+                return
+            if isinstance(page, Exception):
+                raise page
+            yield from page
+    finally:
+        stopped.set()
+
+
 class KubernetesService:
+    """Kubernetes 访问服务
+
+    kubeconfig / 集群内配置在首次使用时才加载（或由 ``connect_in_background``
+    在后台加载），加载失败或 KUBERNETES_SIMULATOR_ENABLED 时降级到模拟模式：
+    API 对象换成内存中的 FakeCluster，其余代码路径与真实集群相同。
+    """
+
     def __init__(self):
-        try:
-            # 尝试从配置文件加载
-            if hasattr(settings, 'KUBERNETES_CONFIG_PATH') and os.path.exists(settings.KUBERNETES_CONFIG_PATH):
-                logger.info(f"Loading Kubernetes config from {settings.KUBERNETES_CONFIG_PATH}")
-                config.load_kube_config(settings.KUBERNETES_CONFIG_PATH)
-            else:
-                # 尝试加载集群内配置
-                try:
+        self._initialized = False
+        self._simulation_mode = True
+        self._core_api = None
+        self._apps_api = None
+        self._lock = threading.Lock()
+        self._state = "not_connected"
+        self._last_error: Optional[str] = None
+        self._informers: Dict[str, Informer] = {}
+        self._dynamic_client = None
+        self._simulator: Optional[FakeCluster] = None
+        self._rollouts: Optional[RolloutTracker] = None
+
+    def connect(self):
+        if self._initialized:
+            return
+        with self._lock:
+            if self._initialized:
+                return
+            self._state = "connecting"
+            if settings.KUBERNETES_SIMULATOR_ENABLED:
+                logger.info("KUBERNETES_SIMULATOR_ENABLED is set, using the in-memory cluster")
+                self._use_simulator()
+                self._initialized = True
+                return
+            try:
+                # 尝试从配置文件加载
+                if hasattr(settings, 'KUBERNETES_CONFIG_PATH') and os.path.exists(settings.KUBERNETES_CONFIG_PATH):
+                    logger.info(f"Loading Kubernetes config from {settings.KUBERNETES_CONFIG_PATH}")
+                    config.load_kube_config(settings.KUBERNETES_CONFIG_PATH)
+                else:
+                    # 尝试加载集群内配置
                     logger.info("Trying in-cluster config")
                     config.load_incluster_config()
-                except Exception as e:
-                    # 降级到模拟模式
-                    logger.warning(f"Failed to load Kubernetes config: {str(e)}")
-                    logger.info("Running in simulation mode - Kubernetes API calls will be mocked")
-                    self.simulation_mode = True
-                    return
-            
-            self.simulation_mode = False
-            self.core_api = client.CoreV1Api()
-            self.apps_api = client.AppsV1Api()
-            logger.info("Successfully initialized Kubernetes client")
-        except Exception as e:
-            logger.error(f"Error initializing Kubernetes client: {str(e)}")
-            logger.info("Running in simulation mode - Kubernetes API calls will be mocked")
-            self.simulation_mode = True
-
-    def list_deployments(self, namespace: str = "default") -> List[Dict]:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: listing deployments in namespace {namespace}")
-            # 返回模拟数据
-            return [
-                {
-                    "name": "sample-deployment",
-                    "namespace": namespace,
-                    "replicas": 3,
-                    "available_replicas": 3,
-                    "image": "nginx:latest",
-                    "created_at": "2023-01-01T00:00:00Z",
+
+                self._core_api = client.CoreV1Api()
+                self._apps_api = client.AppsV1Api()
+                self._simulation_mode = False
+                self._state = "connected"
+                logger.info("Successfully initialized Kubernetes client")
+            except Exception as e:
+                # 降级到模拟模式
+                logger.warning(f"Failed to load Kubernetes config: {str(e)}")
+                logger.info("Running in simulation mode - Kubernetes API calls go to an in-memory cluster")
+                self._use_simulator()
+                self._last_error = str(e)
+            self._initialized = True
+
+    def _use_simulator(self):
+        self._simulator = FakeCluster.from_settings()
+        self._apps_api = self._simulator.apps
+        self._core_api = self._simulator.core
+        self._simulation_mode = True
+        self._state = "simulation"
+
+    def connect_in_background(self) -> threading.Thread:
+        """在后台加载配置并启动 informer"""
+        def run():
+            self.connect()
+            self.start_informers()
+
+        thread = threading.Thread(target=run, name="kubernetes-connect", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self) -> Dict:
+        """配置加载和 informer 同步状态，不触发加载"""
+        return {
+            "state": self._state,
+            "error": self._last_error,
+            "informers": self.informer_stats(),
+        }
+
+    def start_informers(self):
+        self.connect()
+        if not settings.KUBERNETES_INFORMER_ENABLED:
+            return
+        with self._lock:
+            if not self._informers:
+                list_funcs = {
+                    "deployments": self._apps_api.list_deployment_for_all_namespaces,
+                    "replicasets": self._apps_api.list_replica_set_for_all_namespaces,
+                    "pods": self._core_api.list_pod_for_all_namespaces,
+                    "services": self._core_api.list_service_for_all_namespaces,
                 }
-            ]
-        
-        # 正常模式
-        deployments = self.apps_api.list_namespaced_deployment(namespace)
-        return [
-            {
-                "name": dep.metadata.name,
-                "namespace": dep.metadata.namespace,
-                "replicas": dep.spec.replicas,
-                "available_replicas": dep.status.available_replicas,
-                "image": dep.spec.template.spec.containers[0].image,
-                "created_at": dep.metadata.creation_timestamp,
-            }
-            for dep in deployments.items
-        ]
+                for kind, list_func in list_funcs.items():
+                    self._informers[kind] = Informer(
+                        kind,
+                        list_func,
+                        retry_interval=settings.KUBERNETES_RETRY_INTERVAL,
+                        watch_timeout=settings.KUBERNETES_WATCH_TIMEOUT,
+                    )
+                self._rollouts = RolloutTracker(self._informers["deployments"], self._informers["replicasets"])
+        for informer in self._informers.values():
+            informer.start()
+
+    def stop_informers(self):
+        for informer in self._informers.values():
+            informer.stop()
+
+    def informer(self, kind: str) -> Optional[Informer]:
+        """返回已同步的 informer，未同步时返回 None 由调用方直接访问 API
+
+        informer 刚启动时最多等待 KUBERNETES_INFORMER_SYNC_TIMEOUT 秒完成首次 list。
+        """
+        self.start_informers()
+        informer = self._informers.get(kind)
+        if informer is None:
+            return None
+        remaining = settings.KUBERNETES_INFORMER_SYNC_TIMEOUT - (time.monotonic() - informer.started_at)
+        if not informer.wait_ready(max(0.0, remaining)):
+            return None
+        return informer
+
+    def informer_stats(self) -> Dict[str, Any]:
+        return {kind: informer.stats() for kind, informer in self._informers.items()}
+
+    @property
+    def dynamic_client(self):
+        """用于 server-side apply 的动态客户端，首次使用时做一次 API 发现"""
+        if self._dynamic_client is None:
+            self.connect()
+            with self._lock:
+                if self._dynamic_client is None:
+                    self._dynamic_client = DynamicClient(client.ApiClient())
+        return self._dynamic_client
+
+    def apply_manifests(
+        self,
+        objects: List[Dict],
+        namespace: str = "default",
+        dry_run: bool = False,
+        diff: bool = False,
+        force_conflicts: bool = True,
+        parallelism: Optional[int] = None,
+    ) -> Dict:
+        """按依赖层级并行 server-side apply 一组清单对象"""
+        if self.simulation_mode:
+            return self._simulate_apply(objects, namespace, dry_run, diff)
+
+        limit = min(parallelism or settings.BULK_MAX_PARALLELISM, settings.BULK_MAX_PARALLELISM)
+        applier = ManifestApplier(self.dynamic_client, parallelism=limit)
+        return applier.apply(objects, namespace=namespace, dry_run=dry_run, diff=diff, force_conflicts=force_conflicts)
+
+    @property
+    def simulator(self) -> Optional[FakeCluster]:
+        """模拟模式下的内存集群，连接真实集群时为 None"""
+        self.connect()
+        return self._simulator
+
+    def _simulate_apply(self, objects: List[Dict], namespace: str, dry_run: bool, diff: bool) -> Dict:
+        """在模拟集群上按层级顺序 apply，结果格式与 ManifestApplier 相同"""
+        started = time.monotonic()
+        results = []
+        failed = False
+        for tier in sorted({manifest_tier(obj["kind"]) for obj in objects}):
+            tier_results = []
+            for obj in objects:
+                if manifest_tier(obj["kind"]) != tier:
+                    continue
+                result = ManifestApplier._describe(obj, namespace, tier)
+                if failed:
+                    tier_results.append(dict(result, action="skipped"))
+                    continue
+                if obj["kind"] in CLUSTER_SCOPED_KINDS:
+                    result["namespace"] = None
+                object_started = time.monotonic()
+                try:
+                    action, live, applied = self._simulator.apply(obj, result["namespace"], dry_run=dry_run)
+                    if diff:
+                        result["diff"] = manifest_diff(live, applied, f"{obj['kind']}/{result['name']}")
+                        if live is not None:
+                            action = "configured" if result["diff"] else "unchanged"
+                    result["action"] = action
+                except Exception as e:
+                    result["action"] = "failed"
+                    result["error"] = str(e)
+                finally:
+                    result["duration_ms"] = round((time.monotonic() - object_started) * 1000, 1)
+                tier_results.append(result)
+            # 与 ManifestApplier 一样，非 dry-run 时某一层失败则跳过后续层
+            failed = failed or (not dry_run and any(result["error"] for result in tier_results))
+            results += tier_results
+        return ManifestApplier._summary(results, dry_run, started)
+
+    def _cache_write(self, kind: str, event_type: str, obj):
+        """写操作成功后立即更新本地缓存，随后的 watch 事件会覆盖为最新状态"""
+        informer = self._informers.get(kind)
+        if informer is not None and informer.ready:
+            informer.apply(event_type, obj)
+
+    def _cache_delete(self, kind: str, namespace: str, name: str):
+        informer = self._informers.get(kind)
+        obj = informer.get(namespace, name) if informer is not None else None
+        if obj is not None:
+            informer.apply("DELETED", obj)
+
+    @property
+    def simulation_mode(self) -> bool:
+        self.connect()
+        return self._simulation_mode
+
+    @property
+    def core_api(self):
+        self.connect()
+        return self._core_api
+
+    @property
+    def apps_api(self):
+        self.connect()
+        return self._apps_api
+
+    def list_deployments(self, namespace: str = "default", label_selector: Optional[str] = None) -> List[Dict]:
+        labels = parse_label_selector(label_selector)
+        informer = self.informer("deployments")
+        if informer is not None:
+            return [_deployment_summary(dep) for dep in informer.list(namespace, labels)]
+        deployments = self.apps_api.list_namespaced_deployment(
+            namespace, label_selector=label_selector or None
+        )
+        return [_deployment_summary(dep) for dep in deployments.items]
+
+    def iter_deployments(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """逐个返回部署，namespace 为空时遍历所有命名空间
+
+        informer 已同步时从内存读取，否则按页访问 API Server。
+        """
+        labels = parse_label_selector(label_selector)
+        informer = self.informer("deployments")
+        if informer is not None:
+            for dep in informer.list(namespace, labels):
+                yield _deployment_summary(dep)
+            return
+        if namespace:
+            list_func = lambda **kwargs: self.apps_api.list_namespaced_deployment(namespace, **kwargs)
+        else:
+            list_func = self.apps_api.list_deployment_for_all_namespaces
+        for dep in iter_pages(
+            list_func,
+            page_size or settings.KUBERNETES_LIST_PAGE_SIZE,
+            label_selector=label_selector or None,
+        ):
+            yield _deployment_summary(dep)
 
     def create_deployment(
         self,
@@ -71,14 +386,6 @@ class KubernetesService:
         replicas: int = 1,
         labels: Optional[Dict] = None,
     ) -> Dict:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: creating deployment {name} in namespace {namespace}")
-            return {
-                "name": name,
-                "namespace": namespace,
-                "replicas": replicas,
-            }
-            
         if labels is None:
             labels = {"app": name}
 
@@ -105,6 +412,7 @@ class KubernetesService:
             namespace=namespace,
             body=deployment,
         )
+        self._cache_write("deployments", "ADDED", created_deployment)
 
         return {
             "name": created_deployment.metadata.name,
@@ -113,15 +421,12 @@ class KubernetesService:
         }
 
     def delete_deployment(self, name: str, namespace: str = "default") -> bool:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: deleting deployment {name} in namespace {namespace}")
-            return True
-            
         try:
             self.apps_api.delete_namespaced_deployment(
                 name=name,
                 namespace=namespace,
             )
+            self._cache_delete("deployments", namespace, name)
             return True
         except client.rest.ApiException:
             return False
@@ -129,56 +434,273 @@ class KubernetesService:
     def scale_deployment(
         self, name: str, replicas: int, namespace: str = "default"
     ) -> bool:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: scaling deployment {name} to {replicas} replicas in namespace {namespace}")
-            return True
-            
         try:
-            deployment = self.apps_api.read_namespaced_deployment(
-                name=name,
-                namespace=namespace,
-            )
-            deployment.spec.replicas = replicas
-            self.apps_api.patch_namespaced_deployment(
-                name=name,
-                namespace=namespace,
-                body=deployment,
-            )
+            self._scale(name, replicas, namespace)
             return True
         except client.rest.ApiException:
             return False
 
-    def list_services(self, namespace: str = "default") -> List[Dict]:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: listing services in namespace {namespace}")
-            return [
-                {
-                    "name": "sample-service",
-                    "namespace": namespace,
-                    "type": "ClusterIP",
-                    "cluster_ip": "10.0.0.1",
-                    "external_ip": None,
-                    "ports": [{"port": 80, "target_port": 80}],
-                }
+    def _scale(self, name: str, replicas: int, namespace: str):
+        """通过 /scale 子资源只修改副本数，不读取也不回写整个 Deployment"""
+        scale = self.apps_api.patch_namespaced_deployment_scale(
+            name=name,
+            namespace=namespace,
+            body={"spec": {"replicas": replicas}},
+        )
+        informer = self._informers.get("deployments")
+        cached = informer.get(namespace, name) if informer is not None else None
+        if cached is not None:
+            # 缓存的对象可能正被其他线程读取，替换为只改了副本数的副本
+            updated = copy.copy(cached)
+            updated.spec = copy.copy(cached.spec)
+            updated.spec.replicas = scale.spec.replicas
+            informer.apply("MODIFIED", updated)
+        return scale
+
+    def rollout_tracker(self) -> Optional[RolloutTracker]:
+        """informer 已同步时返回共享的滚动状态跟踪器"""
+        if self.informer("deployments") is None or self.informer("replicasets") is None:
+            return None
+        return self._rollouts
+
+    def iter_rollout(
+        self,
+        name: str,
+        namespace: str = "default",
+        timeout: Optional[float] = None,
+        heartbeat: Optional[float] = None,
+    ) -> Iterator[Optional[Dict]]:
+        """返回部署当前的滚动状态和之后的每次变化，最后一个是终态
+
+        终态为 complete、failed 或 timeout。informer 可用时所有调用方共享它的
+        watch；否则为本次调用单独 watch 这一个部署。部署不存在时抛出 404。
+        """
+        timeout = timeout or settings.KUBERNETES_ROLLOUT_TIMEOUT
+        tracker = self.rollout_tracker()
+        if tracker is not None and tracker.status(namespace, name) is not None:
+            yield from tracker.follow(namespace, name, timeout, heartbeat)
+            return
+
+        deadline = time.monotonic() + timeout
+        dep = self.apps_api.read_namespaced_deployment(name=name, namespace=namespace)
+        status = rollout_status(dep)
+        yield status
+        if status["state"] != "progressing":
+            return
+        w = watch.Watch()
+        try:
+            for event in w.stream(
+                self.apps_api.list_namespaced_deployment,
+                namespace,
+                field_selector=f"metadata.name={name}",
+                resource_version=dep.metadata.resource_version,
+                timeout_seconds=max(1, int(timeout)),
+            ):
+                if event["type"] == "DELETED":
+                    yield dict(status, state="failed", message="部署已被删除")
+                    return
+                status = rollout_status(event["object"])
+                if status["state"] != "progressing":
+                    break
+                yield status
+                if time.monotonic() >= deadline:
+                    break
+        finally:
+            w.stop()
+        if status["state"] == "progressing":
+            status = dict(status, state="timeout", message=f"超过 {timeout}s 未完成")
+        yield status
+
+    async def iter_rollout_async(
+        self,
+        name: str,
+        namespace: str = "default",
+        timeout: Optional[float] = None,
+        heartbeat: Optional[float] = None,
+    ) -> AsyncIterator[Optional[Dict]]:
+        """``iter_rollout`` 的协程版本；共享 informer 时等待不占用线程"""
+        loop = asyncio.get_running_loop()
+        timeout = timeout or settings.KUBERNETES_ROLLOUT_TIMEOUT
+        tracker = await loop.run_in_executor(None, self.rollout_tracker)
+        if tracker is not None and tracker.status(namespace, name) is not None:
+            async for status in tracker.follow_async(namespace, name, timeout, heartbeat):
+                yield status
+            return
+        statuses = self.iter_rollout(name, namespace, timeout, heartbeat)
+        try:
+            while True:
+                status = await loop.run_in_executor(None, next, statuses, _END_OF_ROLLOUT)
+                if status is _END_OF_ROLLOUT:
+                    return
+                yield status
+        finally:
+            statuses.close()
+
+    def wait_for_rollout(self, name: str, namespace: str = "default", timeout: Optional[float] = None) -> Dict:
+        """等待部署滚动完成、失败或超时，返回 rollout_status 的结果"""
+        status = None
+        for status in self.iter_rollout(name, namespace, timeout or settings.BULK_OPERATION_TIMEOUT):
+            pass
+        return status
+
+    def scale_deployments(
+        self,
+        replicas: int,
+        namespace: str = "default",
+        names: Optional[List[str]] = None,
+        label_selector: Optional[str] = None,
+        parallelism: Optional[int] = None,
+        wait: bool = False,
+        timeout: Optional[float] = None,
+    ) -> List[Dict]:
+        """并发扩缩容多个部署，按名称列表或标签选择器选择，返回每个部署的结果"""
+        targets = list(dict.fromkeys(names or []))
+        if label_selector:
+            targets += [
+                dep["name"] for dep in self.iter_deployments(namespace, label_selector)
+                if dep["name"] not in targets
             ]
-            
-        services = self.core_api.list_namespaced_service(namespace)
-        return [
-            {
-                "name": svc.metadata.name,
-                "namespace": svc.metadata.namespace,
-                "type": svc.spec.type,
-                "cluster_ip": svc.spec.cluster_ip,
-                "external_ip": svc.status.load_balancer.ingress[0].ip
-                if svc.status.load_balancer.ingress
-                else None,
-                "ports": [
-                    {"port": port.port, "target_port": port.target_port}
-                    for port in svc.spec.ports
-                ],
-            }
-            for svc in services.items
-        ]
+
+        def scale_one(name: str) -> Dict:
+            started = time.monotonic()
+            result = {"name": name, "namespace": namespace, "replicas": replicas,
+                      "success": False, "error": None, "rollout": None}
+            try:
+                self._scale(name, replicas, namespace)
+                result["success"] = True
+                if wait:
+                    result["rollout"] = self.wait_for_rollout(name, namespace, timeout)
+                    result["success"] = result["rollout"]["state"] == "complete"
+            except client.rest.ApiException as e:
+                result["error"] = "部署未找到" if e.status == 404 else f"{e.status}: {e.reason}"
+            except Exception as e:
+                result["error"] = str(e)
+            result["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+            return result
+
+        limit = min(parallelism or settings.BULK_MAX_PARALLELISM, settings.BULK_MAX_PARALLELISM)
+        results = []
+        if targets:
+            with ThreadPoolExecutor(max_workers=max(1, min(limit, len(targets))), thread_name_prefix="k8s-scale") as executor:
+                for future in as_completed([executor.submit(scale_one, name) for name in targets]):
+                    results.append(future.result())
+        return results
+
+    def list_pods(self, namespace: str = "default", label_selector: Optional[str] = None) -> List[Dict]:
+        labels = parse_label_selector(label_selector)
+        informer = self.informer("pods")
+        if informer is not None:
+            return [_pod_summary(pod) for pod in informer.list(namespace, labels)]
+        pods = self.core_api.list_namespaced_pod(namespace, label_selector=label_selector or None)
+        return [_pod_summary(pod) for pod in pods.items]
+
+    def _selector(self, kind: str, namespace: str, list_func: Callable[..., Any]) -> Callable[[Dict], List[Any]]:
+        """返回按等值标签选择命名空间内对象的函数
+
+        informer 已同步时直接使用它的索引；否则分页 list 一次命名空间并临时
+        建立同样的标签索引，之后的每次匹配都不再扫描全部对象。
+        """
+        informer = self.informer(kind)
+        if informer is not None:
+            return lambda labels: informer.list(namespace, labels)
+        index = LabelIndex(iter_pages(list_func, settings.KUBERNETES_LIST_PAGE_SIZE))
+        return lambda labels: index.select(namespace, labels)
+
+    def topology(self, namespace: str = "default") -> Dict:
+        """服务 → 部署 → Pod 的关联视图
+
+        部署按 spec.selector 从 Pod 标签索引中选出 Pod；服务按 selector 匹配
+        Pod 模板标签与部署关联，并通过 Pod 标签索引选出直接承载流量的 Pod。
+        只支持 matchLabels，matchExpressions 会被忽略。
+        """
+        select_deployments = self._selector(
+            "deployments", namespace, lambda **kwargs: self.apps_api.list_namespaced_deployment(namespace, **kwargs)
+        )
+        select_services = self._selector(
+            "services", namespace, lambda **kwargs: self.core_api.list_namespaced_service(namespace, **kwargs)
+        )
+        select_pods = self._selector(
+            "pods", namespace, lambda **kwargs: self.core_api.list_namespaced_pod(namespace, **kwargs)
+        )
+        deployments = select_deployments({})
+        services = select_services({})
+
+        # Pod 模板标签的倒排索引，用于服务 selector 匹配部署
+        by_template_label: Dict[tuple, set] = {}
+        for dep in deployments:
+            template_labels = (dep.spec.template.metadata.labels if dep.spec.template.metadata else None) or {}
+            for label in template_labels.items():
+                by_template_label.setdefault(label, set()).add(dep.metadata.name)
+
+        deployment_nodes = {}
+        owned_pods = set()
+        for dep in deployments:
+            match_labels = (dep.spec.selector.match_labels if dep.spec.selector else None) or {}
+            pods = select_pods(match_labels) if match_labels else []
+            owned_pods.update(pod.metadata.name for pod in pods)
+            deployment_nodes[dep.metadata.name] = dict(
+                _deployment_summary(dep),
+                services=[],
+                pods=[_pod_summary(pod) for pod in pods],
+            )
+
+        service_nodes = []
+        for svc in services:
+            selector = svc.spec.selector or {}
+            # 没有 selector 的服务不选择任何 Pod（由 Endpoints 手动维护）
+            if selector:
+                matched = [by_template_label.get(label, set()) for label in selector.items()]
+                matched.sort(key=len)
+                deployment_names = sorted(set(matched[0]).intersection(*matched[1:]))
+                pod_names = [pod.metadata.name for pod in select_pods(selector)]
+            else:
+                deployment_names, pod_names = [], []
+            for name in deployment_names:
+                deployment_nodes[name]["services"].append(svc.metadata.name)
+            service_nodes.append(dict(_service_summary(svc), deployments=deployment_names, pods=pod_names))
+
+        all_pods = select_pods({})
+        return {
+            "namespace": namespace,
+            "services": service_nodes,
+            "deployments": list(deployment_nodes.values()),
+            "unowned_pods": [_pod_summary(pod) for pod in all_pods if pod.metadata.name not in owned_pods],
+            "counts": {"services": len(service_nodes), "deployments": len(deployment_nodes), "pods": len(all_pods)},
+        }
+
+    def list_services(self, namespace: str = "default", label_selector: Optional[str] = None) -> List[Dict]:
+        labels = parse_label_selector(label_selector)
+        informer = self.informer("services")
+        if informer is not None:
+            return [_service_summary(svc) for svc in informer.list(namespace, labels)]
+        services = self.core_api.list_namespaced_service(
+            namespace, label_selector=label_selector or None
+        )
+        return [_service_summary(svc) for svc in services.items]
+
+    def iter_services(
+        self,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+        page_size: Optional[int] = None,
+    ) -> Iterator[Dict]:
+        """逐个返回服务，namespace 为空时遍历所有命名空间"""
+        labels = parse_label_selector(label_selector)
+        informer = self.informer("services")
+        if informer is not None:
+            for svc in informer.list(namespace, labels):
+                yield _service_summary(svc)
+            return
+        if namespace:
+            list_func = lambda **kwargs: self.core_api.list_namespaced_service(namespace, **kwargs)
+        else:
+            list_func = self.core_api.list_service_for_all_namespaces
+        for svc in iter_pages(
+            list_func,
+            page_size or settings.KUBERNETES_LIST_PAGE_SIZE,
+            label_selector=label_selector or None,
+        ):
+            yield _service_summary(svc)
 
     def create_service(
         self,
@@ -188,15 +710,6 @@ class KubernetesService:
         ports: List[Dict] = None,
         selector: Dict = None,
     ) -> Dict:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: creating service {name} in namespace {namespace}")
-            return {
-                "name": name,
-                "namespace": namespace,
-                "type": service_type,
-                "cluster_ip": "10.0.0.1",
-            }
-            
         if ports is None:
             ports = [{"port": 80, "target_port": 80}]
         if selector is None:
@@ -221,6 +734,7 @@ class KubernetesService:
             namespace=namespace,
             body=service,
         )
+        self._cache_write("services", "ADDED", created_service)
 
         return {
             "name": created_service.metadata.name,
@@ -230,15 +744,12 @@ class KubernetesService:
         }
 
     def delete_service(self, name: str, namespace: str = "default") -> bool:
-        if getattr(self, 'simulation_mode', True):
-            logger.info(f"Simulation mode: deleting service {name} in namespace {namespace}")
-            return True
-            
         try:
             self.core_api.delete_namespaced_service(
                 name=name,
                 namespace=namespace,
             )
+            self._cache_delete("services", namespace, name)
             return True
         except client.rest.ApiException:
             return False 
\ No newline at end of file
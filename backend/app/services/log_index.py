@@ -0,0 +1,490 @@
+import os
+import re
+import json
+import mmap
+import time
+import zlib
+import shutil
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+from app.core.config import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows 上没有 fcntl，只能单进程运行
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# 分区目录名格式，每小时一个分区
+PARTITION_FORMAT = "%Y%m%d%H"
+PARTITION_SECONDS = 3600
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]{2,}")
+SEGMENT_SUFFIX = ".seg"
+INDEX_SUFFIX = ".idx"
+# 采集锁文件，多个 worker 进程中只有持有它的一个写入
+INGEST_LOCK_FILE = "ingester.lock"
+# 保留清理和压缩的间隔
+MAINTENANCE_INTERVAL = 3600
+
+
+def tokenize(text: str) -> Set[str]:
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+def parse_docker_timestamp(value: str) -> float:
+    """解析 Docker 的 RFC3339Nano 时间戳，例如 2024-01-01T12:00:00.123456789Z"""
+    value = value.rstrip("Z")
+    base, _, fraction = value.partition(".")
+    seconds = datetime.strptime(base, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp()
+    if fraction:
+        seconds += float(f"0.{fraction[:9]}")
+    return seconds
+
+
+def partition_of(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).strftime(PARTITION_FORMAT)
+
+
+def partition_start(partition: str) -> float:
+    return datetime.strptime(partition, PARTITION_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+class SegmentWriter:
+    """单个容器在一个分区内的段文件写入器
+
+    段文件由若干 zlib 压缩块顺序拼接而成，每行格式为 ``<时间戳>\\t<日志>``。
+    旁边的 ``.idx`` 记录每个块的偏移、时间范围以及词项到块号的倒排表；
+    块先写入段文件再原子替换索引，读者只会看到已经落盘的块。
+    """
+
+    def __init__(self, path: str, container_id: str, partition: str, block_size: int):
+        self.path = path
+        self.container_id = container_id
+        self.partition = partition
+        self.block_size = block_size
+        self._lines: List[Tuple[float, str]] = []
+        self._pending_bytes = 0
+        self.index: Dict[str, Any] = {
+            "container_id": container_id,
+            "partition": partition,
+            "min_ts": None,
+            "max_ts": None,
+            "blocks": [],
+            "tokens": {},
+        }
+        if os.path.exists(path + INDEX_SUFFIX):
+            with open(path + INDEX_SUFFIX) as f:
+                self.index = json.load(f)
+
+    @property
+    def size(self) -> int:
+        blocks = self.index["blocks"]
+        return blocks[-1]["offset"] + blocks[-1]["length"] if blocks else 0
+
+    def append(self, timestamp: float, line: str):
+        self._lines.append((timestamp, line))
+        self._pending_bytes += len(line) + 24
+        if self._pending_bytes >= self.block_size:
+            self.flush()
+
+    def flush(self):
+        if not self._lines:
+            return
+        raw = "".join(f"{timestamp:.6f}\t{line}\n" for timestamp, line in self._lines).encode()
+        data = zlib.compress(raw, 6)
+        offset = self.size
+        with open(self.path + SEGMENT_SUFFIX, "ab") as f:
+            f.write(data)
+
+        block_id = len(self.index["blocks"])
+        min_ts = min(timestamp for timestamp, _ in self._lines)
+        max_ts = max(timestamp for timestamp, _ in self._lines)
+        self.index["blocks"].append({
+            "offset": offset,
+            "length": len(data),
+            "min_ts": min_ts,
+            "max_ts": max_ts,
+            "lines": len(self._lines),
+        })
+        tokens = set()
+        for _, line in self._lines:
+            tokens |= tokenize(line)
+        postings = self.index["tokens"]
+        for token in tokens:
+            postings.setdefault(token, []).append(block_id)
+        self.index["min_ts"] = min_ts if self.index["min_ts"] is None else min(self.index["min_ts"], min_ts)
+        self.index["max_ts"] = max_ts if self.index["max_ts"] is None else max(self.index["max_ts"], max_ts)
+
+        tmp_path = self.path + INDEX_SUFFIX + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.index, f, separators=(",", ":"))
+        os.replace(tmp_path, self.path + INDEX_SUFFIX)
+        self._lines = []
+        self._pending_bytes = 0
+
+
+def read_block(path: str, block: Dict[str, Any]) -> Iterator[Tuple[float, str]]:
+    """通过 mmap 读取并解压一个块"""
+    with open(path + SEGMENT_SUFFIX, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = zlib.decompress(mapped[block["offset"]:block["offset"] + block["length"]])
+    for raw_line in data.decode("utf-8", errors="replace").splitlines():
+        timestamp, _, line = raw_line.partition("\t")
+        yield float(timestamp), line
+
+
+class LogIndex:
+    """按时间分区、带词项和时间索引的本地容器日志库"""
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        block_size: Optional[int] = None,
+        segment_max_bytes: Optional[int] = None,
+        retention_hours: Optional[int] = None,
+    ):
+        self.root = root or settings.LOG_INDEX_DIR
+        self.block_size = block_size or settings.LOG_INDEX_BLOCK_SIZE
+        self.segment_max_bytes = segment_max_bytes or settings.LOG_INDEX_SEGMENT_MAX_BYTES
+        self.retention_hours = retention_hours or settings.LOG_RETENTION_HOURS
+        self._writers: Dict[Tuple[str, str], SegmentWriter] = {}
+        self._index_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.RLock()
+        os.makedirs(self.root, exist_ok=True)
+
+    # ---- 写入 ----
+
+    def _segment_paths(self, partition: str, container_id: Optional[str] = None) -> List[str]:
+        directory = os.path.join(self.root, partition)
+        if not os.path.isdir(directory):
+            return []
+        paths = []
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(INDEX_SUFFIX) and (container_id is None or name.startswith(f"{container_id}-")):
+                paths.append(os.path.join(directory, name[:-len(INDEX_SUFFIX)]))
+        return paths
+
+    def _next_sequence(self, partition: str, container_id: str) -> int:
+        paths = self._segment_paths(partition, container_id)
+        return max((int(os.path.basename(path).rsplit("-", 1)[1]) for path in paths), default=-1) + 1
+
+    def _writer(self, container_id: str, partition: str) -> SegmentWriter:
+        key = (container_id, partition)
+        writer = self._writers.get(key)
+        if writer is not None and writer.size < self.segment_max_bytes:
+            return writer
+        if writer is not None:
+            writer.flush()
+        os.makedirs(os.path.join(self.root, partition), exist_ok=True)
+        path = os.path.join(self.root, partition, f"{container_id}-{self._next_sequence(partition, container_id):04d}")
+        writer = SegmentWriter(path, container_id, partition, self.block_size)
+        self._writers[key] = writer
+        return writer
+
+    def append(self, container_id: str, timestamp: float, line: str):
+        with self._lock:
+            self._writer(container_id, partition_of(timestamp)).append(timestamp, line)
+
+    def flush(self):
+        """把缓冲的行写成块，并关闭已经过去的分区的写入器"""
+        current = partition_of(time.time())
+        with self._lock:
+            for key, writer in list(self._writers.items()):
+                writer.flush()
+                if key[1] < current:
+                    del self._writers[key]
+
+    # ---- 查询 ----
+
+    def _load_index(self, path: str) -> Optional[Dict[str, Any]]:
+        index_path = path + INDEX_SUFFIX
+        try:
+            mtime = os.path.getmtime(index_path)
+        except OSError:
+            return None
+        with self._lock:
+            cached = self._index_cache.get(index_path)
+            if cached is not None and cached[0] == mtime:
+                self._index_cache.move_to_end(index_path)
+                return cached[1]
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return None
+        with self._lock:
+            self._index_cache[index_path] = (mtime, index)
+            while len(self._index_cache) > 256:
+                self._index_cache.popitem(last=False)
+        return index
+
+    def partitions(self) -> List[str]:
+        return sorted(
+            name for name in os.listdir(self.root)
+            if len(name) == 10 and name.isdigit() and os.path.isdir(os.path.join(self.root, name))
+        )
+
+    def latest_timestamp(self, container_id: str) -> Optional[float]:
+        """容器已写入索引的最新一行的时间，没有时返回 None"""
+        for partition in reversed(self.partitions()):
+            latest = None
+            for path in self._segment_paths(partition, container_id):
+                index = self._load_index(path)
+                if index and index["blocks"]:
+                    latest = max(latest or 0.0, index["max_ts"])
+            if latest is not None:
+                return latest
+        return None
+
+    def search(
+        self,
+        query: Optional[str] = None,
+        regex: Optional[str] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None,
+        containers: Optional[List[str]] = None,
+        limit: int = 1000,
+    ) -> Dict[str, Any]:
+        """按词项或正则在时间范围内搜索日志
+
+        只读取时间范围重叠的分区和块；有词项时再用倒排表筛掉不含全部词项的块。
+        """
+        terms = tokenize(query) if query else set()
+        pattern = re.compile(regex) if regex else None
+        needle = query.lower() if query else None
+        start = start if start is not None else 0.0
+        end = end if end is not None else float("inf")
+
+        matches: List[Dict[str, Any]] = []
+        scanned_blocks = 0
+        for partition in self.partitions():
+            partition_begin = partition_start(partition)
+            if partition_begin > end or partition_begin + PARTITION_SECONDS < start:
+                continue
+            for path in self._segment_paths(partition):
+                index = self._load_index(path)
+                if not index or not index["blocks"]:
+                    continue
+                container_id = index["container_id"]
+                # 索引里是 12 位短 ID，过滤条件可以是完整 ID 或更短的前缀
+                if containers and not any(container_id.startswith(c[:12]) for c in containers):
+                    continue
+                if index["max_ts"] < start or index["min_ts"] > end:
+                    continue
+
+                candidates = set(range(len(index["blocks"])))
+                for term in terms:
+                    candidates &= set(index["tokens"].get(term, ()))
+                    if not candidates:
+                        break
+                for block_id in sorted(candidates):
+                    block = index["blocks"][block_id]
+                    if block["max_ts"] < start or block["min_ts"] > end:
+                        continue
+                    scanned_blocks += 1
+                    try:
+                        lines = list(read_block(path, block))
+                    except (OSError, ValueError, zlib.error):
+                        # 段文件可能刚被压缩合并替换
+                        continue
+                    for timestamp, line in lines:
+                        if timestamp < start or timestamp > end:
+                            continue
+                        if terms:
+                            if not terms <= tokenize(line):
+                                continue
+                        elif needle and needle not in line.lower():
+                            continue
+                        if pattern is not None and not pattern.search(line):
+                            continue
+                        matches.append({"container_id": container_id, "timestamp": timestamp, "line": line})
+                        if len(matches) >= limit:
+                            break
+                    if len(matches) >= limit:
+                        break
+                if len(matches) >= limit:
+                    break
+            if len(matches) >= limit:
+                break
+
+        matches.sort(key=lambda match: match["timestamp"])
+        return {"matches": matches, "truncated": len(matches) >= limit, "scanned_blocks": scanned_blocks}
+
+    # ---- 保留与压缩 ----
+
+    def enforce_retention(self) -> List[str]:
+        """删除超出保留时间的分区"""
+        cutoff = partition_of(time.time() - self.retention_hours * 3600)
+        removed = []
+        for partition in self.partitions():
+            if partition < cutoff:
+                shutil.rmtree(os.path.join(self.root, partition), ignore_errors=True)
+                removed.append(partition)
+        if removed:
+            logger.info(f"Removed expired log partitions: {removed}")
+        return removed
+
+    def compact(self):
+        """把已封闭分区中同一容器的多个小段合并为一个段"""
+        current = partition_of(time.time())
+        for partition in self.partitions():
+            if partition >= current:
+                continue
+            by_container: Dict[str, List[str]] = {}
+            for path in self._segment_paths(partition):
+                name = os.path.basename(path)
+                by_container.setdefault(name.rsplit("-", 1)[0], []).append(path)
+            for container_id, paths in by_container.items():
+                if len(paths) > 1:
+                    self._compact_segments(container_id, partition, paths)
+
+    def _compact_segments(self, container_id: str, partition: str, paths: List[str]):
+        sequence = self._next_sequence(partition, container_id)
+        # 合并结果先写到分区目录之外，避免查询读到未完成的段
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+        target = os.path.join(self.root, "tmp", f"{partition}-{container_id}-{sequence:04d}")
+        writer = SegmentWriter(target, container_id, partition, self.block_size)
+        for path in paths:
+            index = self._load_index(path)
+            for block in (index or {}).get("blocks", []):
+                for timestamp, line in read_block(path, block):
+                    writer.append(timestamp, line)
+        writer.flush()
+        final = os.path.join(self.root, partition, f"{container_id}-{sequence:04d}")
+        # 先放好新段，再删除旧段
+        os.replace(target + SEGMENT_SUFFIX, final + SEGMENT_SUFFIX)
+        os.replace(target + INDEX_SUFFIX, final + INDEX_SUFFIX)
+        for path in paths:
+            for suffix in (INDEX_SUFFIX, SEGMENT_SUFFIX):
+                try:
+                    os.remove(path + suffix)
+                except OSError:
+                    pass
+        logger.info(f"Compacted {len(paths)} segments of {container_id} in partition {partition}")
+
+
+class LogIngester:
+    """后台线程: 定期增量拉取各容器日志写入 LogIndex
+
+    gunicorn 的每个 worker 都会启动一个采集器，但段文件和索引的写入位置只
+    保存在进程内存中，因此只有持有索引目录下采集锁（fcntl 文件锁）的进程
+    写入，其余进程每个周期尝试接管。持锁进程退出时锁由内核释放。
+    """
+
+    def __init__(self, docker_service, log_index: LogIndex, interval: Optional[float] = None):
+        self.docker_service = docker_service
+        self.log_index = log_index
+        self.interval = interval or settings.LOG_INGEST_INTERVAL
+        self._positions: Dict[str, str] = {}
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_file = None
+
+    @property
+    def is_leader(self) -> bool:
+        return self._lock_file is not None
+
+    def acquire_leadership(self) -> bool:
+        """尝试获取采集锁，不阻塞"""
+        if self._lock_file is not None:
+            return True
+        if fcntl is None:
+            self._lock_file = True
+            return True
+        lock_file = open(os.path.join(self.log_index.root, INGEST_LOCK_FILE), "a")
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        logger.info(f"Log ingester acquired {INGEST_LOCK_FILE} in process {os.getpid()}")
+        return True
+
+    def release_leadership(self):
+        lock_file, self._lock_file = self._lock_file, None
+        if lock_file is not None and lock_file is not True:
+            # 关闭文件即释放 flock
+            lock_file.close()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run, name="log-ingester", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        # 采集线程在当前周期结束后退出并释放采集锁
+        self._stopped.set()
+
+    def ingest_container(self, container_id: str) -> int:
+        """拉取容器自上次位置以来的日志，返回写入的行数"""
+        last = self._positions.get(container_id)
+        indexed = None
+        if last is None:
+            # 刚接管采集时从索引中已有的最新一行继续，避免重复写入前一个采集进程的日志
+            indexed = self.log_index.latest_timestamp(container_id[:12])
+        if last:
+            since = int(parse_docker_timestamp(last))
+        elif indexed is not None:
+            since = int(indexed)
+        else:
+            # 首次采集只回填最近一段时间的日志
+            since = int(time.time() - settings.LOG_INGEST_BACKFILL)
+        raw = self.docker_service.client.api.logs(
+            container_id, stdout=True, stderr=True, timestamps=True, since=since
+        )
+        count = 0
+        for raw_line in raw.decode("utf-8", errors="replace").splitlines():
+            stamp, _, line = raw_line.partition(" ")
+            # since 只精确到秒，跳过上次已经写入的行
+            if not stamp or (last is not None and stamp <= last):
+                continue
+            try:
+                timestamp = parse_docker_timestamp(stamp)
+            except ValueError:
+                continue
+            if indexed is not None and timestamp <= indexed:
+                continue
+            self.log_index.append(container_id[:12], timestamp, line)
+            last = stamp
+            count += 1
+        if last is not None:
+            self._positions[container_id] = last
+        return count
+
+    def run_once(self):
+        running = {
+            container["id"]
+            for container in self.docker_service.query_containers(filters={"status": "running"})["items"]
+        }
+        # 上一轮之后退出的容器再采集一次，补上最后的日志
+        for container_id in running | set(self._positions):
+            try:
+                self.ingest_container(container_id)
+            except Exception as e:
+                logger.warning(f"Error ingesting logs for container {container_id}: {str(e)}")
+            if container_id not in running:
+                self._positions.pop(container_id, None)
+        self.log_index.flush()
+
+    def _run(self):
+        # 获得采集锁后立即做一次保留清理和压缩，之后每 MAINTENANCE_INTERVAL 秒一次
+        next_maintenance = 0.0
+        while not self._stopped.is_set():
+            try:
+                if self.acquire_leadership():
+                    self.run_once()
+                    if time.monotonic() >= next_maintenance:
+                        self.log_index.enforce_retention()
+                        self.log_index.compact()
+                        next_maintenance = time.monotonic() + MAINTENANCE_INTERVAL
+            except Exception as e:
+                logger.warning(f"Log ingestion cycle failed: {str(e)}")
+            self._stopped.wait(self.interval)
+        self.release_leadership()
@@ -1,48 +1,201 @@
-import requests
-from typing import Dict, List
+import asyncio
+import logging
+import re
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 from ..core.config import settings
+from .prometheus_api import PrometheusClient
+from .query_cache import QueryCache, align_range
+from .range_window import RangeWindows
+from .downsample import choose_step, downsample, parse_duration
+
+logger = logging.getLogger(__name__)
+
+# 容器指标的 PromQL 模板，按 container_id 聚合；{matcher} 为单个容器的
+# container_id="a" 或批量查询的 container_id=~"a|b|c"，两种查询得到相同的序列
+CONTAINER_QUERIES = {
+    "cpu_usage": 'sum by (container_id) (rate(container_cpu_usage_seconds_total{{{matcher}}}[{rate_window}]))',
+    "memory_usage": 'sum by (container_id) (container_memory_usage_bytes{{{matcher}}})',
+    "network_receive": 'sum by (container_id) (rate(container_network_receive_bytes_total{{{matcher}}}[{rate_window}]))',
+    "network_transmit": 'sum by (container_id) (rate(container_network_transmit_bytes_total{{{matcher}}}[{rate_window}]))',
+}
+
+# rate() 的最小区间；step 更大时取 step，避免相邻点之间的样本被跳过
+MIN_RATE_WINDOW = 300
+
+
+def resolve_range(
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    duration: str = "5m",
+    max_points: Optional[int] = None,
+) -> Tuple[float, float, float, int]:
+    """确定查询窗口和 step，返回 (start, end, step, max_points)
+
+    未指定 end 时取当前时间，未指定 start 时取 end 往前 duration。
+    """
+    max_points = max_points or settings.PROMETHEUS_MAX_POINTS
+    if max_points < 3:
+        raise ValueError("max_points 不能小于 3")
+    end_ts = end.timestamp() if end else datetime.now().timestamp()
+    start_ts = start.timestamp() if start else end_ts - parse_duration(duration)
+    if start_ts >= end_ts:
+        raise ValueError("start 必须早于 end")
+    step = choose_step(
+        start_ts, end_ts, max_points,
+        min_step=settings.PROMETHEUS_SCRAPE_INTERVAL,
+        oversample=settings.PROMETHEUS_LTTB_OVERSAMPLE,
+    )
+    return start_ts, end_ts, step, max_points
+
+
+def _promql_regex_literal(value: str) -> str:
+    """转义正则元字符，并按 PromQL 双引号字符串的规则转义反斜杠"""
+    return re.sub(r'([\\.^$*+?()\[\]{}|])', r'\\\1', value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def chunk_matchers(container_ids: List[str], max_length: int) -> List[List[str]]:
+    """把容器 ID 分组，使每组拼出的正则不超过 max_length 个字符"""
+    chunks: List[List[str]] = []
+    current: List[str] = []
+    length = 0
+    for container_id in container_ids:
+        size = len(_promql_regex_literal(container_id)) + 1
+        if current and length + size > max_length:
+            chunks.append(current)
+            current, length = [], 0
+        current.append(container_id)
+        length += size
+    if current:
+        chunks.append(current)
+    return chunks
 
 class MonitoringService:
+    """Prometheus 监控查询
+
+    每个面板的多个 PromQL 查询通过同一个连接池并发发出，耗时约等于最慢的
+    一个查询；单个查询失败时该指标返回空列表，不影响其他指标。
+
+    查询的时间参数对齐到 step（即时查询对齐到抓取周期）后经 QueryCache 缓存，
+    同一周期内多个面板、多个用户的相同查询只访问 Prometheus 一次。缓存未命中的
+    范围查询经 RangeWindows 只取上一次窗口之后的新增样本。
+    """
+
     def __init__(self):
         self.prometheus_url = settings.PROMETHEUS_ENDPOINT
+        self.client = PrometheusClient(self.prometheus_url)
+        self.cache = QueryCache(
+            interval=settings.PROMETHEUS_SCRAPE_INTERVAL,
+            max_entries=settings.PROMETHEUS_CACHE_MAX_ENTRIES,
+            max_points=settings.PROMETHEUS_CACHE_MAX_POINTS,
+            historical_ttl=settings.PROMETHEUS_CACHE_HISTORICAL_TTL,
+        )
+        self.windows = RangeWindows(self.client.query_range, max_windows=settings.PROMETHEUS_RANGE_WINDOWS)
 
-    def get_container_metrics(self, container_id: str, duration: str = "5m") -> Dict:
-        """获取容器的监控指标"""
-        end_time = datetime.now()
-        start_time = end_time - timedelta(minutes=5)
-
-        queries = {
-            "cpu_usage": f'rate(container_cpu_usage_seconds_total{{container_id="{container_id}"}}[{duration}])',
-            "memory_usage": f'container_memory_usage_bytes{{container_id="{container_id}"}}',
-            "network_receive": f'rate(container_network_receive_bytes_total{{container_id="{container_id}"}}[{duration}])',
-            "network_transmit": f'rate(container_network_transmit_bytes_total{{container_id="{container_id}"}}[{duration}])',
-        }
+    async def close(self):
+        await self.client.close()
 
+    async def _gather(self, requests: Dict[str, Awaitable[Any]]) -> Dict[str, Any]:
+        """并发执行一组查询，失败的查询记录日志并返回空列表"""
+        results = await asyncio.gather(*requests.values(), return_exceptions=True)
         metrics = {}
-        for metric_name, query in queries.items():
-            try:
-                response = requests.get(
-                    f"{self.prometheus_url}/api/v1/query_range",
-                    params={
-                        "query": query,
-                        "start": start_time.timestamp(),
-                        "end": end_time.timestamp(),
-                        "step": "15s",
-                    },
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data["status"] == "success" and data["data"]["result"]:
-                        metrics[metric_name] = data["data"]["result"][0]["values"]
-                    else:
-                        metrics[metric_name] = []
-            except requests.exceptions.RequestException:
-                metrics[metric_name] = []
+        for metric_name, result in zip(requests, results):
+            if isinstance(result, Exception):
+                logger.warning(f"Prometheus query {metric_name} failed: {str(result)}")
+                result = []
+            metrics[metric_name] = result
+        return metrics
+
+    async def query(self, query: str) -> List[Dict]:
+        """即时查询，求值时间对齐到当前抓取周期"""
+        at = self.cache.align_time(datetime.now().timestamp())
+        if not settings.PROMETHEUS_CACHE_ENABLED:
+            return await self.client.query(query, at)
+        return await self.cache.get_or_fetch(("query", query, at), lambda: self.client.query(query, at))
+
+    async def query_range(self, query: str, start: float, end: float, step: float) -> List[Dict]:
+        """范围查询，start/end 对齐到 step 网格"""
+        start, end = align_range(start, end, step)
+        fetch = self.windows.query_range if settings.PROMETHEUS_INCREMENTAL_RANGE else self.client.query_range
+        if not settings.PROMETHEUS_CACHE_ENABLED:
+            return await fetch(query, start, end, step)
+        return await self.cache.get_or_fetch(
+            ("query_range", query, start, end, step),
+            lambda: fetch(query, start, end, step),
+            end=end,
+        )
 
+    def cache_stats(self) -> Dict:
+        return dict(self.cache.stats(), range_windows=self.windows.stats())
+
+    async def _first_series(self, query: str, start: float, end: float, step: float) -> List:
+        result = await self.query_range(query, start, end, step)
+        return result[0]["values"] if result else []
+
+    async def get_container_metrics(
+        self,
+        container_id: str,
+        duration: str = "5m",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        max_points: Optional[int] = None,
+    ) -> Dict:
+        """获取容器的监控指标
+
+        窗口由 start/end 或最近的 duration 确定，step 按 max_points 自动选择，
+        每个序列超过 max_points 时用 LTTB 降采样。
+        """
+        start_ts, end_ts, step, max_points = resolve_range(start, end, duration, max_points)
+        rate_window = f"{int(max(step, MIN_RATE_WINDOW))}s"
+
+        metrics = await self._gather({
+            metric_name: self._first_series(
+                template.format(matcher=f'container_id="{container_id}"', rate_window=rate_window),
+                start_ts, end_ts, step,
+            )
+            for metric_name, template in CONTAINER_QUERIES.items()
+        })
+        return {metric_name: downsample(values, max_points) for metric_name, values in metrics.items()}
+
+    async def get_containers_metrics(
+        self,
+        container_ids: List[str],
+        duration: str = "5m",
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        max_points: Optional[int] = None,
+    ) -> Dict[str, Dict]:
+        """批量获取多个容器的监控指标，返回 {container_id: {metric: values}}
+
+        每个指标只发一个 ``container_id=~"a|b|c"`` 查询并按 container_id 聚合，
+        再把结果拆分到各容器；ID 很多时按 PROMETHEUS_MAX_MATCHER_LENGTH 拆成
+        多个查询并发执行。没有数据或查询失败的指标返回空列表。窗口、step 和
+        降采样与 ``get_container_metrics`` 相同。
+        """
+        container_ids = sorted(set(container_ids))
+        start_ts, end_ts, step, max_points = resolve_range(start, end, duration, max_points)
+        rate_window = f"{int(max(step, MIN_RATE_WINDOW))}s"
+
+        requests = {}
+        for index, chunk in enumerate(chunk_matchers(container_ids, settings.PROMETHEUS_MAX_MATCHER_LENGTH)):
+            matcher = 'container_id=~"' + "|".join(_promql_regex_literal(container_id) for container_id in chunk) + '"'
+            for metric_name, template in CONTAINER_QUERIES.items():
+                query = template.format(matcher=matcher, rate_window=rate_window)
+                requests[(metric_name, index)] = self.query_range(query, start_ts, end_ts, step)
+        results = await self._gather(requests)
+
+        metrics = {
+            container_id: {metric_name: [] for metric_name in CONTAINER_QUERIES}
+            for container_id in container_ids
+        }
+        for (metric_name, _), series_list in results.items():
+            for series in series_list:
+                container_id = series.get("metric", {}).get("container_id")
+                if container_id in metrics:
+                    metrics[container_id][metric_name] = downsample(series["values"], max_points)
         return metrics
 
-    def get_cluster_metrics(self) -> Dict:
+    async def get_cluster_metrics(self) -> Dict:
         """获取集群级别的监控指标"""
         queries = {
             "node_cpu_usage": 'sum(rate(node_cpu_seconds_total{mode!="idle"}[5m])) by (instance)',
@@ -52,46 +205,29 @@ class MonitoringService:
             "node_network_transmit": 'sum(rate(node_network_transmit_bytes_total[5m])) by (instance)',
         }
 
-        metrics = {}
-        for metric_name, query in queries.items():
-            try:
-                response = requests.get(
-                    f"{self.prometheus_url}/api/v1/query",
-                    params={"query": query},
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data["status"] == "success":
-                        metrics[metric_name] = data["data"]["result"]
-                    else:
-                        metrics[metric_name] = []
-            except requests.exceptions.RequestException:
-                metrics[metric_name] = []
-
-        return metrics
+        return await self._gather({
+            metric_name: self.query(query) for metric_name, query in queries.items()
+        })
 
-    def get_alerts(self) -> List[Dict]:
+    async def get_alerts(self) -> List[Dict]:
         """获取当前活动的告警"""
         try:
-            response = requests.get(f"{self.prometheus_url}/api/v1/alerts")
-            if response.status_code == 200:
-                data = response.json()
-                if data["status"] == "success":
-                    return [
-                        {
-                            "name": alert["labels"]["alertname"],
-                            "severity": alert["labels"].get("severity", "unknown"),
-                            "status": alert["state"],
-                            "description": alert["annotations"].get("description", ""),
-                            "started_at": alert["startsAt"],
-                        }
-                        for alert in data["data"]["alerts"]
-                    ]
-            return []
-        except requests.exceptions.RequestException:
+            alerts = await self.client.alerts()
+        except Exception as e:
+            logger.warning(f"Failed to fetch alerts: {str(e)}")
             return []
+        return [
+            {
+                "name": alert["labels"]["alertname"],
+                "severity": alert["labels"].get("severity", "unknown"),
+                "status": alert["state"],
+                "description": alert["annotations"].get("description", ""),
+                "started_at": alert["startsAt"],
+            }
+            for alert in alerts
+        ]
 
-    def get_system_metrics(self) -> Dict:
+    async def get_system_metrics(self) -> Dict:
         """获取系统级别的监控指标"""
         end_time = datetime.now()
         start_time = end_time - timedelta(minutes=5)
@@ -103,54 +239,37 @@ class MonitoringService:
             "network": 'rate(node_network_receive_bytes_total[5m])'
         }
 
-        metrics = {}
-        for metric_name, query in queries.items():
-            try:
-                response = requests.get(
-                    f"{self.prometheus_url}/api/v1/query_range",
-                    params={
-                        "query": query,
-                        "start": start_time.timestamp(),
-                        "end": end_time.timestamp(),
-                        "step": "15s",
-                    },
-                )
-                if response.status_code == 200:
-                    data = response.json()
-                    if data["status"] == "success" and data["data"]["result"]:
-                        # 转换数据格式以匹配前端期望
-                        values = data["data"]["result"][0]["values"]
-                        metrics[metric_name] = [
-                            {"timestamp": str(datetime.fromtimestamp(ts)), "value": float(val)}
-                            for ts, val in values
-                        ]
-                    else:
-                        metrics[metric_name] = []
-            except requests.exceptions.RequestException as e:
-                metrics[metric_name] = []
-
-        return metrics
+        metrics = await self._gather({
+            metric_name: self._first_series(query, start_time.timestamp(), end_time.timestamp(), 15)
+            for metric_name, query in queries.items()
+        })
+        # 转换数据格式以匹配前端期望
+        return {
+            metric_name: [
+                {"timestamp": str(datetime.fromtimestamp(ts)), "value": float(val)}
+                for ts, val in values
+            ]
+            for metric_name, values in metrics.items()
+        }
 
-    def get_system_alarms(self) -> List[Dict]:
+    async def get_system_alarms(self) -> List[Dict]:
         """获取系统告警信息"""
         try:
-            response = requests.get(
-                f"{self.prometheus_url}/api/v1/alerts"
-            )
-            if response.status_code == 200:
-                data = response.json()
-                if data["status"] == "success":
-                    alerts = []
-                    for alert in data["data"]["alerts"]:
-                        alerts.append({
-                            "id": alert["fingerprint"],
-                            "resource": alert["labels"].get("instance", "unknown"),
-                            "threshold": float(alert["annotations"].get("threshold", 0)),
-                            "condition": "above" if alert["annotations"].get("condition") == ">" else "below",
-                            "status": "active" if alert["state"] == "firing" else "resolved",
-                            "createdAt": alert["startsAt"]
-                        })
-                    return alerts
+            alerts = await self.client.alerts()
+        except Exception as e:
+            logger.warning(f"Failed to fetch alarms: {str(e)}")
             return []
-        except requests.exceptions.RequestException:
-            return [] 
\ No newline at end of file
+        return [
+            {
+                "id": alert["fingerprint"],
+                "resource": alert["labels"].get("instance", "unknown"),
+                "threshold": float(alert["annotations"].get("threshold", 0)),
+                "condition": "above" if alert["annotations"].get("condition") == ">" else "below",
+                "status": "active" if alert["state"] == "firing" else "resolved",
+                "createdAt": alert["startsAt"]
+            }
+            for alert in alerts
+        ]
+
+# 所有路由共享同一个连接池
+monitoring_service = MonitoringService()
@@ -0,0 +1,76 @@
+import logging
+from typing import Any, Dict, List, Optional
+import aiohttp
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PrometheusError(Exception):
+    """Prometheus HTTP API 返回的错误"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class PrometheusClient:
+    """基于 aiohttp 的 Prometheus HTTP API 异步客户端
+
+    会话在首次请求时于当前事件循环中创建，连接由 aiohttp 连接池复用（keep-alive），
+    多个查询可以用 ``asyncio.gather`` 并发发出。
+    """
+
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        timeout: Optional[float] = None,
+        pool_size: Optional[int] = None,
+    ):
+        self.base_url = (base_url or settings.PROMETHEUS_ENDPOINT).rstrip("/")
+        self.timeout = timeout or settings.PROMETHEUS_TIMEOUT
+        self.pool_size = pool_size or settings.PROMETHEUS_POOL_SIZE
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _get(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        session = self._get_session()
+        params = {key: str(value) for key, value in (params or {}).items() if value is not None}
+        async with session.get(f"{self.base_url}{path}", params=params) as response:
+            try:
+                payload = await response.json(content_type=None)
+            except ValueError:
+                raise PrometheusError(response.status, await response.text())
+            if response.status >= 400 or payload.get("status") != "success":
+                raise PrometheusError(response.status, payload.get("error") or f"HTTP {response.status}")
+            return payload["data"]
+
+    async def query(self, query: str, time: Optional[float] = None) -> List[Dict[str, Any]]:
+        """即时查询，返回 result 列表"""
+        data = await self._get("/api/v1/query", {"query": query, "time": time})
+        return data["result"]
+
+    async def query_range(self, query: str, start: float, end: float, step: float) -> List[Dict[str, Any]]:
+        """范围查询，返回 matrix 的 result 列表"""
+        data = await self._get(
+            "/api/v1/query_range", {"query": query, "start": start, "end": end, "step": step}
+        )
+        return data["result"]
+
+    async def alerts(self) -> List[Dict[str, Any]]:
+        data = await self._get("/api/v1/alerts")
+        return data["alerts"]
@@ -0,0 +1,142 @@
+import asyncio
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+def align_range(start: float, end: float, step: float) -> Tuple[float, float]:
+    """把 start/end 向下对齐到 step 网格，相邻的请求得到相同的键和相同的采样点"""
+    return math.floor(start / step) * step, math.floor(end / step) * step
+
+
+def series_points(result: Any) -> int:
+    """估算结果占用的样本数，用于限制缓存大小"""
+    if not isinstance(result, list):
+        return 1
+    return sum(len(series.get("values") or ()) or 1 for series in result if isinstance(series, dict)) or 1
+
+
+class _Entry:
+    __slots__ = ("value", "points", "expires_at")
+
+    def __init__(self, value: Any, points: int, expires_at: float):
+        self.value = value
+        self.points = points
+        self.expires_at = expires_at
+
+
+class QueryCache:
+    """Prometheus 查询结果缓存
+
+    数据每个抓取周期（scrape_interval）才变化一次，因此缓存条目在下一个周期
+    边界过期；整个窗口都已成为历史的范围查询结果不会再变，保留
+    ``historical_ttl`` 秒。条目数和样本总数都有上限，超出时按 LRU 淘汰。
+    同一个键的并发未命中只向 Prometheus 发一次请求，其余调用等待它的结果。
+    """
+
+    def __init__(
+        self,
+        interval: float = 15.0,
+        max_entries: int = 1024,
+        max_points: int = 1_000_000,
+        historical_ttl: float = 300.0,
+    ):
+        self.interval = interval
+        self.max_entries = max_entries
+        self.max_points = max_points
+        self.historical_ttl = historical_ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._points = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def align_time(self, timestamp: float) -> float:
+        return math.floor(timestamp / self.interval) * self.interval
+
+    def expires_at(self, end: Optional[float] = None, now: Optional[float] = None) -> float:
+        """下一个抓取周期边界；end 早于最近一次抓取时结果已固定"""
+        now = now if now is not None else time.time()
+        if end is not None and end < self.align_time(now) - self.interval:
+            return now + self.historical_ttl
+        return self.align_time(now) + self.interval
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.expires_at <= time.time():
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        return entry.value
+
+    def put(self, key: Hashable, value: Any, expires_at: float):
+        self._remove(key)
+        entry = _Entry(value, series_points(value), expires_at)
+        if entry.points > self.max_points:
+            return
+        self._entries[key] = entry
+        self._points += entry.points
+        while len(self._entries) > self.max_entries or self._points > self.max_points:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: Hashable):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._points -= entry.points
+
+    async def get_or_fetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[Any]],
+        end: Optional[float] = None,
+    ) -> Any:
+        """命中时直接返回，否则调用 fetch 并缓存到过期时间"""
+        value = self.get(key)
+        if value is not None:
+            self.hits += 1
+            return value
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        self.misses += 1
+        # 请求作为独立任务运行，发起它的调用方被取消时其他等待者仍能拿到结果
+        task = asyncio.ensure_future(fetch())
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._fetched(key, done, end))
+        return await asyncio.shield(task)
+
+    def _fetched(self, key: Hashable, task: asyncio.Future, end: Optional[float]):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if task.cancelled():
+            return
+        if task.exception() is None:
+            self.put(key, task.result(), self.expires_at(end))
+
+    def clear(self):
+        self._entries.clear()
+        self._points = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "points": self._points,
+            "max_entries": self.max_entries,
+            "max_points": self.max_points,
+            "interval": self.interval,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else None,
+        }
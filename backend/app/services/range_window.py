@@ -0,0 +1,121 @@
+import asyncio
+from collections import OrderedDict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Optional, Tuple
+
+RangeFetch = Callable[[str, float, float, float], Awaitable[List[Dict[str, Any]]]]
+
+
+def _series_key(metric: Dict[str, str]) -> Tuple:
+    return tuple(sorted(metric.items()))
+
+
+class _Window:
+    __slots__ = ("start", "end", "series", "lock")
+
+    def __init__(self):
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        # 标签 -> (metric, 按时间排序的 [ts, value])
+        self.series: Dict[Tuple, Tuple[Dict[str, str], Deque[List]]] = {}
+        self.lock = asyncio.Lock()
+
+
+class RangeWindows:
+    """增量滑动窗口范围查询
+
+    自动刷新的面板每次请求相同长度、向后滑动若干个 step 的窗口。这里按
+    (query, step) 保留上一次取到的序列，下一次只向 Prometheus 请求新增的尾部
+    并合并，同时淘汰滑出窗口的样本。上一次的最后一个点会重新求值，避免在
+    抓取尚未落盘时算出的值被永久保留。窗口之间不连续（如时间回退或间隔
+    超过窗口长度）时退回完整查询。
+    """
+
+    def __init__(self, fetch: RangeFetch, max_windows: int = 256):
+        self._fetch = fetch
+        self.max_windows = max_windows
+        self._windows: "OrderedDict[Hashable, _Window]" = OrderedDict()
+        self.full_fetches = 0
+        self.incremental_fetches = 0
+        self.points_fetched = 0
+        self.points_served = 0
+
+    def _window(self, key: Hashable) -> _Window:
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = _Window()
+            while len(self._windows) > self.max_windows:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+        return window
+
+    async def query_range(self, query: str, start: float, end: float, step: float) -> List[Dict[str, Any]]:
+        """返回 [start, end] 的范围查询结果，格式与 Prometheus matrix 的 result 相同
+
+        start/end 应已对齐到 step 网格，否则新旧样本的时间点对不上。
+        """
+        window = self._window((query, step))
+        async with window.lock:
+            incremental = (
+                window.end is not None
+                and window.start <= start <= window.end <= end
+            )
+            if incremental:
+                # 从上一次的最后一个点开始取，重新求值该点
+                fetch_start = window.end
+                self.incremental_fetches += 1
+            else:
+                fetch_start = start
+                window.series.clear()
+                self.full_fetches += 1
+            try:
+                result = await self._fetch(query, fetch_start, end, step)
+            except Exception:
+                # 失败后缓存的状态不再可信
+                window.start = window.end = None
+                window.series.clear()
+                raise
+            self._merge(window, result, fetch_start)
+            self._evict(window, start)
+            window.start, window.end = start, end
+            return self._snapshot(window)
+
+    def _merge(self, window: _Window, result: List[Dict[str, Any]], fetch_start: float):
+        for item in result:
+            values = item.get("values") or []
+            self.points_fetched += len(values)
+            key = _series_key(item.get("metric") or {})
+            entry = window.series.get(key)
+            if entry is None:
+                window.series[key] = (item.get("metric") or {}, deque(values))
+                continue
+            points = entry[1]
+            while points and points[-1][0] >= fetch_start:
+                points.pop()
+            points.extend(values)
+
+    def _evict(self, window: _Window, start: float):
+        for key in list(window.series):
+            points = window.series[key][1]
+            while points and points[0][0] < start:
+                points.popleft()
+            if not points:
+                # 序列已整段滑出窗口（如容器已删除）
+                del window.series[key]
+
+    def _snapshot(self, window: _Window) -> List[Dict[str, Any]]:
+        result = [{"metric": metric, "values": list(points)} for metric, points in window.series.values()]
+        self.points_served += sum(len(item["values"]) for item in result)
+        return result
+
+    def clear(self):
+        self._windows.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "windows": len(self._windows),
+            "full_fetches": self.full_fetches,
+            "incremental_fetches": self.incremental_fetches,
+            "points_fetched": self.points_fetched,
+            "points_served": self.points_served,
+        }
@@ -0,0 +1,296 @@
+import asyncio
+import time
+import logging
+from array import array
+from typing import Any, Dict, List, Optional
+from app.core.config import settings
+from app.services.async_docker import AsyncDockerClient
+
+logger = logging.getLogger(__name__)
+
+# 环形缓冲区中保存的指标列
+STAT_FIELDS = (
+    "cpu_total_usage",
+    "cpu_percent",
+    "memory_usage",
+    "memory_limit",
+    "memory_percent",
+    "blkio_read",
+    "blkio_write",
+    "network_rx",
+    "network_tx",
+    "network_rx_rate",
+    "network_tx_rate",
+)
+
+
+class RingBuffer:
+    """定长、基于 array 的环形缓冲区，每个指标一列"""
+
+    def __init__(self, capacity: int, fields=STAT_FIELDS):
+        self.capacity = capacity
+        self.fields = fields
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._columns = {field: array("d", bytes(8 * capacity)) for field in fields}
+        self._next = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, timestamp: float, values: Dict[str, float]):
+        index = self._next
+        self._timestamps[index] = timestamp
+        for field, column in self._columns.items():
+            column[index] = values.get(field, 0.0)
+        self._next = (index + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _row(self, index: int) -> Dict[str, float]:
+        row = {field: column[index] for field, column in self._columns.items()}
+        row["timestamp"] = self._timestamps[index]
+        return row
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        if not self._size:
+            return None
+        return self._row((self._next - 1) % self.capacity)
+
+    def samples(self, limit: Optional[int] = None) -> List[Dict[str, float]]:
+        """按时间从旧到新返回最近的样本"""
+        count = self._size if limit is None else min(limit, self._size)
+        start = (self._next - count) % self.capacity
+        return [self._row((start + offset) % self.capacity) for offset in range(count)]
+
+
+def _cpu_percent(stats: Dict[str, Any]) -> float:
+    cpu = stats.get("cpu_stats") or {}
+    precpu = stats.get("precpu_stats") or {}
+    cpu_delta = (cpu.get("cpu_usage") or {}).get("total_usage", 0) - (precpu.get("cpu_usage") or {}).get("total_usage", 0)
+    system_delta = cpu.get("system_cpu_usage", 0) - precpu.get("system_cpu_usage", 0)
+    online_cpus = cpu.get("online_cpus") or len((cpu.get("cpu_usage") or {}).get("percpu_usage") or []) or 1
+    if cpu_delta <= 0 or system_delta <= 0:
+        return 0.0
+    return cpu_delta / system_delta * online_cpus * 100.0
+
+
+def _memory_usage(stats: Dict[str, Any]) -> float:
+    memory = stats.get("memory_stats") or {}
+    detail = memory.get("stats") or {}
+    # cgroup v2 使用 inactive_file，v1 使用 cache，与 docker stats 的算法一致
+    cache = detail.get("inactive_file", detail.get("cache", 0))
+    return float(max(memory.get("usage", 0) - cache, 0))
+
+
+def _blkio(stats: Dict[str, Any]):
+    read = write = 0
+    for entry in (stats.get("blkio_stats") or {}).get("io_service_bytes_recursive") or []:
+        op = (entry.get("op") or "").lower()
+        if op == "read":
+            read += entry.get("value", 0)
+        elif op == "write":
+            write += entry.get("value", 0)
+    return float(read), float(write)
+
+
+class ContainerStats:
+    """单个容器的统计状态: 样本环形缓冲区 + 各网卡的最新速率"""
+
+    def __init__(self, container_id: str, capacity: int):
+        self.container_id = container_id
+        self.buffer = RingBuffer(capacity)
+        self.networks: Dict[str, Dict[str, float]] = {}
+        self._last_networks: Dict[str, Dict[str, float]] = {}
+        self._last_time: Optional[float] = None
+
+    def add_sample(self, stats: Dict[str, Any], now: Optional[float] = None):
+        now = time.time() if now is None else now
+        elapsed = now - self._last_time if self._last_time is not None else 0.0
+
+        networks = {}
+        for interface, counters in (stats.get("networks") or {}).items():
+            rx, tx = counters.get("rx_bytes", 0), counters.get("tx_bytes", 0)
+            previous = self._last_networks.get(interface)
+            rx_rate = tx_rate = 0.0
+            if previous is not None and elapsed > 0:
+                rx_rate = max(rx - previous["rx_bytes"], 0) / elapsed
+                tx_rate = max(tx - previous["tx_bytes"], 0) / elapsed
+            networks[interface] = {"rx_bytes": rx, "tx_bytes": tx, "rx_rate": rx_rate, "tx_rate": tx_rate}
+
+        memory_limit = float((stats.get("memory_stats") or {}).get("limit", 0))
+        memory_usage = _memory_usage(stats)
+        blkio_read, blkio_write = _blkio(stats)
+        self.buffer.append(now, {
+            "cpu_total_usage": float(((stats.get("cpu_stats") or {}).get("cpu_usage") or {}).get("total_usage", 0)),
+            "cpu_percent": _cpu_percent(stats),
+            "memory_usage": memory_usage,
+            "memory_limit": memory_limit,
+            "memory_percent": memory_usage / memory_limit * 100.0 if memory_limit else 0.0,
+            "blkio_read": blkio_read,
+            "blkio_write": blkio_write,
+            "network_rx": float(sum(n["rx_bytes"] for n in networks.values())),
+            "network_tx": float(sum(n["tx_bytes"] for n in networks.values())),
+            "network_rx_rate": sum(n["rx_rate"] for n in networks.values()),
+            "network_tx_rate": sum(n["tx_rate"] for n in networks.values()),
+        })
+        self.networks = networks
+        self._last_networks = networks
+        self._last_time = now
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        sample = self.buffer.latest()
+        if sample is None:
+            return None
+        eth0 = self.networks.get("eth0")
+        return {
+            **sample,
+            # 与 DockerService.get_container_stats 兼容的字段
+            "cpu_usage": int(sample["cpu_total_usage"]),
+            "memory_usage": int(sample["memory_usage"]),
+            "network_rx": eth0["rx_bytes"] if eth0 else int(sample["network_rx"]),
+            "network_tx": eth0["tx_bytes"] if eth0 else int(sample["network_tx"]),
+            "networks": self.networks,
+        }
+
+
+class StatsCollector:
+    """后台统计采集器
+
+    为每个运行中的容器保持一个流式 stats 订阅，样本写入定长环形缓冲区，
+    统计接口直接从内存读取。容器启动/停止时通过容器清单的事件自动挂载或
+    卸载订阅，另有定期对账兜底。
+
+    每个订阅长期占用一个连接，因此采集器使用自己的、不限连接数的异步客户端，
+    不占用路由请求共享的 ``docker_service.aclient`` 连接池。
+    """
+
+    def __init__(self, docker_service, capacity: Optional[int] = None, reconcile_interval: Optional[float] = None):
+        self.docker_service = docker_service
+        self.capacity = capacity or settings.STATS_BUFFER_SIZE
+        self.reconcile_interval = reconcile_interval or settings.STATS_RECONCILE_INTERVAL
+        self._containers: Dict[str, ContainerStats] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._reconciler: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listening = False
+        self._client: Optional[AsyncDockerClient] = None
+        self._stale_clients: List[AsyncDockerClient] = []
+
+    @property
+    def client(self) -> AsyncDockerClient:
+        """与 docker_service 连接同一个守护进程；连接数为 0 表示不限制"""
+        base_url = self.docker_service.base_url
+        if self._client is None or self._client.base_url != base_url:
+            if self._client is not None:
+                # 守护进程地址变了（回退到另一个地址），旧客户端在 stop 时关闭
+                self._stale_clients.append(self._client)
+            self._client = AsyncDockerClient(base_url=base_url, pool_size=0)
+        return self._client
+
+    @property
+    def running(self) -> bool:
+        return self._reconciler is not None and not self._reconciler.done()
+
+    async def start(self):
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        inventory = getattr(self.docker_service, "inventory", None)
+        if inventory is not None and not self._listening:
+            inventory.add_listener(self._on_inventory_event)
+            self._listening = True
+            inventory.start()
+        self._reconciler = asyncio.ensure_future(self._reconcile_loop())
+
+    async def stop(self):
+        if self._reconciler is not None:
+            self._reconciler.cancel()
+            self._reconciler = None
+        tasks = list(self._tasks.values())
+        for container_id in list(self._tasks):
+            self.detach(container_id)
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for client in self._stale_clients + [self._client]:
+            if client is not None:
+                await client.close()
+        self._client = None
+        self._stale_clients = []
+
+    def attach(self, container_id: str):
+        """为容器开启流式统计订阅"""
+        if container_id in self._tasks:
+            return
+        self._containers.setdefault(container_id, ContainerStats(container_id, self.capacity))
+        self._tasks[container_id] = asyncio.ensure_future(self._follow(container_id))
+
+    def detach(self, container_id: str):
+        """取消容器的统计订阅并释放缓冲区"""
+        task = self._tasks.pop(container_id, None)
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        self._containers.pop(container_id, None)
+
+    def _find(self, container_id: str) -> Optional[ContainerStats]:
+        stats = self._containers.get(container_id)
+        if stats is None:
+            matches = [s for key, s in self._containers.items() if key.startswith(container_id)]
+            if len(matches) == 1:
+                stats = matches[0]
+        return stats
+
+    def latest(self, container_id: str) -> Optional[Dict[str, Any]]:
+        stats = self._find(container_id)
+        return stats.latest() if stats is not None else None
+
+    def history(self, container_id: str, limit: Optional[int] = None) -> Optional[List[Dict[str, float]]]:
+        stats = self._find(container_id)
+        return stats.buffer.samples(limit) if stats is not None else None
+
+    async def _follow(self, container_id: str):
+        try:
+            async for sample in self.client.stream_stats(container_id):
+                stats = self._containers.get(container_id)
+                if stats is None:
+                    break
+                stats.add_sample(sample)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Stats stream for container {container_id} ended: {str(e)}")
+        # 容器停止后守护进程会关闭 stats 流
+        if self._tasks.get(container_id) is asyncio.current_task():
+            self.detach(container_id)
+
+    async def reconcile(self):
+        """按当前运行中的容器对齐订阅"""
+        running = await self.client.list_containers(
+            all=False, filters={"status": ["running"]}
+        )
+        running_ids = {container["Id"] for container in running}
+        for container_id in running_ids - set(self._tasks):
+            self.attach(container_id)
+        for container_id in set(self._tasks) - running_ids:
+            self.detach(container_id)
+
+    async def _reconcile_loop(self):
+        while True:
+            try:
+                await self.reconcile()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Error reconciling stats subscriptions: {str(e)}")
+            await asyncio.sleep(self.reconcile_interval)
+
+    def _on_inventory_event(self, event: Dict[str, Any]):
+        # 在容器清单的事件线程中调用，转交给事件循环处理
+        if event.get("Type") != "container" or self._loop is None:
+            return
+        action = event.get("Action") or event.get("status") or ""
+        container_id = event.get("id") or (event.get("Actor") or {}).get("ID")
+        if not container_id:
+            return
+        if action == "start":
+            self._loop.call_soon_threadsafe(self.attach, container_id)
+        elif action in ("die", "destroy"):
+            self._loop.call_soon_threadsafe(self.detach, container_id)
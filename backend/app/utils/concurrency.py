@@ -0,0 +1,47 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional
+
+
+async def bounded_as_completed(
+    items: Iterable[Any],
+    func: Callable[[Any], Awaitable[Any]],
+    limit: int,
+    timeout: Optional[float] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """以有限并发执行 ``func(item)``，按完成顺序逐个返回结果
+
+    每个结果是 ``{"item", "result", "error", "duration_ms"}``；单个操作超时或
+    抛出异常只记录在它自己的结果里，不影响其他操作。
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def run(item: Any) -> Dict[str, Any]:
+        async with semaphore:
+            started = time.monotonic()
+            result, error = None, None
+            try:
+                if timeout:
+                    result = await asyncio.wait_for(func(item), timeout)
+                else:
+                    result = await func(item)
+            except asyncio.TimeoutError:
+                error = f"操作超时 ({timeout}s)"
+            except Exception as e:
+                error = str(e) or e.__class__.__name__
+            return {
+                "item": item,
+                "result": result,
+                "error": error,
+                "duration_ms": round((time.monotonic() - started) * 1000, 1),
+            }
+
+    tasks = [asyncio.ensure_future(run(item)) for item in items]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # 调用方中途停止迭代（例如客户端断开）时取消剩余操作
+        for task in tasks:
+            if not task.done():
+                task.cancel()
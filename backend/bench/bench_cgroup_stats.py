@@ -0,0 +1,87 @@
+"""比较 cgroup 直读和 Docker stats 接口两种统计来源的读取耗时
+
+在 backend/ 下运行:
+
+    python -m bench.bench_cgroup_stats --containers 200 --rounds 5 --daemon-latency 0
+
+容器放在桩守护进程（tests/stub_daemon.py）和临时 cgroup 文件树中。两种来源读取
+同样的容器: cgroup 来源经 CgroupStatsProvider.read，守护进程来源经
+DockerService.get_container_stats。真实守护进程的单次 stats 请求要等待第二个
+采样点（约 1-2 秒），可以用 --daemon-latency 模拟；默认 0 只比较协议开销。
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from typing import Callable, List
+from app.core.config import settings
+from app.services.cgroup_stats import CgroupStatsProvider
+from app.services.docker_service import DockerService
+from tests.fake_cgroup import FakeCgroupTree
+from tests.stub_daemon import StubDaemon
+
+
+def _measure(read: Callable[[str], object], container_ids: List[str], rounds: int) -> List[float]:
+    latencies = []
+    for _ in range(rounds):
+        for container_id in container_ids:
+            started = time.perf_counter()
+            read(container_id)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+def _report(name: str, latencies: List[float]):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:<8} reads={len(latencies):<6} total={sum(latencies):8.3f}s "
+        f"mean={statistics.mean(latencies) * 1e6:10.1f}us "
+        f"p50={statistics.median(latencies) * 1e6:10.1f}us p99={p99 * 1e6:10.1f}us"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--containers", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--daemon-latency", type=float, default=0.0, help="单次 stats 请求的模拟延迟（秒）")
+    args = parser.parse_args()
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    # docker SDK 走 TCP，避免不同 requests 版本下 unix 套接字适配器的兼容问题
+    daemon = StubDaemon(stats_latency=args.daemon_latency, tcp=True)
+    asyncio.run_coroutine_threadsafe(daemon.start(), loop).result()
+
+    settings.CGROUP_STATS_ENABLED = True
+    tree = FakeCgroupTree()
+    container_ids = []
+    for index in range(args.containers):
+        container_id = daemon.add_container(f"bench-{index}")
+        tree.add_container(container_id, pid=10000 + index)
+        daemon.containers[container_id]["State"]["Pid"] = 10000 + index
+        container_ids.append(container_id)
+
+    service = DockerService(base_url=daemon.base_url)
+    service.inventory = None
+    provider = CgroupStatsProvider(service, cgroup_root=tree.cgroup_root, proc_root=tree.proc_root)
+    try:
+        # 第一轮要解析 cgroup 路径并打开文件，单独统计
+        _report("resolve", _measure(provider.read, container_ids, 1))
+        cgroup = _measure(provider.read, container_ids, args.rounds)
+        docker = _measure(service.get_container_stats, container_ids, args.rounds)
+        _report("cgroup", cgroup)
+        _report("docker", docker)
+        print(f"speedup  {statistics.mean(docker) / statistics.mean(cgroup):.1f}x (mean per read)")
+        print(f"open handles: {provider.open_handles}")
+    finally:
+        provider.close()
+        tree.cleanup()
+        asyncio.run_coroutine_threadsafe(daemon.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""测量 LogIndex 的写入吞吐和搜索延迟
+
+在 backend/ 下运行:
+
+    python -m bench.bench_log_index --gigabytes 2 --containers 50 --hours 24
+
+在临时目录中生成合成日志（默认约 2GB 原始文本，分布在多个容器和多个小时
+分区中）并写入 LogIndex，统计写入吞吐；然后分别测量词项、正则和时间范围
+搜索的延迟，并报告每次搜索读取的块数和跳过的块数（总块数减去读取的块数），
+用来观察分区、倒排表和块时间范围的剪枝效果。``--keep`` 保留生成的目录，
+之后可以用 ``--root`` 直接对它重复测量搜索。
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from typing import Any, Dict, List
+from app.services.log_index import INDEX_SUFFIX, PARTITION_SECONDS, LogIndex, partition_start
+
+# 常见日志行模板，{n} 为随机数字
+TEMPLATES = [
+    "GET /api/v1/items/{n} status=200 duration_ms={n}",
+    "POST /api/v1/orders status=201 duration_ms={n} user={n}",
+    "cache hit key=session:{n}",
+    "worker heartbeat queue_depth={n}",
+    "db query completed rows={n} duration_ms={n}",
+    "GET /api/v1/users/{n} status=404 duration_ms={n}",
+]
+# 少量出现的行，用于选择性高的词项和正则搜索
+RARE_TEMPLATES = [
+    "ERROR payment gateway timeout order={n} status=503",
+    "WARN connection reset by peer retry={n}",
+]
+RARE_RATIO = 0.00002
+
+
+def _line(rng: random.Random) -> str:
+    templates = RARE_TEMPLATES if rng.random() < RARE_RATIO else TEMPLATES
+    template = templates[rng.randrange(len(templates))]
+    return template.replace("{n}", str(rng.randrange(100000)))
+
+
+def generate(log_index: LogIndex, gigabytes: float, containers: int, hours: int, seed: int) -> Dict[str, Any]:
+    """按时间顺序写入合成日志，每个小时结束后 flush 一次"""
+    rng = random.Random(seed)
+    container_ids = [f"{rng.getrandbits(48):012x}" for _ in range(containers)]
+    target_bytes = int(gigabytes * (1 << 30))
+    bytes_per_hour = target_bytes // hours
+    # 分区都在过去，flush 时关闭写入器
+    first_hour = (int(time.time()) // PARTITION_SECONDS - hours - 1) * PARTITION_SECONDS
+
+    written_bytes = written_lines = 0
+    started = time.perf_counter()
+    for hour in range(hours):
+        hour_start = first_hour + hour * PARTITION_SECONDS
+        hour_bytes = 0
+        while hour_bytes < bytes_per_hour:
+            line = _line(rng)
+            # 日志按时间顺序产生，块的时间范围才有剪枝意义
+            timestamp = hour_start + hour_bytes / bytes_per_hour * PARTITION_SECONDS
+            log_index.append(container_ids[rng.randrange(containers)], timestamp, line)
+            hour_bytes += len(line) + 1
+            written_lines += 1
+        log_index.flush()
+        written_bytes += hour_bytes
+    elapsed = time.perf_counter() - started
+    return {
+        "container_ids": container_ids,
+        "first_hour": first_hour,
+        "hours": hours,
+        "bytes": written_bytes,
+        "lines": written_lines,
+        "seconds": elapsed,
+    }
+
+
+def index_summary(root: str) -> Dict[str, int]:
+    """统计磁盘上的分区、段、块数和段文件总大小"""
+    summary = {"partitions": 0, "segments": 0, "blocks": 0, "disk_bytes": 0}
+    for partition in os.listdir(root):
+        directory = os.path.join(root, partition)
+        if not (partition.isdigit() and os.path.isdir(directory)):
+            continue
+        summary["partitions"] += 1
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            summary["disk_bytes"] += os.path.getsize(path)
+            if name.endswith(INDEX_SUFFIX):
+                summary["segments"] += 1
+                with open(path) as f:
+                    summary["blocks"] += len(json.load(f)["blocks"])
+    return summary
+
+
+def _scenarios(first_hour: float, hours: int, container_ids: List[str]) -> List[Dict[str, Any]]:
+    middle = first_hour + (hours // 2) * PARTITION_SECONDS
+    return [
+        {"name": "term rare", "query": "gateway timeout", "limit": 10 ** 9},
+        {"name": "term common", "query": "heartbeat", "limit": 1000},
+        {"name": "term 1 container", "query": "gateway", "containers": container_ids[:1], "limit": 10 ** 9},
+        {"name": "regex 1h", "regex": r"status=5\d\d", "start": middle, "end": middle + PARTITION_SECONDS,
+         "limit": 10 ** 9},
+        {"name": "range 5m", "start": middle + 600, "end": middle + 900, "limit": 10 ** 9},
+        {"name": "term+range 6h", "query": "reset", "start": middle, "end": middle + 6 * PARTITION_SECONDS,
+         "limit": 10 ** 9},
+    ]
+
+
+def measure_search(log_index: LogIndex, scenario: Dict[str, Any], rounds: int, total_blocks: int):
+    params = {key: value for key, value in scenario.items() if key != "name"}
+    latencies = []
+    result = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = log_index.search(**params)
+        latencies.append(time.perf_counter() - started)
+    scanned = result["scanned_blocks"]
+    print(
+        f"{scenario['name']:<18} matches={len(result['matches']):<8} "
+        f"p50={statistics.median(latencies) * 1e3:9.1f}ms max={max(latencies) * 1e3:9.1f}ms "
+        f"blocks read={scanned:<7} skipped={total_blocks - scanned:<7} "
+        f"({(total_blocks - scanned) / total_blocks * 100 if total_blocks else 0:5.1f}%)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--gigabytes", type=float, default=2.0, help="生成的原始日志大小（GB）")
+    parser.add_argument("--containers", type=int, default=50)
+    parser.add_argument("--hours", type=int, default=24)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--root", help="使用已有的索引目录，只测量搜索")
+    parser.add_argument("--keep", action="store_true", help="保留生成的索引目录")
+    args = parser.parse_args()
+
+    root = args.root or tempfile.mkdtemp(prefix="bench-log-index-")
+    log_index = LogIndex(root=root, retention_hours=args.hours + 2)
+    try:
+        if args.root:
+            # 从已有目录推断时间范围和容器
+            partitions = log_index.partitions()
+            first_hour = partition_start(partitions[0])
+            hours = len(partitions)
+            container_ids = sorted({
+                name.rsplit("-", 1)[0] for name in os.listdir(os.path.join(root, partitions[0]))
+                if name.endswith(INDEX_SUFFIX)
+            })
+        else:
+            generated = generate(log_index, args.gigabytes, args.containers, args.hours, args.seed)
+            first_hour, hours, container_ids = generated["first_hour"], generated["hours"], generated["container_ids"]
+            print(
+                f"ingest   lines={generated['lines']} raw={generated['bytes'] / (1 << 20):.0f}MB "
+                f"time={generated['seconds']:.1f}s "
+                f"throughput={generated['bytes'] / (1 << 20) / generated['seconds']:.1f}MB/s "
+                f"({generated['lines'] / generated['seconds']:.0f} lines/s)"
+            )
+        summary = index_summary(root)
+        print(
+            f"index    partitions={summary['partitions']} segments={summary['segments']} "
+            f"blocks={summary['blocks']} disk={summary['disk_bytes'] / (1 << 20):.0f}MB"
+        )
+        for scenario in _scenarios(first_hour, hours, container_ids):
+            measure_search(log_index, scenario, args.rounds, summary["blocks"])
+    finally:
+        if args.keep or args.root:
+            print(f"index kept in {root}")
+        else:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,4 +18,9 @@ app.add_middleware(
 )
 
 # 注册路由
-app.include_router(containers.router, prefix="/api") 
\ No newline at end of file
+app.include_router(containers.router, prefix="/api") 
+
+# 关闭异步客户端的连接池
+@app.on_event("shutdown")
+async def shutdown_clients():
+    await containers.container_service.aclient.close()
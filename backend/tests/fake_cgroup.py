@@ -0,0 +1,52 @@
+"""在临时目录中构造 cgroup v2 和 /proc 的文件树，供 CgroupStatsProvider 使用"""
+import os
+import shutil
+import tempfile
+from typing import Optional
+
+
+class FakeCgroupTree:
+    def __init__(self):
+        self.root = tempfile.mkdtemp()
+        self.cgroup_root = os.path.join(self.root, "cgroup")
+        self.proc_root = os.path.join(self.root, "proc")
+        os.makedirs(self.cgroup_root)
+        os.makedirs(self.proc_root)
+        with open(os.path.join(self.cgroup_root, "cgroup.controllers"), "w") as f:
+            f.write("cpu io memory pids\n")
+
+    def scope_path(self, container_id: str) -> str:
+        return os.path.join(self.cgroup_root, "system.slice", f"docker-{container_id}.scope")
+
+    def add_container(self, container_id: str, pid: Optional[int] = None, cpu_usec: int = 1500,
+                      memory: int = 4096, rx: int = 100, tx: int = 200):
+        """按 systemd 驱动的路径创建容器的 cgroup；给出 pid 时同时创建 /proc/<pid>"""
+        path = self.scope_path(container_id)
+        os.makedirs(path, exist_ok=True)
+        self.write(container_id, cpu_usec=cpu_usec, memory=memory)
+        with open(os.path.join(path, "io.stat"), "w") as f:
+            f.write("8:0 rbytes=10 wbytes=20 rios=1 wios=2\n8:16 rbytes=1 wbytes=2 rios=0 wios=0\n")
+        if pid is not None:
+            os.makedirs(os.path.join(self.proc_root, str(pid), "net"), exist_ok=True)
+            with open(os.path.join(self.proc_root, str(pid), "cgroup"), "w") as f:
+                f.write(f"0::/system.slice/docker-{container_id}.scope\n")
+            with open(os.path.join(self.proc_root, str(pid), "net", "dev"), "w") as f:
+                f.write(
+                    "Inter-|   Receive                                                |  Transmit\n"
+                    " face |bytes    packets errs drop fifo frame compressed multicast|bytes    packets\n"
+                    f"  eth0: {rx} 1 0 0 0 0 0 0 {tx} 2 0 0 0 0 0 0\n"
+                    "    lo: 5 0 0 0 0 0 0 0 5 0 0 0 0 0 0 0\n"
+                )
+
+    def write(self, container_id: str, cpu_usec: int, memory: int):
+        path = self.scope_path(container_id)
+        with open(os.path.join(path, "cpu.stat"), "w") as f:
+            f.write(f"usage_usec {cpu_usec}\nuser_usec {cpu_usec // 2}\nsystem_usec {cpu_usec // 2}\n")
+        with open(os.path.join(path, "memory.current"), "w") as f:
+            f.write(f"{memory}\n")
+
+    def remove_container(self, container_id: str):
+        shutil.rmtree(self.scope_path(container_id), ignore_errors=True)
+
+    def cleanup(self):
+        shutil.rmtree(self.root, ignore_errors=True)
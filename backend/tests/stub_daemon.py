@@ -0,0 +1,229 @@
+"""测试用的 Docker Engine API 桩守护进程
+
+用 aiohttp 实现容器相关的一小部分接口，容器状态保存在内存中。默认监听 unix
+套接字；``tcp=True`` 时监听 127.0.0.1 上的随机端口，供同步的 docker SDK 使用。
+"""
+import asyncio
+import hashlib
+import json
+import os
+import struct
+import tempfile
+import uuid
+from typing import Any, Dict, List, Optional
+from aiohttp import web
+
+
+class StubDaemon:
+    def __init__(self, stats_interval: float = 0.05, stats_latency: float = 0.0, tcp: bool = False):
+        self.containers: Dict[str, Dict[str, Any]] = {}
+        self.logs: Dict[str, List[tuple]] = {}
+        self.stats_interval = stats_interval
+        # 单次 stats 请求的响应延迟；真实守护进程要等第二个采样点，约 1-2 秒
+        self.stats_latency = stats_latency
+        self.open_streams = 0
+        self.requests: List[str] = []
+        self._runner: Optional[web.AppRunner] = None
+        self._dir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self._dir, "docker.sock")
+        self.tcp = tcp
+        self.port: Optional[int] = None
+
+    @property
+    def base_url(self) -> str:
+        if self.tcp:
+            return f"tcp://127.0.0.1:{self.port}"
+        return f"unix://{self.socket_path}"
+
+    def add_container(self, name: str, image: str = "nginx:latest", running: bool = True,
+                      labels: Optional[Dict[str, str]] = None, tty: bool = False) -> str:
+        container_id = uuid.uuid4().hex + uuid.uuid4().hex
+        self.containers[container_id] = {
+            "Id": container_id,
+            "Name": f"/{name}",
+            "Image": self._image_id(image),
+            "Created": "2024-01-01T00:00:00Z",
+            "Config": {"Image": image, "Labels": labels or {}, "Tty": tty, "Env": []},
+            "State": {"Status": "running" if running else "created", "Running": running, "Pid": 0},
+            "HostConfig": {},
+            "NetworkSettings": {"Ports": {}},
+        }
+        return container_id
+
+    @staticmethod
+    def _image_id(image: str) -> str:
+        return "sha256:" + hashlib.sha256(image.encode()).hexdigest()
+
+    def _find(self, container_id: str) -> Dict[str, Any]:
+        for full_id, container in self.containers.items():
+            if full_id.startswith(container_id) or container["Name"] == f"/{container_id}":
+                return container
+        raise web.HTTPNotFound(
+            text=json.dumps({"message": f"No such container: {container_id}"}), content_type="application/json"
+        )
+
+    def _set_running(self, container: Dict[str, Any], running: bool):
+        container["State"]["Running"] = running
+        container["State"]["Status"] = "running" if running else "exited"
+
+    @web.middleware
+    async def _record(self, request: web.Request, handler):
+        self.requests.append(f"{request.method} {request.path}")
+        return await handler(request)
+
+    async def _ping(self, request):
+        return web.Response(text="OK")
+
+    async def _version(self, request):
+        return web.json_response({"Version": "24.0.0", "ApiVersion": "1.43", "MinAPIVersion": "1.12"})
+
+    async def _list(self, request):
+        filters = json.loads(request.query.get("filters") or "{}")
+        show_all = request.query.get("all") in ("1", "true")
+        result = []
+        for container in self.containers.values():
+            if not show_all and not container["State"]["Running"]:
+                continue
+            labels = container["Config"]["Labels"]
+            if any(
+                labels.get(label.split("=", 1)[0]) != (label.split("=", 1) + [None])[1]
+                for label in filters.get("label", [])
+            ):
+                continue
+            result.append({
+                "Id": container["Id"],
+                "Names": [container["Name"]],
+                "Image": container["Config"]["Image"],
+                "ImageID": container["Image"],
+                "State": container["State"]["Status"],
+                "Status": container["State"]["Status"],
+                "Labels": labels,
+                "Ports": [],
+                "Created": 1704067200,
+            })
+        return web.json_response(result)
+
+    async def _inspect(self, request):
+        return web.json_response(self._find(request.match_info["id"]))
+
+    async def _inspect_image(self, request):
+        name = request.match_info["name"]
+        for container in self.containers.values():
+            if name in (container["Image"], container["Image"].split(":", 1)[1], container["Config"]["Image"]):
+                return web.json_response({
+                    "Id": container["Image"], "RepoTags": [container["Config"]["Image"]], "Config": {},
+                })
+        return web.json_response({"message": f"No such image: {name}"}, status=404)
+
+    async def _create(self, request):
+        body = await request.json()
+        name = request.query.get("name") or uuid.uuid4().hex[:8]
+        if any(container["Name"] == f"/{name}" for container in self.containers.values()):
+            return web.json_response({"message": f"Conflict. The name \"/{name}\" is already in use"}, status=409)
+        container_id = self.add_container(name, body.get("Image", ""), running=False,
+                                          labels=body.get("Labels"), tty=bool(body.get("Tty")))
+        self.containers[container_id]["Config"]["Env"] = body.get("Env") or []
+        self.containers[container_id]["HostConfig"] = body.get("HostConfig") or {}
+        return web.json_response({"Id": container_id, "Warnings": []}, status=201)
+
+    async def _start(self, request):
+        container = self._find(request.match_info["id"])
+        if container["State"]["Running"]:
+            return web.Response(status=304)
+        self._set_running(container, True)
+        return web.Response(status=204)
+
+    async def _stop(self, request):
+        container = self._find(request.match_info["id"])
+        if not container["State"]["Running"]:
+            return web.Response(status=304)
+        self._set_running(container, False)
+        return web.Response(status=204)
+
+    async def _restart(self, request):
+        self._set_running(self._find(request.match_info["id"]), True)
+        return web.Response(status=204)
+
+    async def _remove(self, request):
+        container = self._find(request.match_info["id"])
+        if container["State"]["Running"] and request.query.get("force") not in ("1", "true"):
+            return web.json_response({"message": "container is running: stop the container before removing"}, status=409)
+        del self.containers[container["Id"]]
+        return web.Response(status=204)
+
+    async def _logs(self, request):
+        container = self._find(request.match_info["id"])
+        response = web.StreamResponse()
+        response.content_type = "application/vnd.docker.raw-stream"
+        await response.prepare(request)
+        for stream_type, data in self.logs.get(container["Id"], []):
+            if container["Config"]["Tty"]:
+                await response.write(data)
+            else:
+                await response.write(struct.pack(">BxxxI", stream_type, len(data)) + data)
+        await response.write_eof()
+        return response
+
+    def _sample(self, container: Dict[str, Any], tick: int) -> Dict[str, Any]:
+        return {
+            "id": container["Id"],
+            "read": "2024-01-01T00:00:00Z",
+            "cpu_stats": {"cpu_usage": {"total_usage": 1000 * tick}, "system_cpu_usage": 10000 * tick, "online_cpus": 1},
+            "precpu_stats": {"cpu_usage": {"total_usage": 1000 * max(0, tick - 1)}, "system_cpu_usage": 10000 * max(0, tick - 1)},
+            "memory_stats": {"usage": 4096, "limit": 1 << 30},
+            "networks": {"eth0": {"rx_bytes": tick, "tx_bytes": tick}},
+        }
+
+    async def _stats(self, request):
+        container = self._find(request.match_info["id"])
+        if request.query.get("stream", "").lower() in ("0", "false"):
+            await asyncio.sleep(self.stats_latency)
+            return web.json_response(self._sample(container, 1))
+        response = web.StreamResponse()
+        response.content_type = "application/json"
+        await response.prepare(request)
+        self.open_streams += 1
+        try:
+            tick = 0
+            while container["Id"] in self.containers and container["State"]["Running"]:
+                tick += 1
+                await response.write(json.dumps(self._sample(container, tick)).encode() + b"\n")
+                await asyncio.sleep(self.stats_interval)
+        finally:
+            self.open_streams -= 1
+        return response
+
+    async def start(self) -> "StubDaemon":
+        app = web.Application(middlewares=[self._record])
+        routes = [
+            ("GET", "/_ping", self._ping),
+            ("GET", "/version", self._version),
+            ("GET", "/containers/json", self._list),
+            ("GET", "/containers/{id}/json", self._inspect),
+            ("GET", "/images/{name:.+}/json", self._inspect_image),
+            ("POST", "/containers/create", self._create),
+            ("POST", "/containers/{id}/start", self._start),
+            ("POST", "/containers/{id}/stop", self._stop),
+            ("POST", "/containers/{id}/restart", self._restart),
+            ("DELETE", "/containers/{id}", self._remove),
+            ("GET", "/containers/{id}/logs", self._logs),
+            ("GET", "/containers/{id}/stats", self._stats),
+        ]
+        # docker SDK 的请求带 /v1.xx 前缀，AsyncDockerClient 在 api_version=auto 时不带
+        for prefix in ("", "/v{api_version}"):
+            for method, path, handler in routes:
+                app.router.add_route(method, prefix + path, handler)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        if self.tcp:
+            site = web.TCPSite(self._runner, "127.0.0.1", 0)
+            await site.start()
+            self.port = site._server.sockets[0].getsockname()[1]
+        else:
+            await web.UnixSite(self._runner, self.socket_path).start()
+        return self
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
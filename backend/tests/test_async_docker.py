@@ -0,0 +1,132 @@
+"""AsyncDockerClient 对桩守护进程的测试，在 backend/ 下运行: python -m pytest tests"""
+import asyncio
+import pytest
+from app.services.async_docker import AsyncDockerClient, DockerAPIError, build_container_config, STDOUT, STDERR
+from tests.stub_daemon import StubDaemon
+
+
+def run(coro_func):
+    """启动桩守护进程，把客户端传给测试协程，结束后清理"""
+    async def main():
+        daemon = await StubDaemon().start()
+        client = AsyncDockerClient(base_url=daemon.base_url, api_version="auto")
+        try:
+            return await coro_func(daemon, client)
+        finally:
+            await client.close()
+            await daemon.stop()
+    return asyncio.run(main())
+
+
+def test_ping_and_list():
+    async def check(daemon, client):
+        daemon.add_container("web", labels={"app": "web"})
+        daemon.add_container("db", running=False, labels={"app": "db"})
+        assert await client.ping()
+        assert {c["Names"][0] for c in await client.list_containers()} == {"/web", "/db"}
+        assert [c["Names"][0] for c in await client.list_containers(all=False)] == ["/web"]
+        filtered = await client.list_containers(filters={"label": ["app=db"]})
+        assert [c["Names"][0] for c in filtered] == ["/db"]
+    run(check)
+
+
+def test_lifecycle():
+    async def check(daemon, client):
+        config = build_container_config("nginx:latest", {"A": "1"}, {"80/tcp": 8080})
+        created = await client.create_container(config, name="web")
+        container_id = created["Id"]
+        assert daemon.containers[container_id]["Config"]["Env"] == ["A=1"]
+        assert daemon.containers[container_id]["HostConfig"]["PortBindings"] == {
+            "80/tcp": [{"HostIp": "", "HostPort": "8080"}]
+        }
+
+        await client.start_container(container_id)
+        assert (await client.inspect_container(container_id))["State"]["Running"]
+        await client.restart_container(container_id, timeout=1)
+        await client.stop_container(container_id, timeout=1)
+        assert not (await client.inspect_container(container_id))["State"]["Running"]
+        await client.remove_container(container_id)
+        assert container_id not in daemon.containers
+    run(check)
+
+
+def test_errors_carry_status_and_message():
+    async def check(daemon, client):
+        with pytest.raises(DockerAPIError) as error:
+            await client.inspect_container("missing")
+        assert error.value.status == 404
+        assert "No such container" in error.value.message
+
+        await client.create_container(build_container_config("nginx:latest"), name="dup")
+        with pytest.raises(DockerAPIError) as error:
+            await client.create_container(build_container_config("nginx:latest"), name="dup")
+        assert error.value.status == 409
+    run(check)
+
+
+def test_logs_are_demultiplexed():
+    async def check(daemon, client):
+        container_id = daemon.add_container("app")
+        daemon.logs[container_id] = [(STDOUT, b"hello\n"), (STDERR, b"oops\n"), (STDOUT, b"bye\n")]
+        frames = [frame async for frame in client.stream_logs(container_id)]
+        assert frames == [(STDOUT, b"hello\n"), (STDERR, b"oops\n"), (STDOUT, b"bye\n")]
+        assert await client.logs(container_id) == b"hello\noops\nbye\n"
+    run(check)
+
+
+def test_tty_logs_are_raw():
+    async def check(daemon, client):
+        container_id = daemon.add_container("tty", tty=True)
+        daemon.logs[container_id] = [(STDOUT, b"raw output\n")]
+        assert await client.logs(container_id) == b"raw output\n"
+    run(check)
+
+
+def test_stats():
+    async def check(daemon, client):
+        container_id = daemon.add_container("app")
+        assert (await client.stats(container_id))["memory_stats"]["usage"] == 4096
+
+        samples = []
+        async for sample in client.stream_stats(container_id):
+            samples.append(sample)
+            if len(samples) == 3:
+                break
+        assert [s["networks"]["eth0"]["rx_bytes"] for s in samples] == [1, 2, 3]
+    run(check)
+
+
+def test_concurrent_requests_do_not_serialize():
+    async def check(daemon, client):
+        ids = [daemon.add_container(f"c{i}", running=False) for i in range(50)]
+        await asyncio.gather(*(client.start_container(container_id) for container_id in ids))
+        assert all(daemon.containers[container_id]["State"]["Running"] for container_id in ids)
+    run(check)
+
+
+def test_docker_service_runs_on_async_client():
+    from app.services.docker_service import DockerService
+
+    async def check(daemon, client):
+        service = DockerService(base_url=daemon.base_url)
+        try:
+            container_id = daemon.add_container("svc", running=False, labels={"team": "a"})
+            assert await service.start_container_async(container_id)
+            assert await service.find_container_ids_async({"team": "a"}) == [container_id]
+            assert (await service.get_container_stats_async(container_id))["memory_usage"] == 4096
+            assert await service.stop_container_async(container_id)
+            assert await service.remove_container_async(container_id)
+            # 不存在的容器返回 False 而不是抛出异常
+            assert not await service.start_container_async(container_id)
+        finally:
+            await service.close()
+    run(check)
+
+
+def test_default_host_matches_docker_from_env(monkeypatch):
+    from app.services.async_docker import default_docker_host
+
+    monkeypatch.delenv("DOCKER_HOST", raising=False)
+    assert default_docker_host() == "unix:///var/run/docker.sock"
+    monkeypatch.setenv("DOCKER_HOST", "tcp://10.0.0.1:2375")
+    assert default_docker_host() == "tcp://10.0.0.1:2375"
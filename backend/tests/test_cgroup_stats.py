@@ -0,0 +1,108 @@
+"""CgroupStatsProvider 对临时 cgroup 文件树的测试"""
+import threading
+import time
+import pytest
+from app.core.config import settings
+from app.services.cgroup_stats import CgroupStatsProvider
+from tests.fake_cgroup import FakeCgroupTree
+
+CONTAINER_ID = "a" * 64
+
+
+class FakeDockerService:
+    """只提供 CgroupStatsProvider 用到的接口"""
+
+    def __init__(self, pids, delay: float = 0.0):
+        self.pids = pids
+        self.delay = delay
+        self.inventory = None
+
+    def get_container(self, container_id):
+        time.sleep(self.delay)
+        for full_id, pid in self.pids.items():
+            if full_id.startswith(container_id):
+                return {"id": full_id, "state": {"Pid": pid}}
+        return None
+
+    def get_container_stats(self, container_id):
+        return {"source": "docker"}
+
+
+@pytest.fixture
+def tree(monkeypatch):
+    monkeypatch.setattr(settings, "CGROUP_STATS_ENABLED", True)
+    tree = FakeCgroupTree()
+    yield tree
+    tree.cleanup()
+
+
+def _provider(tree, pids, delay: float = 0.0):
+    return CgroupStatsProvider(FakeDockerService(pids, delay), cgroup_root=tree.cgroup_root, proc_root=tree.proc_root)
+
+
+def test_reads_cgroup_files(tree):
+    tree.add_container(CONTAINER_ID, pid=42)
+    provider = _provider(tree, {CONTAINER_ID: 42})
+    stats = provider.read(CONTAINER_ID[:12])
+    assert stats["cpu_usage"] == 1500 * 1000
+    assert stats["memory_usage"] == 4096
+    assert (stats["network_rx"], stats["network_tx"]) == (100, 200)
+    assert (stats["blkio_read"], stats["blkio_write"]) == (11, 22)
+    assert stats["source"] == "cgroup"
+
+    # 句柄复用，文件内容变化后 pread 读到新值
+    tree.write(CONTAINER_ID, cpu_usec=3000, memory=8192)
+    stats = provider.read(CONTAINER_ID)
+    assert (stats["cpu_usage"], stats["memory_usage"]) == (3000 * 1000, 8192)
+    assert provider.open_handles == 1
+    provider.close()
+
+
+def test_falls_back_to_docker(tree):
+    provider = _provider(tree, {})
+    assert provider.read("missing") is None
+    assert provider.get_container_stats("missing") == {"source": "docker"}
+
+
+def test_concurrent_readers_share_one_handle(tree):
+    tree.add_container(CONTAINER_ID, pid=42)
+    provider = _provider(tree, {CONTAINER_ID: 42}, delay=0.05)
+    barrier = threading.Barrier(16)
+    results = []
+
+    def read():
+        barrier.wait()
+        results.append(provider.read(CONTAINER_ID))
+
+    threads = [threading.Thread(target=read) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all(stats is not None for stats in results)
+    assert provider.open_handles == 1
+    provider.close()
+
+
+def test_destroy_event_releases_handle(tree):
+    tree.add_container(CONTAINER_ID, pid=42)
+    provider = _provider(tree, {CONTAINER_ID: 42})
+    provider.read(CONTAINER_ID[:12])
+    handle = provider._resolve(CONTAINER_ID)
+    provider.handle_event({"Type": "container", "Action": "destroy", "id": CONTAINER_ID})
+    assert provider.open_handles == 0
+    assert handle.fds == {}
+
+
+def test_sweep_releases_handles_of_removed_cgroups(tree):
+    ids = [str(i) * 64 for i in range(1, 6)]
+    for container_id in ids:
+        tree.add_container(container_id)
+    provider = _provider(tree, {container_id: None for container_id in ids})
+    for container_id in ids:
+        assert provider.read(container_id) is not None
+    for container_id in ids[:4]:
+        tree.remove_container(container_id)
+    provider.sweep()
+    assert provider.open_handles == 1
+    provider.close()
@@ -0,0 +1,118 @@
+"""ContainerInventory 对桩事件源的测试"""
+import queue
+import threading
+import time
+from app.services.container_inventory import ContainerInventory
+
+DROP = object()
+
+
+class FakeSource:
+    """提供 loader / fetcher / event_source 三个回调的内存守护进程"""
+
+    def __init__(self):
+        self.containers = {}
+        self.events = queue.Queue()
+        self.loads = 0
+        self.fetch_hook = None
+
+    def loader(self):
+        self.loads += 1
+        return [dict(record) for record in self.containers.values()]
+
+    def fetcher(self, container_id):
+        record = self.containers.get(container_id)
+        record = dict(record) if record is not None else None
+        if self.fetch_hook is not None:
+            self.fetch_hook(container_id)
+        return record
+
+    def event_source(self, since):
+        while True:
+            event = self.events.get()
+            if event is DROP:
+                raise ConnectionError("stream dropped")
+            yield event
+
+    def emit(self, action, container_id):
+        self.events.put({"Type": "container", "Action": action, "id": container_id})
+
+
+def _wait(predicate, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert predicate()
+
+
+def _inventory(source):
+    return ContainerInventory(source.loader, source.fetcher, source.event_source, retry_interval=0.01)
+
+
+def test_events_update_inventory_and_version_increases():
+    source = FakeSource()
+    source.containers["a" * 64] = {"id": "a" * 64, "name": "web"}
+    inventory = _inventory(source)
+    inventory.start()
+    assert inventory.wait_ready(2)
+    versions = [inventory.version]
+    assert inventory.get("web")[1]["id"] == "a" * 64
+
+    source.containers["b" * 64] = {"id": "b" * 64, "name": "db"}
+    source.emit("create", "b" * 64)
+    _wait(lambda: inventory.get("db")[1] is not None)
+    versions.append(inventory.version)
+
+    source.containers["b" * 64]["name"] = "database"
+    source.emit("rename", "b" * 64)
+    _wait(lambda: inventory.get("database")[1] is not None)
+    assert inventory.get("db")[1] is None
+    versions.append(inventory.version)
+
+    del source.containers["a" * 64]
+    source.emit("destroy", "a" * 64)
+    _wait(lambda: inventory.get("a" * 12)[1] is None)
+    versions.append(inventory.version)
+
+    assert versions == sorted(set(versions))
+    assert [record["name"] for record in inventory.snapshot()[1]] == ["database"]
+    inventory.stop()
+    source.events.put(DROP)
+
+
+def test_dropped_stream_triggers_rebuild():
+    source = FakeSource()
+    inventory = _inventory(source)
+    inventory.start()
+    assert inventory.wait_ready(2)
+    version = inventory.version
+
+    # 断流期间发生的变化没有事件，只能靠重建发现
+    source.containers["c" * 64] = {"id": "c" * 64, "name": "missed"}
+    source.events.put(DROP)
+    _wait(lambda: source.loads == 2)
+    _wait(lambda: inventory.get("missed")[1] is not None)
+    assert inventory.version > version
+    inventory.stop()
+    source.events.put(DROP)
+
+
+def test_refresh_does_not_resurrect_destroyed_container():
+    """请求线程的 refresh 在 inspect 之后、写入之前遇到 destroy 事件"""
+    source = FakeSource()
+    container_id = "d" * 64
+    source.containers[container_id] = {"id": container_id, "name": "doomed"}
+    inventory = _inventory(source)
+    inventory.rebuild()
+
+    def destroy_during_first_fetch(fetched_id):
+        source.fetch_hook = None
+        del source.containers[container_id]
+        thread = threading.Thread(target=inventory.apply_event, args=({"Action": "destroy", "id": container_id},))
+        thread.start()
+        thread.join()
+
+    source.fetch_hook = destroy_during_first_fetch
+    assert inventory.refresh(container_id) is None
+    assert inventory.get(container_id)[1] is None
+    assert inventory.snapshot()[1] == []
@@ -0,0 +1,65 @@
+"""/api/v1/containers 路由对桩守护进程的测试"""
+import asyncio
+import threading
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.api.v1 import containers
+from app.services.docker_service import DockerService
+from tests.stub_daemon import StubDaemon
+
+
+@pytest.fixture
+def daemon():
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    # 同步的 docker SDK 走 TCP
+    daemon = StubDaemon(tcp=True)
+    asyncio.run_coroutine_threadsafe(daemon.start(), loop).result()
+    yield daemon
+    asyncio.run_coroutine_threadsafe(daemon.stop(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+
+
+@pytest.fixture
+def client(daemon, monkeypatch):
+    service = DockerService(base_url=daemon.base_url)
+    service.inventory = None
+    monkeypatch.setattr(containers, "docker_service", service)
+    app = FastAPI()
+    app.include_router(containers.router, prefix="/api/v1/containers")
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_get_missing_container_returns_404(client):
+    response = client.get("/api/v1/containers/nope")
+    assert response.status_code == 404
+
+
+def test_get_container(daemon, client):
+    container_id = daemon.add_container("web")
+    response = client.get(f"/api/v1/containers/{container_id[:12]}")
+    assert response.status_code == 200
+    assert response.json()["id"] == container_id
+
+
+def test_total_count_is_not_reduced_by_cursor(daemon, client):
+    for index in range(5):
+        daemon.add_container(f"c{index}")
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/v1/containers/", params=params)
+        assert response.status_code == 200
+        assert response.headers["X-Total-Count"] == "5"
+        seen += [item["id"] for item in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(daemon.containers)
@@ -0,0 +1,50 @@
+"""DockerFleet 分发逻辑的测试，用假的主机服务代替守护进程"""
+import threading
+import time
+import pytest
+from app.services.docker_fleet import DockerFleet
+
+
+class FakeService:
+    def __init__(self, blocker=None):
+        self.blocker = blocker
+
+    def query_containers(self, filters=None, fields=None):
+        if self.blocker is not None:
+            self.blocker.wait()
+        return {"items": [{"id": "c1"}]}
+
+
+@pytest.fixture
+def fleet():
+    blocker = threading.Event()
+    fleet = DockerFleet(hosts={"ok": "tcp://ok:2375", "dead": "tcp://dead:2375"}, timeout=0.2, workers_per_host=2)
+    services = {"ok": FakeService(), "dead": FakeService(blocker)}
+    fleet.service = lambda host: services[host]
+    yield fleet
+    blocker.set()
+
+
+def test_unresponsive_host_does_not_starve_healthy_hosts(fleet):
+    statuses = []
+    for _ in range(6):
+        outcome = fleet.list_containers()
+        assert outcome["hosts"]["ok"]["status"] == "ok"
+        assert outcome["items"] == [{"id": "c1", "host": "ok"}]
+        statuses.append(outcome["hosts"]["dead"]["status"])
+    # 前两次占满该主机的线程并超时，之后直接报告 busy
+    assert statuses == ["timeout", "timeout", "busy", "busy", "busy", "busy"]
+
+
+def test_host_recovers_when_calls_return(fleet):
+    fleet.list_containers()
+    fleet.service("dead").blocker.set()
+    deadline = time.monotonic() + 2
+    while fleet._slots["dead"]._value < fleet.workers_per_host and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert fleet.list_containers()["hosts"]["dead"]["status"] == "ok"
+
+
+def test_client_timeout_follows_fan_out_timeout():
+    fleet = DockerFleet(hosts={"a": "tcp://a:2375"}, timeout=3)
+    assert fleet.service("a").timeout == 3
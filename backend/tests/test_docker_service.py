@@ -0,0 +1,30 @@
+"""DockerService 批量创建的端口分配测试，对桩守护进程运行"""
+import asyncio
+from app.core.config import settings
+from app.services.docker_service import DockerService
+from tests.stub_daemon import StubDaemon
+
+
+def test_ports_bound_by_stopped_containers_are_not_reallocated():
+    async def main():
+        daemon = await StubDaemon().start()
+        service = DockerService(base_url=daemon.base_url)
+        try:
+            first = settings.BATCH_PORT_RANGE_START
+            # 已创建未启动的容器没有 PublicPort，端口只在 HostConfig 里
+            stopped = daemon.add_container("stopped", running=False)
+            daemon.containers[stopped]["HostConfig"] = {
+                "PortBindings": {"80/tcp": [{"HostIp": "", "HostPort": str(first)}]}
+            }
+            assert first in await service._used_host_ports()
+
+            specs, allocated = await service._plan_batch(
+                "batch", 2, "web-{index}", None, {"80/tcp": "auto"}, None, []
+            )
+            assert first not in allocated
+            assert [spec["ports"]["80/tcp"] for spec in specs] == allocated
+        finally:
+            await service.close()
+            await daemon.stop()
+
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+"""降采样、step 选择和时长解析的测试"""
+import math
+import time
+import numpy as np
+import pytest
+from app.services.downsample import PROMETHEUS_MAX_RESOLUTION, choose_step, downsample, lttb_indices, parse_duration
+
+
+def reference_lttb(x, y, threshold):
+    """逐点实现的 LTTB，作为向量化版本的对照"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        avg_start = int(math.floor((i + 1) * every)) + 1
+        avg_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = sum(x[avg_start:avg_end]) / (avg_end - avg_start)
+        avg_y = sum(y[avg_start:avg_end]) / (avg_end - avg_start)
+        best, best_area = None, -1.0
+        for j in range(int(math.floor(i * every)) + 1, int(math.floor((i + 1) * every)) + 1):
+            area = abs((x[a] - avg_x) * (y[j] - y[a]) - (x[a] - x[j]) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+    selected.append(n - 1)
+    return selected
+
+
+@pytest.mark.parametrize("n", [11, 12, 100, 997, 5000])
+def test_lttb_matches_reference(n):
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.float64) * 15
+    y = np.cumsum(rng.normal(size=n))
+    for threshold in (3, 5, n // 3, n - 1):
+        if threshold < 3:
+            continue
+        assert lttb_indices(x, y, threshold).tolist() == reference_lttb(x.tolist(), y.tolist(), threshold)
+
+
+def test_lttb_keeps_spikes_and_endpoints():
+    y = np.zeros(10000)
+    y[4321] = 100.0
+    indices = lttb_indices(np.arange(10000, dtype=np.float64), y, 100)
+    assert len(indices) == 100
+    assert indices[0] == 0 and indices[-1] == 9999
+    assert 4321 in indices.tolist()
+
+
+def test_downsample_large_series_is_fast():
+    values = [[1700000000 + i * 15, str(math.sin(i / 50))] for i in range(170000)]
+    started = time.perf_counter()
+    result = downsample(values, 1000)
+    elapsed = time.perf_counter() - started
+    assert len(result) == 1000
+    assert result[0] is values[0] and result[-1] is values[-1]
+    # 本地约 120ms，留出余量
+    assert elapsed < 1.0
+
+
+def test_downsample_handles_short_and_non_finite_series():
+    values = [[i, "1"] for i in range(10)]
+    assert downsample(values, 100) == values
+    values = [[i, "NaN" if i % 7 == 0 else str(i)] for i in range(100)]
+    assert len(downsample(values, 20)) == 20
+
+
+def test_choose_step():
+    # 30 天，1000 点，4 倍过采样: 2592000 / 4000 = 648 -> 900
+    assert choose_step(0, 30 * 86400, 1000, min_step=15, oversample=4) == 900
+    # 短窗口不低于抓取周期
+    assert choose_step(0, 300, 1000, min_step=15) == 15
+    # 受 Prometheus 的分辨率上限约束
+    step = choose_step(0, 86400, 100000, min_step=1)
+    assert 86400 / step <= PROMETHEUS_MAX_RESOLUTION
+    # 超出 NICE_STEPS 时取整天
+    assert choose_step(0, 10 * 365 * 86400, 100) == 86400 * math.ceil(10 * 365 / 100)
+
+
+def test_parse_duration():
+    assert parse_duration("5m") == 300
+    assert parse_duration("1h30m") == 5400
+    assert parse_duration("30d") == 30 * 86400
+    assert parse_duration("500ms") == 0.5
+
+
+@pytest.mark.parametrize("value", ["", "5", "5x", "1h-", "-1h", "1.5h", " 5m", "5m ", "h"])
+def test_parse_duration_rejects(value):
+    with pytest.raises(ValueError):
+        parse_duration(value)
@@ -0,0 +1,79 @@
+"""ImagePullScheduler 合并拉取的测试，用假的 docker 客户端"""
+import asyncio
+import time
+import pytest
+from app.services.async_docker import DockerAPIError
+from app.services.image_puller import ImagePullScheduler
+
+
+class FakeAPI:
+    base_url = "http+docker://localhost"
+
+    def __init__(self, duration: float):
+        self.duration = duration
+        self.pulls = 0
+
+    def pull(self, repository, tag=None, stream=True, decode=True):
+        self.pulls += 1
+        yield {"id": "layer1", "status": "Downloading", "progressDetail": {"current": 1, "total": 2}}
+        time.sleep(self.duration)
+        yield {"id": "layer1", "status": "Pull complete"}
+
+
+class FakeClient:
+    def __init__(self, duration: float):
+        self.api = FakeAPI(duration)
+
+
+class MissingImageAsyncClient:
+    async def inspect_image(self, name):
+        raise DockerAPIError(404, f"No such image: {name}")
+
+
+def test_one_waiter_timing_out_does_not_cancel_the_shared_pull():
+    scheduler = ImagePullScheduler(max_concurrent=2)
+    client = FakeClient(duration=0.5)
+
+    async def wait(timeout):
+        try:
+            await scheduler.ensure_image_async(client, MissingImageAsyncClient(), "nginx:latest", timeout=timeout)
+            return "ok"
+        except asyncio.TimeoutError:
+            return "timeout"
+
+    async def main():
+        return await asyncio.gather(wait(0.1), wait(5))
+
+    assert asyncio.run(main()) == ["timeout", "ok"]
+    assert client.api.pulls == 1
+    assert scheduler.status()["recent"][0]["status"] == "done"
+
+
+def test_cancelled_waiter_does_not_fail_other_waiters():
+    scheduler = ImagePullScheduler(max_concurrent=2)
+    client = FakeClient(duration=0.3)
+
+    async def main():
+        first = asyncio.ensure_future(
+            scheduler.ensure_image_async(client, MissingImageAsyncClient(), "nginx:latest", timeout=5)
+        )
+        second = asyncio.ensure_future(
+            scheduler.ensure_image_async(client, MissingImageAsyncClient(), "nginx:latest", timeout=5)
+        )
+        await asyncio.sleep(0.05)
+        first.cancel()
+        await second
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+    asyncio.run(main())
+    assert scheduler.status()["recent"][0]["status"] == "done"
+
+
+def test_sync_waiters_share_one_pull():
+    scheduler = ImagePullScheduler(max_concurrent=2)
+    client = FakeClient(duration=0.2)
+    futures = [scheduler.pull(client, "nginx") for _ in range(5)]
+    assert len({id(future) for future in futures}) == 1
+    assert futures[0].result(timeout=2) == "nginx:latest"
+    assert client.api.pulls == 1
@@ -0,0 +1,89 @@
+"""模拟模式下 KubernetesService.apply_manifests 的测试"""
+import pytest
+from app.core.config import settings
+from app.services.k8s_apply import parse_manifests
+from app.services.kubernetes_service import KubernetesService
+
+MANIFESTS = """
+apiVersion: v1
+kind: Namespace
+metadata:
+  name: shop
+---
+apiVersion: v1
+kind: ConfigMap
+metadata:
+  name: settings
+data:
+  mode: production
+---
+apiVersion: apps/v1
+kind: Deployment
+metadata:
+  name: web
+  labels: {app: web}
+spec:
+  replicas: 2
+  selector: {matchLabels: {app: web}}
+  template:
+    metadata: {labels: {app: web}}
+    spec:
+      containers: [{name: web, image: "nginx:1.25"}]
+---
+apiVersion: v1
+kind: Service
+metadata:
+  name: web
+spec:
+  selector: {app: web}
+  ports: [{port: 80}]
+"""
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "KUBERNETES_SIMULATOR_ENABLED", True)
+    monkeypatch.setattr(settings, "KUBERNETES_SIMULATOR_ROLLOUT_SECONDS", 0.01)
+    return KubernetesService()
+
+
+def _by_kind(outcome):
+    return {result["kind"]: result for result in outcome["results"]}
+
+
+def test_apply_reports_namespace_tiers_and_timings(service):
+    outcome = service.apply_manifests(parse_manifests(MANIFESTS), namespace="shop")
+    results = _by_kind(outcome)
+    assert [result["tier"] for result in outcome["results"]] == [0, 1, 2, 3]
+    assert results["Namespace"]["namespace"] is None
+    assert results["Deployment"]["namespace"] == "shop"
+    assert all(result["action"] == "created" for result in outcome["results"])
+    assert all(isinstance(result["duration_ms"], float) for result in outcome["results"])
+    assert (outcome["succeeded"], outcome["failed"], outcome["skipped"]) == (4, 0, 0)
+    assert service.simulator.read("deployments", "shop", "web").spec.replicas == 2
+
+
+def test_dry_run_diff_against_live_objects(service):
+    service.apply_manifests(parse_manifests(MANIFESTS), namespace="shop")
+    changed = MANIFESTS.replace("replicas: 2", "replicas: 5").replace("mode: production", "mode: staging")
+    outcome = service.apply_manifests(parse_manifests(changed), namespace="shop", dry_run=True, diff=True)
+    results = _by_kind(outcome)
+
+    assert results["Deployment"]["action"] == "configured"
+    assert "-  replicas: 2" in results["Deployment"]["diff"]
+    assert "+  replicas: 5" in results["Deployment"]["diff"]
+    assert results["ConfigMap"]["action"] == "configured"
+    assert "+  mode: staging" in results["ConfigMap"]["diff"]
+    assert results["Service"]["action"] == "unchanged"
+    assert results["Service"]["diff"] == ""
+    assert results["Namespace"]["action"] == "unchanged"
+    # dry-run 不改变集群
+    assert service.simulator.read("deployments", "shop", "web").spec.replicas == 2
+
+
+def test_diff_for_new_objects(service):
+    outcome = service.apply_manifests(parse_manifests(MANIFESTS), namespace="shop", dry_run=True, diff=True)
+    deployment = _by_kind(outcome)["Deployment"]
+    assert deployment["action"] == "created"
+    assert deployment["diff"].startswith("--- live/Deployment/web")
+    assert "+kind: Deployment" in deployment["diff"]
@@ -0,0 +1,93 @@
+"""Informer 对 FakeCluster 的测试，list 和 watch 都走模拟的 API Server"""
+import time
+import pytest
+from kubernetes import client
+from app.services.k8s_informer import Informer, LabelIndex, parse_label_selector
+from app.services.k8s_simulator import FakeCluster
+
+
+def _wait(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not predicate() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert predicate()
+
+
+def _names(objects):
+    return [obj.metadata.name for obj in objects]
+
+
+@pytest.fixture
+def cluster():
+    return FakeCluster(seed=1, rollout_seconds=0.01, bookmark_interval=0.05)
+
+
+@pytest.fixture
+def informer(cluster):
+    cluster.create("services", "default", cluster.new_service("web", "default"))
+    informer = Informer("services", cluster.core.list_service_for_all_namespaces, retry_interval=0.05, watch_timeout=5)
+    informer.start()
+    assert informer.wait_ready(5)
+    yield informer
+    informer.stop()
+
+
+def test_initial_list_then_watch_events(cluster, informer):
+    assert _names(informer.list()) == ["web"]
+    assert informer.stats()["relists"] == 1
+
+    cluster.create("services", "ns-a", cluster.new_service("api", "ns-a"))
+    _wait(lambda: informer.get("ns-a", "api") is not None)
+
+    updated = cluster.new_service("api", "ns-a", selector={"app": "api", "tier": "backend"})
+    cluster.replace("services", "ns-a", updated)
+    _wait(lambda: (informer.get("ns-a", "api").metadata.labels or {}).get("tier") == "backend")
+
+    cluster.delete("services", "default", "web")
+    _wait(lambda: informer.get("default", "web") is None)
+    assert _names(informer.list()) == ["api"]
+    assert informer.resource_version == str(cluster.current_version())
+    assert informer.stats()["relists"] == 1
+
+
+def test_bookmark_advances_resource_version_without_changing_cache(cluster, informer):
+    events = informer.stats()["events"]
+    version = int(informer.resource_version)
+    # 其他资源的变化不会发给 services 的 watch，只通过 BOOKMARK 推进 resourceVersion
+    cluster.create("deployments", "default", cluster.new_deployment("worker", "default"), ready=True)
+    _wait(lambda: int(informer.resource_version) == cluster.current_version())
+    assert int(informer.resource_version) > version
+    assert informer.stats()["events"] == events
+    assert _names(informer.list()) == ["web"]
+
+
+def test_expired_resource_version_triggers_relist(cluster, informer):
+    cluster._history_size = 1
+    # 在同一把锁内连续写入，watch 读到事件前历史就被裁剪，只能收到 410
+    with cluster._changed:
+        for index in range(5):
+            cluster.create("services", "default", cluster.new_service(f"svc-{index}", "default"))
+    _wait(lambda: informer.stats()["relists"] == 2)
+    _wait(lambda: len(informer.list()) == 6)
+
+
+def test_label_index_intersections():
+    m = client
+    def service(name, namespace, labels):
+        return m.V1Service(metadata=m.V1ObjectMeta(name=name, namespace=namespace, labels=labels))
+
+    index = LabelIndex([
+        service("a", "prod", {"app": "web", "tier": "frontend"}),
+        service("b", "prod", {"app": "api", "tier": "backend"}),
+        service("c", "dev", {"app": "web", "tier": "frontend"}),
+        service("d", "dev", {"app": "web", "tier": "backend"}),
+    ])
+    assert _names(index.select(labels={"app": "web"})) == ["c", "d", "a"]
+    assert _names(index.select(namespace="dev", labels={"app": "web", "tier": "frontend"})) == ["c"]
+    assert _names(index.select(namespace="prod", labels=parse_label_selector("tier=frontend"))) == ["a"]
+    assert index.select(namespace="prod", labels={"app": "missing"}) == []
+    assert index.select(namespace="staging") == []
+
+    index.remove("dev/c")
+    assert _names(index.select(labels={"tier": "frontend"})) == ["a"]
+    assert index.namespaces == 2
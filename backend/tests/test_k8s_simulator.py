@@ -0,0 +1,39 @@
+"""FakeCluster 的分页和 watch 测试"""
+import json
+import threading
+import time
+from app.services.k8s_simulator import FakeCluster
+
+
+def test_list_pages_with_continue_token():
+    cluster = FakeCluster(seed=1)
+    for index in range(5):
+        cluster.create("services", "default", cluster.new_service(f"svc-{index}", "default"))
+    names, token = [], None
+    while True:
+        page = cluster.core.list_service_for_all_namespaces(limit=2, _continue=token)
+        names += [obj.metadata.name for obj in page.items]
+        token = page.metadata._continue
+        if not token:
+            break
+    assert names == [f"svc-{index}" for index in range(5)]
+
+
+def test_watch_reports_gone_when_history_is_trimmed_while_waiting():
+    cluster = FakeCluster(seed=1, history_size=1, bookmark_interval=0.05)
+    cluster.create("services", "default", cluster.new_service("web", "default"))
+    response = cluster.core.list_service_for_all_namespaces(
+        watch=True, resource_version=str(cluster.current_version()), timeout_seconds=5
+    )
+    lines = []
+    reader = threading.Thread(target=lambda: lines.extend(response.stream()))
+    reader.start()
+    time.sleep(0.1)
+    # watch 正在等待时一次写入多个事件，历史被裁剪到游标之后
+    with cluster._changed:
+        for index in range(5):
+            cluster.create("services", "default", cluster.new_service(f"svc-{index}", "default"))
+    reader.join(timeout=5)
+    events = [json.loads(line) for line in lines]
+    assert [event["type"] for event in events if event["type"] != "BOOKMARK"] == ["ERROR"]
+    assert events[-1]["object"]["code"] == 410
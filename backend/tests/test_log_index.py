@@ -0,0 +1,90 @@
+"""LogIndex / LogIngester 对临时目录的测试"""
+import time
+import pytest
+from app.services.log_index import LogIndex, LogIngester
+
+CONTAINER_ID = "abcdef0123456789" * 4
+
+
+class FakeAPI:
+    def __init__(self, lines):
+        self.lines = lines
+
+    def logs(self, container_id, **kwargs):
+        return "".join(f"{stamp} {line}\n" for stamp, line in self.lines).encode()
+
+
+class FakeDockerService:
+    def __init__(self, lines):
+        self.client = type("Client", (), {"api": FakeAPI(lines)})()
+
+    def query_containers(self, filters=None):
+        return {"items": [{"id": CONTAINER_ID}]}
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LogIndex(root=str(tmp_path), block_size=4096, segment_max_bytes=1 << 20, retention_hours=1)
+
+
+def _stamp(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(timestamp)) + ".000000000Z"
+
+
+def test_container_filter_accepts_full_and_short_ids(index):
+    now = time.time()
+    ingester = LogIngester(FakeDockerService([(_stamp(now - 5), "request failed with error")]), index)
+    ingester.run_once()
+    for container in (CONTAINER_ID, CONTAINER_ID[:12], CONTAINER_ID[:6]):
+        result = index.search(query="error", containers=[container])
+        assert [match["line"] for match in result["matches"]] == ["request failed with error"], container
+    assert index.search(query="error", containers=["ffff"])["matches"] == []
+
+
+def test_only_one_ingester_writes(index):
+    """同一个索引目录上的多个采集器（gunicorn 的多个 worker）只有一个写入"""
+    now = time.time()
+    lines = [(_stamp(now - 5), "hello from the container")]
+    ingesters = [LogIngester(FakeDockerService(lines), index, interval=0.05) for _ in range(4)]
+    for ingester in ingesters:
+        ingester.start()
+    time.sleep(0.3)
+    for ingester in ingesters:
+        ingester.stop()
+    for ingester in ingesters:
+        ingester._thread.join(timeout=1)
+    assert len(index.search(query="hello")["matches"]) == 1
+
+    # 持锁的采集器停止后，其他采集器可以接管
+    assert not any(ingester.is_leader for ingester in ingesters)
+    assert ingesters[1].acquire_leadership()
+    assert not ingesters[2].acquire_leadership()
+    ingesters[1].release_leadership()
+
+
+def test_maintenance_runs_on_first_cycle_with_long_interval(index, monkeypatch):
+    calls = []
+    monkeypatch.setattr(index, "enforce_retention", lambda: calls.append("retention") or [])
+    monkeypatch.setattr(index, "compact", lambda: calls.append("compact"))
+    # 采集间隔不小于一小时时原来的计数条件永远不成立
+    ingester = LogIngester(FakeDockerService([]), index, interval=3600)
+    ingester.start()
+    deadline = time.time() + 2
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+    ingester.stop()
+    assert calls == ["retention", "compact"]
+
+
+def test_new_leader_resumes_after_indexed_lines(index):
+    now = time.time()
+    lines = [(_stamp(now - 5), "first line"), (_stamp(now - 4), "second line")]
+    first = LogIngester(FakeDockerService(lines), index)
+    first.run_once()
+
+    lines.append((_stamp(now - 3), "third line"))
+    second = LogIngester(FakeDockerService(lines), index)
+    second.run_once()
+    assert sorted(match["line"] for match in index.search(query="line")["matches"]) == [
+        "first line", "second line", "third line",
+    ]
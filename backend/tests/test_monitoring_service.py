@@ -0,0 +1,43 @@
+"""MonitoringService 容器指标查询的测试，用记录查询的假 query_range 代替 Prometheus"""
+import asyncio
+import re
+from datetime import datetime, timedelta
+from app.services.monitoring_service import CONTAINER_QUERIES, MonitoringService
+
+END = datetime(2024, 1, 1, 12, 0, 0)
+START = END - timedelta(minutes=10)
+
+
+def _service():
+    service = MonitoringService()
+    queries = []
+
+    async def query_range(query, start, end, step):
+        queries.append(query)
+        # 每个匹配到的容器有两个序列（例如多个网卡），按 container_id 聚合后只剩一个
+        ids = re.search(r'container_id=~?"([^"]*)"', query).group(1).split("|")
+        if not query.startswith("sum by (container_id)"):
+            return [{"metric": {"container_id": ids[0], "interface": interface}, "values": [[start, "1"]]}
+                    for interface in ("eth0", "eth1")]
+        return [{"metric": {"container_id": container_id}, "values": [[start, "2"]]} for container_id in ids]
+
+    service.query_range = query_range
+    return service, queries
+
+
+def test_batch_of_full_ids_uses_two_chunks():
+    service, queries = _service()
+    container_ids = [f"{index:064x}" for index in range(100)]
+    metrics = asyncio.run(service.get_containers_metrics(container_ids, start=START, end=END))
+    # 64 字符的 ID 在默认 4000 字符的上限下分成 2 组，共 2 x 4 个查询
+    assert len(queries) == 2 * len(CONTAINER_QUERIES)
+    assert all(values == [[START.timestamp(), "2"]] for item in metrics.values() for values in item.values())
+
+
+def test_single_container_matches_batch():
+    service, queries = _service()
+    container_id = "a" * 64
+    single = asyncio.run(service.get_container_metrics(container_id, start=START, end=END))
+    batch = asyncio.run(service.get_containers_metrics([container_id], start=START, end=END))
+    assert all(query.startswith("sum by (container_id)") for query in queries)
+    assert single == batch[container_id]
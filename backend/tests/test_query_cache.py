@@ -0,0 +1,47 @@
+"""QueryCache 合并请求的测试"""
+import asyncio
+import pytest
+from app.services.query_cache import QueryCache
+
+
+def test_cancelled_leader_does_not_fail_coalesced_waiters():
+    cache = QueryCache(interval=15)
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return [{"values": [[0, "1"]]}]
+
+    async def main():
+        leader = asyncio.ensure_future(cache.get_or_fetch("q", fetch))
+        await asyncio.sleep(0)
+        waiters = [asyncio.ensure_future(cache.get_or_fetch("q", fetch)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        leader.cancel()
+        results = await asyncio.gather(*waiters)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return results
+
+    results = asyncio.run(main())
+    assert results == [[{"values": [[0, "1"]]}]] * 3
+    assert len(calls) == 1
+    assert cache.get("q") == [{"values": [[0, "1"]]}]
+    assert (cache.misses, cache.coalesced) == (1, 3)
+
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    cache = QueryCache(interval=15)
+
+    async def fetch():
+        await asyncio.sleep(0.05)
+        raise RuntimeError("prometheus down")
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_fetch("q", fetch) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get("q") is None
+    assert cache._inflight == {}
@@ -0,0 +1,80 @@
+"""RangeWindows 增量范围查询的测试，用按时间生成样本的假 Prometheus"""
+import asyncio
+import pytest
+from app.services.range_window import RangeWindows
+
+
+class FakePrometheus:
+    """每个 step 一个点，值等于时间戳；可以让下一次请求失败"""
+
+    def __init__(self):
+        self.calls = []
+        self.fail = False
+
+    async def query_range(self, query, start, end, step):
+        self.calls.append((start, end))
+        if self.fail:
+            raise RuntimeError("prometheus down")
+        values = []
+        ts = start
+        while ts <= end:
+            values.append([ts, str(ts)])
+            ts += step
+        return [{"metric": {"container_id": "a"}, "values": values}]
+
+
+def _timestamps(result):
+    return [ts for ts, _ in result[0]["values"]]
+
+
+def _run(windows, *ranges):
+    async def main():
+        return [await windows.query_range("up", start, end, 30) for start, end in ranges]
+    return asyncio.run(main())
+
+
+def test_second_call_fetches_only_the_tail_and_evicts_the_front():
+    prometheus = FakePrometheus()
+    windows = RangeWindows(prometheus.query_range)
+    first, second = _run(windows, (0, 300), (60, 360))
+    assert prometheus.calls == [(0, 300), (300, 360)]
+    assert _timestamps(first) == list(range(0, 301, 30))
+    # 前面两个点滑出窗口，尾部新增两个点，300 重新求值后只保留一份
+    assert _timestamps(second) == list(range(60, 361, 30))
+    assert windows.stats()["full_fetches"] == 1
+    assert windows.stats()["incremental_fetches"] == 1
+
+
+@pytest.mark.parametrize("second", [(-60, 240), (400, 700)], ids=["time-went-back", "gap-beyond-window"])
+def test_falls_back_to_full_fetch(second):
+    prometheus = FakePrometheus()
+    windows = RangeWindows(prometheus.query_range)
+    _, result = _run(windows, (0, 300), second)
+    assert prometheus.calls == [(0, 300), second]
+    assert _timestamps(result) == list(range(second[0], second[1] + 1, 30))
+    assert windows.stats()["full_fetches"] == 2
+
+
+def test_failed_fetch_resets_the_window():
+    prometheus = FakePrometheus()
+    windows = RangeWindows(prometheus.query_range)
+    _run(windows, (0, 300))
+    prometheus.fail = True
+    with pytest.raises(RuntimeError):
+        _run(windows, (30, 330))
+    prometheus.fail = False
+    (result,) = _run(windows, (60, 360))
+    # 失败后不再做增量查询，重新取完整窗口
+    assert prometheus.calls[-1] == (60, 360)
+    assert _timestamps(result) == list(range(60, 361, 30))
+
+
+def test_windows_are_bounded():
+    prometheus = FakePrometheus()
+    windows = RangeWindows(prometheus.query_range, max_windows=2)
+
+    async def main():
+        for query in ("a", "b", "c"):
+            await windows.query_range(query, 0, 60, 30)
+    asyncio.run(main())
+    assert windows.stats()["windows"] == 2
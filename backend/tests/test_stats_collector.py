@@ -0,0 +1,59 @@
+"""StatsCollector 对桩守护进程的测试"""
+import asyncio
+from app.services.docker_service import DockerService
+from app.services.stats_collector import StatsCollector
+from tests.stub_daemon import StubDaemon
+
+
+async def _wait_for(predicate, timeout: float = 5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def test_subscriptions_do_not_exhaust_request_pool():
+    """运行中的容器多于请求连接池大小时，路由的 Docker 调用仍然可用"""
+    async def main():
+        daemon = await StubDaemon(stats_interval=0.1).start()
+        service = DockerService(base_url=daemon.base_url)
+        service.inventory = None
+        collector = StatsCollector(service, capacity=16, reconcile_interval=60)
+        running = [daemon.add_container(f"c{i}") for i in range(service.aclient.pool_size + 5)]
+        stopped = daemon.add_container("idle", running=False)
+        try:
+            await collector.start()
+            await _wait_for(lambda: all(collector.latest(container_id) for container_id in running))
+            assert daemon.open_streams == len(running)
+
+            assert await asyncio.wait_for(service.start_container_async(stopped), 2)
+            assert await asyncio.wait_for(service.find_container_ids_async({}), 2)
+        finally:
+            await collector.stop()
+            await service.close()
+            await daemon.stop()
+
+    asyncio.run(main())
+
+
+def test_stream_end_detaches_container():
+    async def main():
+        daemon = await StubDaemon(stats_interval=0.02).start()
+        service = DockerService(base_url=daemon.base_url)
+        service.inventory = None
+        collector = StatsCollector(service, capacity=16, reconcile_interval=60)
+        container_id = daemon.add_container("web")
+        try:
+            await collector.start()
+            await _wait_for(lambda: collector.latest(container_id) is not None)
+            history = collector.history(container_id[:12])
+            assert history and history[-1]["network_rx"] >= 1
+
+            daemon.containers[container_id]["State"]["Running"] = False
+            await _wait_for(lambda: collector.latest(container_id) is None)
+        finally:
+            await collector.stop()
+            await service.close()
+            await daemon.stop()
+
+    asyncio.run(main())